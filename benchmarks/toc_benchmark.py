@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Benchmark of the TOC tree representation
+
+Compares the (legacy) dictionaries tree, built recursively with a process-wide ID counter,
+to the slotted :class:`doctool.helpers.Types.TOCNode` tree built iteratively by :class:`Types.TOCList`.
+
+Usage::
+
+    python benchmarks/toc_benchmark.py [--packages 50] [--modules 1000] [--depth 3000]
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import collections
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from doctool.helpers import Types  # noqa: E402
+
+
+class LegacyTOC(object):
+    """
+    Reference implementation of the former TOC tree (dictionaries & KeyList children)
+    """
+    GLOBAL_ID = 0
+
+    def __init__(self, suffix='api'):
+        self.suffix = suffix
+        self.main_dict = collections.OrderedDict()
+        self.alias = {}
+        self.items = Types.KeyList(key='hash')
+
+    def map_trie(self, node, trunk, alias):
+        for child in node.sorted_children():
+            if child.docname:
+                trunk[child.title or child.name.lower().capitalize()] = '{0}/{1}.html'.format(self.suffix, child.docname)
+            if child.children:
+                if child.name not in trunk:
+                    trunk[child.name] = collections.OrderedDict()
+                    alias[child.name] = {'__alias__': ' '.join(child.name.split('_')).capitalize()}
+                self.map_trie(child, trunk[child.name], alias[child.name])
+
+    def children_analysis(self, data, alias, root_item=None):
+        for root, link in data.items():
+            is_file = isinstance(link, str)
+            current_link = 'unknown{0}'.format(LegacyTOC.GLOBAL_ID)
+            item = dict(name=root,
+                        alias='' if is_file else alias[root]['__alias__'],
+                        hash=LegacyTOC.GLOBAL_ID,
+                        children=Types.KeyList(key='hash'))
+            LegacyTOC.GLOBAL_ID += 1
+            if link and is_file:
+                item['link'] = current_link = link
+            if root_item and current_link not in root_item['children']:
+                root_item['children'].append(item)
+            elif current_link not in self.items:
+                self.items.append(item)
+            if link and not is_file:
+                self.children_analysis(link, alias[root], root_item=item)
+
+    def build(self, tree):
+        self.map_trie(tree, self.main_dict, self.alias)
+        self.children_analysis(self.main_dict, self.alias)
+        return list(self.items)
+
+
+def legacy(tree):
+    return LegacyTOC().build(tree)
+
+
+def compact(tree):
+    return Types.TOCList(is_api=True, suffix='api', master_name='index', tree=tree).build().items
+
+
+def wide_trie(packages, modules):
+    """
+    Builds a package trie of ``packages`` packages of ``modules`` modules each
+    """
+    trie = Types.PackageTrie()
+    for p in range(packages):
+        package = 'pkg.package_{0}'.format(p)
+        trie.insert(package, title='package_{0} Package'.format(p))
+        for m in range(modules):
+            trie.insert('{0}.module_{1}'.format(package, m), title='module_{0} Module'.format(m))
+    return trie
+
+
+def deep_trie(depth):
+    """
+    Builds a package trie made of a single chain of ``depth`` nested packages
+    """
+    trie, parts = Types.PackageTrie(), []
+    for d in range(depth):
+        parts.append('level_{0}'.format(d))
+        trie.insert('.'.join(parts), title='Level {0}'.format(d))
+    return trie
+
+
+def measure(build, tree):
+    """
+    Measures the build of a TOC tree
+
+    :return: The elapsed time (s) & the retained memory (bytes), or the raised error name
+    :rtype: tuple
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        items = build(tree)
+    except RecursionError as error:
+        tracemalloc.stop()
+        return type(error).__name__, ''
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del items
+    return elapsed, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TOC tree representation benchmark')
+    parser.add_argument('--packages', type=int, default=50)
+    parser.add_argument('--modules', type=int, default=1000)
+    parser.add_argument('--depth', type=int, default=3000)
+    args = parser.parse_args()
+
+    scenarios = (
+        ('wide ({0} nodes)'.format(args.packages * (args.modules + 1)), wide_trie(args.packages, args.modules)),
+        ('deep ({0} levels)'.format(args.depth), deep_trie(args.depth)),
+    )
+    for label, tree in scenarios:
+        for name, build in (('legacy', legacy), ('compact', compact)):
+            elapsed, retained = measure(build, tree)
+            if isinstance(elapsed, str):
+                print('{0:<20} {1:<8} {2}'.format(label, name, elapsed))
+            else:
+                print('{0:<20} {1:<8} {2:8.3f}s {3:10.1f} KiB'.format(label, name, elapsed, retained / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -33,14 +33,12 @@ SOFTWARE.
 Configure the way documentation will be generated
 """
 import os
-import re
 import sys
 
 counter = 0
 DOCTOOL_ROOTDIR = r'{{ doctool_rootdir }}'.replace('\\', '/')
-
-re_relative_path = re.compile(r'(\.\./|\./)')
-re_file_directives = re.compile(r'(.. include::|.. literalinclude::|.. image::|.. figure::|:download:)')
+# This file is generated out of the sources, relative paths are resolved against the latter
+SOURCE_DIR = r'{{ source_dir }}'
 
 
 def append_sys_paths(source_dir=None):
@@ -64,87 +62,34 @@ def append_sys_paths(source_dir=None):
 append_sys_paths(DOCTOOL_ROOTDIR)
 
 # Here, goes all Core Framework imports
-from doctool import settings
-from doctool.roles import jira
-from doctool.roles import downloads as downloads_roles
-from doctool.directives import epydoc
-from doctool.directives import releases
-from doctool.directives import downloads
+from doctool import finders
+from doctool import sphinxconf
 from doctool.helpers import ProjectHelper as Helper
 
 {% if not javasphinx %}
+# The source roots are indexed once, imports resolving against the index (not sys.path)
+import_roots = [DOCTOOL_ROOTDIR]
 {% if dirs2append %}
 {% for directory in dirs2append %}
-append_sys_paths(source_dir=r'{{directory}}')
+import_roots.append(r'{{directory}}')
 {% endfor %}
 {% endif %}
 {% if extra_paths %}
 {% for p in extra_paths %}
-append_sys_paths(source_dir=Helper.handle_path(r'{{p}}'))
+import_roots.append(Helper.handle_path(r'{{p}}'))
 {% endfor %}
 {% endif %}
+finders.install(import_roots)
 {% endif %}
 
 
-def doctool_doctree(app, doctree, docname=None):
-    """
-    Doctool doctree hook
-
-    :param app:
-    :param doctree:
-    """
-
-    paths = [settings.REPO_BASE]
-    {% if projects %}
-    {% for proj in projects %}
-    paths.append(r'{{proj.src_dirname}}')
-    {% endfor %}
-    {% endif %}
-
-    try:
-        # FIXME
-        import xml.etree.ElementTree as ET
-        xml_node = ET.fromstring('{0}'.format(doctree))
-        targets = xml_node.xpath('//download_reference//attribute::reftarget')
-        for possible_link_node in targets:
-            if not os.path.exists(possible_link_node):
-                cleaned_link = re_relative_path.sub('', possible_link_node)
-
-                for base in paths:
-                    guess = Helper.absjoin(base, cleaned_link)
-                    if os.path.exists(guess):
-                        possible_link_node.getparent().attrib['reftarget'] = guess
-                        break
-
-    except Exception as exc:
-        print('XML Handled Exception : {0}'.format(exc))
-
-
 def setup(app):
-    # Allow to connect an handler on pre-process `autodoc-process-docstring` signal
-    # app.connect('autodoc-process-docstring', debug_docstring)
     """
+    The Sphinx hooks are shared by all projects (see doctool.sphinxconf)
 
     :param app:
     """
-    paths = []
-    {%if projects %}
-    {% for proj in projects %}
-    paths.append(r'{{proj.src_dirname}}')
-    {% endfor %}
-    {% endif %}
-
-    epydoc.setup(app, projects_paths=paths)
-    releases.setup(app, projects_paths=paths)
-    downloads.setup(app, projects_paths=paths)
-
-    app.add_role('jira_issue', jira.issue_role)
-    app.add_role('jira_story', jira.story_role)
-    app.add_role('download-inline', downloads_roles.download_inline_role)
-
-    app.add_config_value('jira_project_url', None, 'env')
-
-    app.connect('doctree-resolved', doctool_doctree)
+    sphinxconf.setup(app)
 
 
 html_show_sourcelink = False
@@ -187,6 +132,20 @@ extensions.append("{{html_theme}}")
 {% if javasphinx %}
 extensions.append('javasphinx')
 {% endif %}
+# The navigation is exported out of the Sphinx environment
+extensions.append('doctool.extensions.navigation')
+doctool_nav_prefix = '{{ uid }}'
+# The projects data are loaded lazily by the templates, out of the configuration
+extensions.append('doctool.extensions.context')
+doctool_context = r'{{ context_file }}'
+{% if virtual_sources %}
+# Generated API sources are handed over in-memory (single bundle)
+extensions.append('doctool.extensions.virtual')
+doctool_virtual_sources = r'{{ virtual_sources }}'
+{% endif %}
+{% if imgmath_image_format %}
+imgmath_image_format = "{{imgmath_image_format}}"
+{% endif %}
 # Add any paths that contain templates here, relative to this directory.
 templates_path = [r'{{templates_dir}}']
 {% if graphviz_dot %}
@@ -391,44 +350,8 @@ html_context = {
     'master_title': '{{ master_title }}',
     'TITLE': '{{ TITLE }}',
     'MASTER_TITLE': '{{ MASTER_TITLE }}',
-    'current_project': None,
-    'home_project': None,
-    'doc_projects': [],
-    'api_doc_projects': [],
-    'current_project_name': '{{ project_name }}'
+    'MENU_FILENAME': '{{ MENU_FILENAME }}'
 }
-{% if projects %}
-html_context['doc_projects'] = []
-html_context['api_doc_projects'] = []
-{% for proj in projects %}
-c_project = dict(name='{{ proj.name }}',
-                 id='{{ proj.id }}',
-                 nav='{{ proj.nav }}',
-                 icon='{{ proj.icon }}',
-                 slug='{{ proj.slug }}',
-                 search={{ proj.search }},
-                 version='{{ metadata.version }}',
-                 layout='{{ proj.layout }}',
-                 menu=dict(left={{ proj.menu.left }}, right={{ proj.menu.right }}),
-                 first_link=r'{{ proj.first_link }}',
-                 is_api='{{ proj.is_api }}' == "1",
-                 toctree=eval(compile("""{{ proj.toctree }}\n""", '<string>', 'eval')))
-{% if proj.name == project_name %}
-html_context['current_project'] = c_project
-{% endif %}
-{% if proj.home %}
-html_context['home_project'] = c_project
-{% elif proj.is_api %}
-html_context['api_doc_projects'].append(c_project)
-{% else %}
-html_context['doc_projects'].append(c_project)
-{% endif %}
-{% endfor %}
-{% endif %}
-
-html_context['searchable_projects'] = [
-    p for p in html_context['doc_projects'] + html_context['api_doc_projects'] if p.get('search')
-]
 
 # Available Themes are:
 # import sphinx_bootstrap_theme
@@ -472,7 +395,7 @@ html_short_title = "{{project_name}}"
 # The name of an image file (relative to this directory) to place at the top
 # of the sidebar.
 {% if theme.html_logo %}
-html_logo = r'{{theme.html_logo}}'
+html_logo = os.path.join(SOURCE_DIR, r'{{theme.html_logo}}')
 {% endif %}
 
 # The name of an image file (within the _static path) to use as favicon of the
@@ -480,16 +403,16 @@ html_logo = r'{{theme.html_logo}}'
 # pixels large.
 
 {% if theme.html_favicon %}
-html_favicon = r'{{theme.html_favicon}}'
+html_favicon = os.path.join(SOURCE_DIR, r'{{theme.html_favicon}}')
 {% endif %}
 
 
 # Add any paths that contain custom _static files (such as style sheets) here,
-# relative to this directory. They are copied after the builtin _static files,
+# relative to the source directory. They are copied after the builtin _static files,
 # so a file named "default.css" will overwrite the builtin "default.css".
-html_static_path = [r'_static']
+html_static_path = [os.path.join(SOURCE_DIR, r'_static')]
 {% for static_path in html_static_paths %}
-html_static_path.append(r'{{ static_path }}')
+html_static_path.append(os.path.join(SOURCE_DIR, r'{{ static_path }}'))
 {% endfor %}
 
 # If not '', a 'Last updated on:' timestamp is inserted at every page bottom,
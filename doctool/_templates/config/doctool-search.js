@@ -20,234 +20,360 @@
  OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
  SOFTWARE.
  */
-(function($, $doctoolSettings, $doctoolVersions) {
-    var DoctoolApp = function() {
-        var self = this,
-            Iframe = function(frameObject, contentDivId, pingInMs, debugMode) {
-                var iframeSelf = this;
-
-                iframeSelf.id = frameObject.attr('id');
-                iframeSelf.currentHeight = frameObject.height();
-                iframeSelf.previousHeight = 0;
-                iframeSelf.contentDivId = contentDivId;
-                iframeSelf.pingInMs = pingInMs;
-                iframeSelf.debugMode = debugMode;
-                iframeSelf.interval = null;
-                iframeSelf.loader = '#' + iframeSelf.id + '-loader';
-
-                if (iframeSelf.debugMode) {
-                    console.log('Iframe ID : ' + iframeSelf.id + ' initialized');
-                }
-                iframeSelf._resizing = function() {
-                    iframeSelf.currentHeight = frameObject.contents().find(iframeSelf.contentDivId).height() + 30;
-
-                    if (iframeSelf.debugMode) {
-                        console.log('Iframe ID : ' + iframeSelf.id + ' resizing from => ' +
-                            iframeSelf.previousHeight + ' to => ' + iframeSelf.currentHeight + '... ');
-                    }
-                    if(iframeSelf.interval && iframeSelf.currentHeight === iframeSelf.previousHeight) {
-                        clearInterval(iframeSelf.interval);
-                        $(iframeSelf.loader).fadeOut(500);
-                        if (iframeSelf.debugMode) {
-                            console.log('Iframe ID : ' + iframeSelf.id +
-                                ' fully resized (' + iframeSelf.currentHeight + 'px) !');
-                        }
-                    }
-                    frameObject.height(iframeSelf.currentHeight);
-                    iframeSelf.previousHeight = iframeSelf.currentHeight;
-                };
-                iframeSelf.resize = function() {
-                    if (iframeSelf.debugMode) {
-                        console.log('Iframe ID : ' + iframeSelf.id +
-                            ' attaching interval event with : ' + iframeSelf.pingInMs + ' ms ...');
-                    }
-                    iframeSelf.interval = setInterval(iframeSelf._resizing, iframeSelf.pingInMs);
-                    return iframeSelf;
-                };
-            };
-        DoctoolApp.prototype.init = function(options) {
-            self.options = options;
-            self.location = window.location;
-
-            self.debug = options.debug;
-
-            self.iframes = 'iframe';
-            self.loaders = 'img.loaders';
-            self.searchResults = '#search-results';
-
-            self.content = '#content';
-            self.container = '.container';
-
-            self.contentLinks = self.options.triggers !== undefined ? self.options.triggers : self.container + ' a, ' + self.content + ' a';
-            self.panelLinks = '.panel-body a ';
-
-            self.localToc = '#panel';
-            self.navigationToc = '#doctool-projects-navigation';
+(function($, $doctoolSettings, $doctoolSearchIndex) {
+    // Same scores as the Sphinx search (searchtools.js)
+    var Scorer = {
+        objNameMatch: 11,
+        objPartialMatch: 6,
+        objPrio: {0: 15, 1: 5, 2: -5},
+        objPrioDefault: 0,
+        title: 15,
+        partialTitle: 7,
+        term: 5,
+        partialTerm: 2
+    };
 
-            self.navigation = self.navigationToc + ' a';
+    // Mirrors doctool.search.BloomFilter (one per shard, methods are shared by the instances)
+    var BloomFilter = function(filter) {
+        var data = atob(filter.data);
 
-            self.version = $doctoolSettings.version;
-            self.availableVersions = $doctoolVersions;
+        this.size = filter.bits;
+        this.hashes = filter.hashes;
+        this.bits = new Uint8Array(data.length);
+        for (var index = 0; index < data.length; index++) {
+            this.bits[index] = data.charCodeAt(index);
+        }
+    };
+    BloomFilter.fnv1a = function(bytes, seed) {
+        var value = seed;
+        bytes.forEach(function(byte) {
+            value = Math.imul(value ^ byte, 16777619) >>> 0;
+        });
+        return value;
+    };
+    BloomFilter.prototype.has = function(item) {
+        var bytes = new TextEncoder().encode(item),
+            first = BloomFilter.fnv1a(bytes, 2166136261),
+            second = (BloomFilter.fnv1a(bytes, 2538058380) | 1) >>> 0;
+        for (var index = 0; index < this.hashes; index++) {
+            var position = ((first + Math.imul(index, second)) >>> 0) % this.size;
+            if (!(this.bits[position >> 3] & (1 << (position & 7)))) {
+                return false;
+            }
+        }
+        return true;
+    };
 
-            self.versionsUI = '#doctool-versions';
-            self.availableVersionsUI = '#doctool-available-versions';
-            self.versionLinksUI = '.version-link';
+    var DoctoolSearch = function(index) {
+        var self = this;
 
-            self.searchForm = '#doctool-search-form';
-            self.searchTextBox = '#doctool-search-text-box';
-            self.searchFormLinks = self.searchForm + ' a';
-            self.masterTitle = self.options.masterTitle !== undefined ? self.options.masterTitle : "";
-            self.baseHostUri = (self.location + '').split(self.version)[0];
+        self.index = index;
+        // A sharded index only holds the dictionary, the shards & documents being fetched on demand
+        self.sharded = index.hasOwnProperty('shards');
+        self.cache = {};
+        self.blooms = {};
+        // Sphinx language data (_static/language_data.js), the index terms being stemmed the same way
+        self.stemmer = typeof Stemmer !== 'undefined' ? new Stemmer() : null;
+        self.stopwords = typeof stopwords !== 'undefined' ? stopwords : new Set();
 
-            self.setCurrentSearchArgs();
-            self.setIframeSources();
+        DoctoolSearch.prototype.parse = function(query) {
+            var searchTerms = new Set(),
+                excludedTerms = new Set(),
+                objectTerms = new Set();
 
-            return self;
+            query.toLowerCase().split(/[^\w\-.]+/).forEach(function(word) {
+                var excluded = word.charAt(0) === '-';
+                word = word.replace(/^-+/, '');
+                if (!word) {
+                    return;
+                }
+                objectTerms.add(word);
+                if (self.stopwords.has(word) || /^\d+$/.test(word)) {
+                    return;
+                }
+                word.split(/[\-.]+/).forEach(function(part) {
+                    if (!part) {
+                        return;
+                    }
+                    var stemmed = self.stemmer ? self.stemmer.stemWord(part) : part;
+                    (excluded ? excludedTerms : searchTerms).add(stemmed);
+                });
+            });
+            return {searchTerms: searchTerms, excludedTerms: excludedTerms, objectTerms: objectTerms};
         };
-        DoctoolApp.prototype.searchHandler = function(e) {
-            var link = $(this),
-                li = link.parent(),
-                searchForm = $(self.searchForm),
-                searchFormLis = searchForm.find('li'),
-                textBox = $(self.searchTextBox);
-
-            var text = link.text();
-            if (text) {
-                textBox.html(link.html() + " <i class=\"glyphicon glyphicon-filter\"></i>");
-                searchForm.attr('action', self.baseHostUri + link.attr('data-target'));
-                searchFormLis.removeClass('active');
-                li.addClass('active');
-            }
-            else {
-                // Get the first link in the list
-                searchFormLis.addClass('active');
-                searchForm.attr('action', self.baseHostUri + searchFormLis.find('a').attr('data-target'));
+        DoctoolSearch.prototype.fetch = function(name) {
+            if (!self.cache.hasOwnProperty(name)) {
+                self.cache[name] = Promise.resolve($.getJSON(self.index.path + '/' + name));
             }
+            return self.cache[name];
         };
-        DoctoolApp.prototype.getCurrentDocumentArgsString = function() {
-            var url = self.location + '';
-            return url.substring(url.indexOf('?') + 1);
+        DoctoolSearch.prototype.mayMatch = function(word) {
+            var key = word.substr(0, self.index.prefix),
+                shard = self.index.shards[key];
+            if (!shard) {
+                return false;
+            }
+            if (!shard.bloom) {
+                return true;
+            }
+            if (!self.blooms.hasOwnProperty(key)) {
+                self.blooms[key] = new BloomFilter(shard.bloom);
+            }
+            return self.blooms[key].has(word);
         };
-        DoctoolApp.prototype.setIframeSources = function() {
-            $(self.searchResults).fadeOut(0);
-            $(self.iframes).each(function(index) {
-                var iframe = $(this),
-                    iframeSrc = iframe.attr('src');
-                iframe.attr('src', iframeSrc + '&' + self.getCurrentDocumentArgsString());
+        DoctoolSearch.prototype.load = function(parsed) {
+            // Postings (terms, title terms & objects) the query may match
+            if (!self.sharded) {
+                return Promise.resolve(self.index);
+            }
+            var words = new Set(parsed.searchTerms);
+            parsed.excludedTerms.forEach(function(word) { words.add(word); });
+            parsed.objectTerms.forEach(function(word) {
+                word.split('.').forEach(function(name) { words.add(name); });
             });
-        };
-        DoctoolApp.prototype.targetBlankAllExternalLinksHandler = function(e) {
-            var link = $(this).attr('href'),
-                extension = link.split('.').pop(),
-                isExternalLink = link.substr(0, 4) === "http" && !$doctoolSettings.host.test(link);
-
-            if(!isExternalLink) {
-                switch(extension) {
-                    case 'jpg':
-                    case 'png':
-                    case 'gif':
-                    case 'zip':
-                    case 'rar':
-                    case 'pdf':
-                        isExternalLink = true;
-                        return false;
+
+            var files = new Set();
+            words.forEach(function(word) {
+                if (word && self.mayMatch(word)) {
+                    files.add(self.index.shards[word.substr(0, self.index.prefix)].file);
                 }
+            });
+            return Promise.all(Array.from(files).map(self.fetch)).then(function(shards) {
+                var loaded = {terms: {}, titleterms: {}, objects: []};
+                shards.forEach(function(shard) {
+                    Object.assign(loaded.terms, shard.terms);
+                    Object.assign(loaded.titleterms, shard.titleterms);
+                    loaded.objects = loaded.objects.concat(shard.objects);
+                });
+                return loaded;
+            });
+        };
+        DoctoolSearch.prototype.loadDocs = function(docs) {
+            // Documents (project, link & title) of the results
+            if (!self.sharded) {
+                return Promise.resolve(self.index.docs);
             }
+            var chunks = new Set();
+            docs.forEach(function(doc) { chunks.add(Math.floor(doc / self.index.docs.chunk)); });
+            chunks = Array.from(chunks);
+            return Promise.all(chunks.map(function(chunk) {
+                return self.fetch('docs-' + chunk + '.json');
+            })).then(function(contents) {
+                var loaded = {};
+                chunks.forEach(function(chunk, index) {
+                    contents[index].forEach(function(doc, offset) {
+                        loaded[chunk * self.index.docs.chunk + offset] = doc;
+                    });
+                });
+                return loaded;
+            });
+        };
+        DoctoolSearch.prototype.termsSearch = function(index, searchTerms, excludedTerms) {
+            var terms = index.terms,
+                titleTerms = index.titleterms,
+                scores = new Map(),
+                matches = new Map();
 
-            if(isExternalLink) {
-
-                e.preventDefault();
-                e.stopPropagation();
+            searchTerms.forEach(function(word) {
+                var records = [
+                    {docs: terms[word], score: Scorer.term},
+                    {docs: titleTerms[word], score: Scorer.title}
+                ];
+                // Partial matches
+                if (word.length > 2) {
+                    if (!terms.hasOwnProperty(word)) {
+                        Object.keys(terms).forEach(function(term) {
+                            if (term.indexOf(word) > -1) {
+                                records.push({docs: terms[term], score: Scorer.partialTerm});
+                            }
+                        });
+                    }
+                    if (!titleTerms.hasOwnProperty(word)) {
+                        Object.keys(titleTerms).forEach(function(term) {
+                            if (term.indexOf(word) > -1) {
+                                records.push({docs: titleTerms[term], score: Scorer.partialTitle});
+                            }
+                        });
+                    }
+                }
+                records.forEach(function(record) {
+                    (record.docs || []).forEach(function(doc) {
+                        if (!scores.has(doc)) {
+                            scores.set(doc, new Map());
+                            matches.set(doc, new Set());
+                        }
+                        var wordScores = scores.get(doc);
+                        wordScores.set(word, Math.max(wordScores.get(word) || 0, record.score));
+                        matches.get(doc).add(word);
+                    });
+                });
+            });
 
-                window.open(link);
-            }
-            return !isExternalLink;
-        };
-        DoctoolApp.prototype.iframeHandler = function(e) {
-            var iframe = new Iframe($(this), self.searchResults, 250, self.debug);
-            iframe.resize();
-            $(self.searchResults).fadeIn(500);
-            $(self.loaders).fadeIn(500);
+            var results = new Map(),
+                required = Array.from(searchTerms).filter(function(term) { return term.length > 2; }).length;
+            matches.forEach(function(words, doc) {
+                // Every word is required (the short ones may be missing)
+                if (words.size !== searchTerms.size && words.size !== required) {
+                    return;
+                }
+                var excluded = Array.from(excludedTerms).some(function(term) {
+                    return (terms[term] || []).indexOf(doc) > -1 || (titleTerms[term] || []).indexOf(doc) > -1;
+                });
+                if (!excluded) {
+                    var score = 0;
+                    scores.get(doc).forEach(function(value) { score = Math.max(score, value); });
+                    results.set(doc, score);
+                }
+            });
+            return results;
         };
-        DoctoolApp.prototype.onScrollTocHandler = function(e) {
-            var scrollTop = '.5em';
-            if($(this).scrollTop() === 0) {
-                scrollTop = $(self.navigationToc).height() + 15 + 'px';
-            }
-            $(self.localToc).css('top', scrollTop);
+        DoctoolSearch.prototype.objectsSearch = function(index, objectTerms) {
+            var results = [];
+            objectTerms.forEach(function(object) {
+                index.objects.forEach(function(entry) {
+                    var fullname = entry[1].toLowerCase(),
+                        last = fullname.split('.').pop(),
+                        score = 0;
+                    if (fullname.indexOf(object) < 0) {
+                        return;
+                    }
+                    if (fullname === object || last === object) {
+                        score += Scorer.objNameMatch;
+                    }
+                    else if (last.indexOf(object) > -1) {
+                        score += Scorer.objPartialMatch;
+                    }
+                    score += Scorer.objPrio.hasOwnProperty(entry[4]) ? Scorer.objPrio[entry[4]] : Scorer.objPrioDefault;
+                    results.push({doc: entry[0], title: entry[1], anchor: entry[2], descr: entry[3], score: score});
+                });
+            });
+            return results;
         };
-        DoctoolApp.prototype.linkHandler = function(link) {
-            if(link.substr(0, 1) === "#" || link.substr(0, 4) === "http") {
-                return link;
-            }
-            return self.baseHostUri + link;
+        DoctoolSearch.prototype.query = function(query, scope) {
+            var parsed = self.parse(query),
+                results = [];
+
+            return self.load(parsed).then(function(index) {
+                results = self.objectsSearch(index, parsed.objectTerms);
+                self.termsSearch(index, parsed.searchTerms, parsed.excludedTerms).forEach(function(score, doc) {
+                    results.push({doc: doc, title: null, anchor: '', descr: '', score: score});
+                });
+                return self.loadDocs(results.map(function(result) { return result.doc; }));
+            }).then(function(docs) {
+                return self.group(results, docs, scope);
+            });
         };
-        DoctoolApp.prototype.linksInitialStateHandler = function(e) {
-            $(self.navigation).each(function(index) {
-                var link = $(this).attr('href');
-                if (link) {
-                    $(this).attr('href', self.linkHandler(link));
+        DoctoolSearch.prototype.group = function(results, docs, scope) {
+            // Results grouped by project, the groups ranked by their best result
+            var groups = new Map();
+            results.forEach(function(result) {
+                var project = self.index.projects[docs[result.doc][0]];
+                if (scope && project.id !== scope) {
+                    return;
                 }
+                if (!groups.has(project.id)) {
+                    groups.set(project.id, {project: project, score: 0, results: [], urls: {}});
+                }
+                var group = groups.get(project.id);
+                result.url = docs[result.doc][1] + result.anchor;
+                result.title = result.title || docs[result.doc][2];
+                group.score = Math.max(group.score, result.score);
+                // A page (or object) matched several times is listed once, with its best score
+                if (group.urls.hasOwnProperty(result.url)) {
+                    group.urls[result.url].score = Math.max(group.urls[result.url].score, result.score);
+                    return;
+                }
+                group.urls[result.url] = result;
+                group.results.push(result);
             });
-
-            if(self.availableVersions.length <= 1) {
-                $(self.versionsUI).hide();
-            }
-            else {
-                var $versions = $(self.availableVersionsUI);
-                var elements = (self.location + '').split(self.version);
-                self.availableVersions.forEach(function (version) {
-                    var link = [elements[0], version, elements[1]].join('');
-                    var indexLink = [elements[0], version, '/index.html'].join('');
-                    var anchor = $('<a href="#" class="version-link"><i class="glyphicon glyphicon-' + $doctoolSettings.home_icon + '"></i> ' + version + '</a>');
-                    anchor.on('click', function (event) {
-                        event.preventDefault();
-                        $.get(link).then(function (response) {
-                            console.log('response', response);
-                            window.open(link, '_self');
-                        }).catch(function (error) {
-                            console.log('error', error);
-                            window.open(indexLink, '_self');
-                        });
-                    });
-                    $versions.append(
-                        $('<li></li>').append(anchor)
-                    )
+            return Array.from(groups.values()).sort(function(left, right) {
+                return right.score - left.score;
+            }).map(function(group) {
+                group.results.sort(function(left, right) {
+                    return right.score - left.score || (left.title > right.title ? 1 : -1);
                 });
-            }
+                return group;
+            });
         };
-        DoctoolApp.prototype.getCurrentDocumentArgs = function() {
-            return self._urlArgs2Array(self.location + '');
+    };
+
+    var DoctoolSearchPage = function() {
+        var self = this;
+
+        DoctoolSearchPage.prototype.init = function(options) {
+            self.options = options;
+            self.engine = new DoctoolSearch($doctoolSearchIndex);
+
+            self.searchResults = '#search-results';
+            self.searchSummary = '#search-summary';
+            self.documentToc = '#document-toc ul';
+
+            var args = new URLSearchParams(window.location.search);
+            self.query = args.get('q') || '';
+            self.scope = args.get('scope') || '';
+            return self;
         };
-        DoctoolApp.prototype._urlArgs2Array = function(url) {
-            var request = {};
-            var pairs = url.substring(url.indexOf('?') + 1).split('&');
-            for (var i = 0; i < pairs.length; i++) {
-                var pair = pairs[i].split('=');
-                request[decodeURIComponent(pair[0])] = decodeURIComponent(pair[1]);
-            }
-            return request;
+        DoctoolSearchPage.prototype.render = function(groups) {
+            var $results = $(self.searchResults).empty(),
+                $toc = $(self.documentToc).empty(),
+                count = 0;
+
+            groups.forEach(function(group) {
+                var $list = $('<ul class="search"></ul>'),
+                    $head = $('<h2 class="alert alert-success"></h2>')
+                        .attr('id', 'head-' + group.project.id)
+                        .append('Found in ', $('<strong></strong>').text(group.project.name), ' Project ',
+                                $('<span class="badge"></span>').text(group.results.length));
+
+                group.results.forEach(function(result) {
+                    $list.append($('<li></li>').append(
+                        $('<a></a>').attr('href', result.url).text(result.title),
+                        result.descr ? $('<span class="text-muted"></span>').text(' (' + result.descr + ')') : ''
+                    ));
+                });
+                $results.append($('<div class="search-scope"></div>').attr('data-scope', group.project.id)
+                                .append($head, $list), '<div class="clearfix"></div>');
+                $toc.append($('<li></li>').append(
+                    $('<a></a>').attr('href', '#head-' + group.project.id).text(group.project.name)));
+                count += group.results.length;
+            });
+
+            $(self.searchSummary).text(count ?
+                'Search finished, found ' + count + ' page(s) matching the search query.' :
+                'Your search did not match any documents. Please make sure that all words are spelled ' +
+                'correctly and that you\'ve selected enough categories.');
         };
-        DoctoolApp.prototype.setCurrentSearchArgs = function() {
-            var args = self.getCurrentDocumentArgs();
-            if(args.hasOwnProperty('q')) {
-                $('input[name=q]').val(args.q);
+        DoctoolSearchPage.prototype.serverQuery = function() {
+            if (!$doctoolSettings.search_server) {
+                return Promise.reject(null);
             }
+            return Promise.resolve($.getJSON($doctoolSettings.search_server.replace(/\/+$/, '') + '/search', {
+                q: self.query,
+                scope: self.scope,
+                version: $doctoolSettings.version
+            })).then(function(response) {
+                return response.groups;
+            });
         };
-        DoctoolApp.prototype.readyEventsHandler = function(e) {
-            $(self.panelLinks).on('click', self.targetBlankAllExternalLinksHandler);
-            $(self.contentLinks).on('click', self.targetBlankAllExternalLinksHandler);
-            $(self.searchFormLinks).on('click', self.searchHandler);
-            $(self.iframes + '.iframe-frame').on('load', self.iframeHandler);
-            $(window).on('scroll', self.onScrollTocHandler);
-        };
-        DoctoolApp.prototype.attachEvents = function() {
-            $(self.linksInitialStateHandler);
-            $(self.readyEventsHandler);
+        DoctoolSearchPage.prototype.run = function() {
+            if (!self.query) {
+                return;
+            }
+            $(self.searchSummary).text('Searching...');
+            self.serverQuery().catch(function(error) {
+                // No search server (or unreachable), the static index is used instead
+                if ($doctoolSettings.search_server) {
+                    console.log('Search server error, falling back to the static index', error);
+                }
+                return self.engine.query(self.query, self.scope);
+            }).then(self.render, function(error) {
+                $(self.searchSummary).text('The search index could not be loaded.');
+                console.log('error', error);
+            });
         };
     };
-    new DoctoolApp().init({
-        debug: $doctoolSettings.debug,
-        masterTitle: $doctoolSettings.master_title
-    }).attachEvents();
-})(jQuery, doctoolSettings, doctoolVersions);
+
+    $(function() {
+        new DoctoolSearchPage().init({debug: $doctoolSettings.debug}).run();
+    });
+})(jQuery, doctoolSettings, doctoolSearchIndex);
@@ -26,5 +26,7 @@ var doctoolSettings = {
     version: '{{ VERSION }}',
     master_title: '{{ master_title }}',
     home_icon: '{{ HOME_ICON }}',
+    build: '{{ BUILD_ID }}',
+    search_server: '{{ SEARCH_SERVER }}',
     debug: {{ DEBUG }}
 };
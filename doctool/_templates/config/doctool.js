@@ -31,6 +31,8 @@
         if (text) {
             textBox.html(link.html() + " <i class=\"glyphicon glyphicon-filter\"></i>");
             searchForm.attr('action', self.baseHostUri + link.attr('data-target'));
+            // A project is searched as a scope of the global (sharded) search page, when written
+            $(self.searchScope).val(link.attr('data-scope') || '');
             searchFormLis.removeClass('active');
             li.addClass('active');
         }
@@ -67,6 +69,9 @@
             self.panelLinks = '.panel-body a ';
 
             self.projectTocMenu = 'ul#menu';
+            self.currentLinkClass = 'doctool-current';
+            self.menuCachePrefix = 'doctool-menu:';
+            self.menuChunks = 'ul[data-chunk]';
             self.localTocMenu = '#panel ul:first-child';
 
             self.menuLinks = self.menu + ' a';
@@ -94,6 +99,7 @@
             self.searchForm = '#doctool-search-form';
             self.searchTextBox = '#doctool-search-text-box';
             self.searchFormLinks = self.searchForm + ' a';
+            self.searchScope = '#doctool-search-scope';
 
             self.masterTitle = self.options.masterTitle !== undefined ? self.options.masterTitle : "";
 
@@ -102,6 +108,9 @@
             if (!doctoolSettings.search) {
                 searchHandler($('#all-projects-link'), self);
             }
+            if ($(self.searchScope).val()) {
+                $(self.searchForm).attr('action', self.baseHostUri + self.version + '/search.html');
+            }
             return self;
         };
         DoctoolApp.prototype.searchHandler = function(e) {
@@ -148,6 +157,93 @@
                 self.setTocItemInitialState($(this));
             });
         };
+        DoctoolApp.prototype.fetchFragment = function(source) {
+            // Menu fragments are static & shared by all pages of a project,
+            // they are cached (per build) for the browser session
+            var url = self.baseHostUri + source,
+                key = self.menuCachePrefix + url,
+                cached = null;
+            try {
+                cached = JSON.parse(window.sessionStorage.getItem(key));
+            }
+            catch(error) {
+                cached = null;
+            }
+            if(cached && cached.build === $doctoolSettings.build) {
+                return $.Deferred().resolve(cached.html).promise();
+            }
+
+            return $.ajax({url: url, data: {v: $doctoolSettings.build}, dataType: 'html', cache: true})
+                .then(function(html) {
+                    try {
+                        window.sessionStorage.setItem(key, JSON.stringify({build: $doctoolSettings.build, html: html}));
+                    }
+                    catch(error) {
+                        console.log('Menu fragment not cached : ' + error);
+                    }
+                    return html;
+                });
+        };
+        DoctoolApp.prototype.renderMenu = function(menu, html) {
+            menu.html(html);
+            menu.find('a').each(function(_) {
+                var link = $(this);
+                link.attr('href', self.linkHandler(link.attr('href')));
+                if(!link.hasClass(self.collapsibleMenu.substr(1)) && this.pathname === self.location.pathname) {
+                    link.addClass(self.currentLinkClass);
+                    link.parents('.panel-collapse').addClass('in');
+                }
+            });
+            // Chunks (groups beyond the maximum depth) which might hold the current page are loaded upfront
+            menu.find(self.menuChunks).each(function(_) {
+                var chunk = $(this);
+                if(self.location.pathname.indexOf(chunk.attr('data-name')) !== -1) {
+                    self.loadMenuChunk(chunk);
+                }
+            });
+            self.setLeftTocInitialStateHandler();
+            self.MenuHeightHandler();
+        };
+        DoctoolApp.prototype.loadMenuChunk = function(chunk) {
+            var source = chunk.attr('data-chunk');
+            if(!source) {
+                return;
+            }
+            chunk.removeAttr('data-chunk');
+            self.fetchFragment(source)
+                .done(function(html) {
+                    self.renderMenu(chunk, html);
+                })
+                .fail(function(error) {
+                    console.log('Menu chunk not loaded : ' + source);
+                    chunk.attr('data-chunk', source);
+                });
+        };
+        DoctoolApp.prototype.menuChunkHandler = function(e) {
+            if(e.target === this) {
+                self.loadMenuChunk($(this).children('.panel-body').children(self.menuChunks));
+            }
+        };
+        DoctoolApp.prototype.menuHandler = function(e) {
+            var menu = $(self.projectTocMenu),
+                source = menu.attr('data-menu');
+            if(menu.length === 0 || !source) {
+                return;
+            }
+
+            self.fetchFragment(source)
+                .done(function(html) {
+                    if(!$.trim(html)) {
+                        $(self.projectToc).empty();
+                        return;
+                    }
+                    self.renderMenu(menu, html);
+                })
+                .fail(function(error) {
+                    console.log('Menu not loaded : ' + source);
+                    $(self.projectToc).empty();
+                });
+        };
         DoctoolApp.prototype.getCurrentDocumentArgsString = function() {
             var url = self.location + '';
             return url.substring(url.indexOf('?') + 1);
@@ -304,11 +400,13 @@
         };
 
         DoctoolApp.prototype.readyEventsHandler = function(e) {
-            $(self.panelLinks).on('click', self.targetBlankAllExternalLinksHandler);
+            // Delegated, the project menu being loaded asynchronously
+            $(document).on('click', self.panelLinks, self.targetBlankAllExternalLinksHandler);
             $(self.contentLinks).on('click', self.targetBlankAllExternalLinksHandler);
             $(self.contentImgs).on('click', self.targetBlankAllImagesHandler);
             $(self.searchFormLinks).on('click', self.searchHandler);
-            $(self.collapsibleMenu).on('click', self.leftTocHandler);
+            $(document).on('click', self.collapsibleMenu, self.leftTocHandler);
+            $(document).on('show.bs.collapse', self.projectToc + ' .panel-collapse', self.menuChunkHandler);
 
             $(window).on('scroll', self.onScrollTocHandler);
         };
@@ -325,6 +423,7 @@
             $(self.readyEventsHandler);
             $(self.MenuHeightHandler);
             $(self.targetBlankForDownloads);
+            $(self.menuHandler);
         };
     };
     new DoctoolApp().init({
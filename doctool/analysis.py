@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Static analysis of the API python sources
+
+    * module index (module name -> file path)
+    * statically resolved import dependencies
+    * content & dependency hashes (autodoc cache keys)
+"""
+import ast
+import hashlib
+import logging
+
+from doctool import errors
+from doctool.helpers import Types
+
+logger = logging.getLogger(__name__)
+
+
+class SourceAnalyzer(object):
+    """
+    Indexes the API python modules and computes, for each of them, a key
+    made of its content hash and the hashes of its statically resolved dependencies.
+
+    .. note:: Base classes are bound either in the module itself or through its imports,
+        the import closure therefore covers the inheritance dependencies as well.
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._index = Types.OrderedDict()
+        self._hashes = {}
+        self._imports = {}
+        self._keys = {}
+
+    @property
+    def index(self):
+        """
+        Holds the module index
+
+        :rtype: Types.OrderedDict
+        :return: The module index (module name -> file path)
+        """
+        return self._index
+
+    def add(self, module_name, filename):
+        """
+        Indexes a module
+
+        :param module_name: The module dotted name (a package being indexed by its name)
+        :type module_name: str
+
+        :param filename: The module file path
+        :type filename: str
+        """
+        if module_name:
+            self._index[module_name] = filename
+
+    def content_hash(self, module_name):
+        """
+        Computes (once) the module content hash
+
+        :param module_name: The module dotted name
+        :type module_name: str
+
+        :rtype: str
+        :return: The content hash
+        """
+        if module_name not in self._hashes:
+            try:
+                with open(self._index[module_name], 'rb') as handle:
+                    self._hashes[module_name] = hashlib.sha1(handle.read()).hexdigest()
+            except errors.SysErrors:
+                self._hashes[module_name] = ''
+        return self._hashes[module_name]
+
+    def resolve(self, module_name, imported, level=0, names=()):
+        """
+        Resolves an import statement against the index
+
+        :param module_name: The importing module dotted name
+        :type module_name: str
+
+        :param imported: The imported module (as written, possibly relative)
+        :type imported: str
+
+        :param level: The relative import level
+        :type level: int
+
+        :param names: The imported names (``from x import a, b``)
+        :type names: tuple or list
+
+        :rtype: list
+        :return: The indexed module names
+        """
+        if level:
+            is_package = self._index[module_name].endswith('__init__.py')
+            parts = module_name.split('.')
+            parts = parts[:len(parts) - level + (1 if is_package else 0)]
+            imported = '.'.join(parts + ([imported] if imported else []))
+
+        candidates = ['{0}.{1}'.format(imported, name) if imported else name for name in names]
+        candidates.append(imported)
+
+        resolved = []
+        for candidate in candidates:
+            # `import a.b.c` binds `a` and runs every parent package as well
+            parts = candidate.split('.') if candidate else []
+            for index in range(len(parts), 0, -1):
+                name = '.'.join(parts[:index])
+                if name in self._index and name not in resolved:
+                    resolved.append(name)
+        return resolved
+
+    def imports(self, module_name):
+        """
+        Statically resolves (once) the module dependencies
+
+        :param module_name: The module dotted name
+        :type module_name: str
+
+        :rtype: list
+        :return: The indexed module names imported by the module
+        """
+        if module_name not in self._imports:
+            dependencies = []
+            try:
+                with open(self._index[module_name], 'rb') as handle:
+                    tree = ast.parse(handle.read())
+            except (SyntaxError, ValueError) + errors.SysErrors:
+                logger.debug('Module {0} could not be parsed, no dependency resolved'.format(module_name))
+                tree = None
+
+            for node in ast.walk(tree) if tree else ():
+                if isinstance(node, ast.Import):
+                    for alias in node.names:
+                        dependencies.extend(self.resolve(module_name, alias.name))
+                elif isinstance(node, ast.ImportFrom):
+                    dependencies.extend(self.resolve(module_name, node.module or '', node.level,
+                                                     [alias.name for alias in node.names]))
+
+            self._imports[module_name] = sorted(set(dependencies) - {module_name})
+        return self._imports[module_name]
+
+    def key(self, module_name):
+        """
+        Computes the module cache key out of its content hash
+        and the hashes of its (transitive) dependencies.
+
+        :param module_name: The module dotted name
+        :type module_name: str
+
+        :rtype: str
+        :return: The module cache key
+        """
+        if module_name not in self._keys:
+            closure, stack = set(), [module_name]
+            while stack:
+                name = stack.pop()
+                if name in closure:
+                    continue
+                closure.add(name)
+                stack.extend(self.imports(name))
+
+            digest = hashlib.sha1()
+            for name in sorted(closure):
+                digest.update('{0}:{1}\n'.format(name, self.content_hash(name)).encode('utf8'))
+            self._keys[module_name] = digest.hexdigest()
+        return self._keys[module_name]
+
+    def combined_key(self, module_names):
+        """
+        Computes a key covering several modules (ie. a package stub documenting all of its modules)
+
+        :param module_names: The module dotted names
+        :type module_names: list
+
+        :rtype: str
+        :return: The combined cache key
+        """
+        digest = hashlib.sha1()
+        for name in sorted(set(module_names)):
+            if name in self._index:
+                digest.update(self.key(name).encode('utf8'))
+        return digest.hexdigest()
@@ -29,12 +29,18 @@ SOFTWARE.
 :summary: Groups all Project's Builder Classes
 
 """
+import os
 import sys
+import json
+import hashlib
 import threading
 import logging
 
+from concurrent import futures
+
 from doctool import settings
 from doctool.helpers import Types
+from doctool.helpers import TitleCache
 from doctool.interfaces import IBuilder
 
 logger = logging.getLogger(__name__)
@@ -111,7 +117,7 @@ class BuilderThread(threading.Thread):
 
         data = self.project.data
         # Write the Specification file (conf.py)
-        self._builder.write_spec(data.source_dir, data, override=True)
+        self._builder.write_spec(data.conf_dir, data, override=True)
         # Run Doctool Sphinx Engine from command line
         self.out = self._builder.run_sphinx(**data)
         self.out.uid = self.project.id
@@ -166,6 +172,8 @@ class SphinxBuilder(IBuilder):
 
         # Holding a template manager
         self._template_mgr = None
+        # Digests of the written menus, per project (identify their client-side cached copies)
+        self._menus_digests = {}
 
     @property
     def helper(self):
@@ -177,6 +185,43 @@ class SphinxBuilder(IBuilder):
         """
         return self._helper
 
+    @property
+    def menus_digests(self):
+        """
+        Property holding the digest of each project menus written so far
+
+        :return: The menus digests (project ID -> digest)
+        :rtype: dict
+        """
+        return dict(self._menus_digests)
+
+    @property
+    def menus_digest(self):
+        """
+        Property holding the digest of all menus written so far,
+        it only changes when a menu does
+
+        :return: The menus digest
+        :rtype: str
+        """
+        return self.combine_digests(self._menus_digests)
+
+    @staticmethod
+    def combine_digests(digests):
+        """
+        Combines projects menus digests into a single one (independent of the projects order)
+
+        :param digests: The menus digests (project ID -> digest)
+        :type digests: dict
+
+        :return: The combined digest
+        :rtype: str
+        """
+        combined = hashlib.sha1()
+        for uid in sorted(digests):
+            combined.update('{0}:{1}\n'.format(uid, digests[uid]).encode('utf8'))
+        return combined.hexdigest()[:12]
+
     @property
     def template_mgr(self):
         """
@@ -250,6 +295,14 @@ class SphinxBuilder(IBuilder):
             r'{python} "{sphinx_exe}" -b {output_format} -a {source_dir} {output_dir} '
         )
 
+        if cmd_options.get('conf_dir'):
+            # The configuration is generated out of the sources
+            cmd += '-c {conf_dir} '
+
+        if cmd_options.get('doctree_dir'):
+            # Persistent doctrees, Sphinx then only re-reads the outdated documents
+            cmd += '-d {doctree_dir} '
+
         sphinx_exe = self.helper.get_executable_path('sphinx-build')
         if not sphinx_exe or not self.helper.exists(sphinx_exe):
             raise ValueError('No Sphinx builder installed! (pip install sphinx)')
@@ -296,17 +349,108 @@ class SphinxBuilder(IBuilder):
             data['java_bin'] = plantuml.java_bin
             data['plantuml_jar'] = plantuml.plantuml_jar
 
-        data['projects'] = self._manager.ranked_projects
+        if self.build_info.get('PREFER_SVG'):
+            # Vector diagrams & formulas, lighter than the PNG images & sharp at any zoom level
+            data['graphviz_output_format'] = 'svg'
+            data['plantuml_output_format'] = 'svg'
+            data['imgmath_image_format'] = 'svg'
+
+        data['context_file'] = self.write_context(out_dirname, data)
 
         self.helper.write_file(conf_file, template.render(data), override=override, mode='w+')
 
-    def build_synchronous_unit(self, project=None):
+    def write_context(self, out_dirname, data):
+        """
+        Writes the projects data (navigation bar, search scopes, ...) as a JSON sidecar next to the conf.py,
+        loaded lazily by the `doctool.extensions.context` Sphinx extension.
+
+        .. note:: Out of the conf.py, a project's data change (e.g. its first link)
+                  invalidates neither the Sphinx configuration nor the environment of the others.
+
+        :param out_dirname: Where the file is written (absolute/relative path)
+        :type out_dirname: str
+
+        :param data: Data for template engine
+        :type data: Types.AttributeDict
+
+        :return: The sidecar filename
+        :rtype: str
+        """
+        metadata = data.get('metadata') or {}
+        projects = []
+        for proj in self._manager.bundle_projects:
+            # Values are rendered as they used to be by the conf.py template
+            projects.append(dict(name=proj.name,
+                                 id=proj.id,
+                                 nav='{0}'.format(proj.nav),
+                                 icon='{0}'.format(proj.icon),
+                                 slug=proj.slug,
+                                 search=proj.search,
+                                 search_scopes=proj.search_scopes,
+                                 version='{0}'.format(metadata.get('version') or ''),
+                                 layout='{0}'.format(proj.layout),
+                                 menu=dict(left=proj.menu['left'], right=proj.menu['right']),
+                                 first_link=proj.first_link,
+                                 is_api='{0}'.format(proj.is_api) == '1',
+                                 home=bool(proj.home)))
+
+        context = dict(current_project_name=data.get('project_name', ''),
+                       paths=[proj.src_dirname for proj in self._manager.bundle_projects],
+                       projects=projects)
+        context_file = self.helper.absjoin(out_dirname, settings.CONTEXT_FILENAME)
+        self.helper.write_file(context_file, json.dumps(context), mode='w', override=True)
+        return context_file
+
+    def write_menu(self, project):
+        """
+        Writes the project menu (its navigation tree) as static HTML fragments
+        into the project output directory, pages only holding a placeholder loaded by `doctool.js`
+
+        .. note:: The initial fragment is limited to the project maxdepth,
+                  each group beyond is written as its own chunk (limited the same way), loaded on demand.
+
+        :param project: A project instance (IProject sub-class)
+        :type project: IProject sub-class
+        """
+        out_dirname = self.helper.absjoin(self._manager.output_dir, project.id)
+        chunks_dirname = self.helper.absjoin(out_dirname, settings.MENU_CHUNKS_DIRNAME)
+        if os.path.isdir(chunks_dirname):
+            self.helper.rmtree(chunks_dirname)
+        self.helper.createdirs(out_dirname)
+
+        maxdepth = project.maxdepth or 0
+        digest = hashlib.sha1()
+        template = self.template_mgr.template_by_name('config/menu.html')
+        chunks = [(self.helper.absjoin(out_dirname, settings.MENU_FILENAME), project.toctree or [])]
+        while chunks:
+            filename, toctree = chunks.pop()
+            data = self._manager.data_context_builder(
+                toctree=toctree,
+                maxdepth=maxdepth,
+                chunks_url='{0}/{1}'.format(project.id, settings.MENU_CHUNKS_DIRNAME)
+            )
+            content = template.render(data)
+            self.helper.write_file(filename, content, override=True, mode='w+')
+            digest.update('{0}\n{1}'.format(os.path.relpath(filename, self._manager.output_dir),
+                                             content).encode('utf8'))
+
+            frontier = Types.TOCNode.frontier(toctree, maxdepth)
+            if frontier:
+                self.helper.createdirs(chunks_dirname)
+            chunks.extend((self.helper.absjoin(chunks_dirname, '{0}.html'.format(node.hash)), node.children)
+                          for node in frontier)
+        self._menus_digests[project.id] = digest.hexdigest()
+
+    def build_synchronous_unit(self, project=None, routines=True):
         """
         Defines the Build process.
 
         :param project: A project instance (IProject sub-class)
         :type project: IProject sub-class
 
+        :param routines: Whether the project's pre & post routines are to be run
+        :type routines: bool
+
         :return: The build status
         :rtype: IBuilder.Status
 
@@ -316,15 +460,41 @@ class SphinxBuilder(IBuilder):
         """
         # Getting the project's data
         data = project.data
-        self.run_routines(project.pre_routines)
+        if routines:
+            self.run_routines(project.pre_routines)
         # Write the Specification file (conf.py)
-        self.write_spec(data.source_dir, data, override=True)
+        self.write_spec(data.conf_dir, data, override=True)
         # Run Doctool Sphinx Engine from command line
         status = self.run_sphinx(**data)
-        if status == IBuilder.Status.SUCCESS:
+        if not status.failed:
+            # Projects built afterwards (& the global index) get the exact navigation
+            project.load_nav()
+        if routines and status == IBuilder.Status.SUCCESS:
             self.run_routines(project.post_routines)
         return status
 
+    def build_shards(self, project):
+        """
+        Builds all shards of a sharded API project in parallel,
+        each one being its own Sphinx sub-project.
+
+        :param project: A sharded project instance
+        :type project: doctool.models.CodeProject
+
+        :return: The shards UID & build output
+        :rtype: list
+        """
+        self.run_routines(project.pre_routines)
+        with futures.ThreadPoolExecutor(max_workers=project.shard_workers) as executor:
+            outputs = list(executor.map(
+                lambda shard: self.build_synchronous_unit(shard, routines=False),
+                project.shards
+            ))
+        project.stitch_shards()
+        if not [out for out in outputs if out.failed]:
+            self.run_routines(project.post_routines)
+        return [(shard.id, out) for shard, out in zip(project.shards, outputs)]
+
     # TODO: Not used for now, not functional
     def build_asynchronous(self, projects=None):
         """
@@ -396,9 +566,18 @@ class SphinxBuilder(IBuilder):
                 logger.debug('Building Project : "{0}"\n'.format(proj.id))
                 logger.debug('FIRST LINK : {0}'.format(proj.first_link))
 
+            TitleCache.default().save()
+
             for proj in projects:
+                if getattr(proj, 'shards', None):
+                    for uid, out in self.build_shards(proj):
+                        status_list.append(Types.AttributeDict(uid=uid, out=out))
+                    self.write_menu(proj)
+                    continue
                 out = self.build_synchronous_unit(proj)
                 status_list.append(Types.AttributeDict(uid=proj.id, out=out))
+                if not out.failed:
+                    self.write_menu(proj)
 
             has_failed = len([st for st in status_list if st.out.failed]) > 0
 
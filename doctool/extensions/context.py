@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Sphinx extension handing the projects data (navigation bar, search scopes, ...) to the HTML templates
+
+The data is written by doctool as a JSON sidecar next to the project conf.py (see :data:`CONTEXT_FILENAME`) ::
+
+    {"current_project_name": "User Guide",
+     "paths": ["/path/to/user_doc", ...],
+     "projects": [{"name": "User Guide", "id": "user_doc", "first_link": "user_doc/intro.html",
+                   "home": false, "is_api": false, ...}, ...]}
+
+The sidecar is only loaded when first needed and is excluded from the Sphinx configuration,
+hence a navigation change in a project neither invalidates the configuration nor the environment of the others.
+
+Usage (conf.py) ::
+
+    extensions.append('doctool.extensions.context')
+    doctool_context = '/path/to/doctool-context.json'
+"""
+import os
+import json
+import logging
+
+from doctool import settings
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_FILENAME = settings.CONTEXT_FILENAME
+
+
+def build_context(data):
+    """
+    Builds the HTML templates context from the sidecar data
+
+    :param data: The sidecar data
+    :type data: dict
+
+    :rtype: dict
+    :return: The HTML templates context
+    """
+    context = dict(current_project=None,
+                   home_project=None,
+                   doc_projects=[],
+                   api_doc_projects=[],
+                   current_project_name=data.get('current_project_name', ''))
+
+    for project in data.get('projects', ()):
+        if project['name'] == context['current_project_name']:
+            context['current_project'] = project
+        if project.get('home'):
+            context['home_project'] = project
+        elif project.get('is_api'):
+            context['api_doc_projects'].append(project)
+        else:
+            context['doc_projects'].append(project)
+
+    context['searchable_projects'] = [
+        p for p in context['doc_projects'] + context['api_doc_projects'] if p.get('search')
+    ]
+    # Same rule as the global search page (see ProjectManager._write_global_search), every project
+    # being then searched from it (lazily loaded shards) rather than from its own Sphinx search index
+    context['global_search'] = sum(
+        len(p.get('search_scopes') or ()) for p in context['searchable_projects']
+    ) >= 2
+    context['paths'] = data.get('paths', [])
+    return context
+
+
+def load(app):
+    """
+    Loads the sidecar (once) into the HTML templates context
+
+    :param app: The Sphinx application reference
+
+    :rtype: dict
+    :return: The HTML templates context
+    """
+    # Kept on the application, not on the (pickled) environment
+    context = getattr(app, 'doctool_context', None)
+    if context is None:
+        data = {}
+        filename = app.config.doctool_context
+        if filename and os.path.isfile(filename):
+            with open(filename, 'r', encoding='utf8') as handle:
+                data = json.load(handle)
+        elif filename:
+            logger.warning('Doctool context %s does not exist!', filename)
+        context = app.doctool_context = build_context(data)
+    return context
+
+
+def html_page_context(app, pagename, templatename, context, doctree):
+    """
+    Injects the projects data into the page context
+    """
+    context.update((key, value) for key, value in load(app).items() if key != 'paths')
+
+
+def setup(app):
+    """
+    Sphinx extension entry point
+
+    :param app: The Sphinx application reference
+    """
+    # The sidecar content must not invalidate the environment (nor the configuration)
+    app.add_config_value('doctool_context', '', '')
+
+    app.connect('html-page-context', html_page_context)
+
+    return {'parallel_read_safe': True, 'parallel_write_safe': True}
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Sphinx extension exporting the project navigation out of the Sphinx environment
+
+Every toctree met while reading (explicit titles, :glob: & :hidden: entries included)
+is recorded into the environment. Once the environment is updated, the resolved hierarchy is:
+
+    * exported as a compact JSON nav file into the output directory (see :data:`NAV_FILENAME`) ::
+
+        {"root": "index", "first": "intro", "entries": [{"docname": "intro", "title": "Intro"},
+                                                         {"docname": "sub/index", "title": "Sub", "children": [...]},
+                                                         {"url": "https://...", "title": "External"}]}
+
+    * used to give the current project's first link to the HTML context (see :mod:`doctool.extensions.context`),
+      its menu being rendered once by doctool (see :data:`doctool.settings.MENU_FILENAME`)
+
+Usage (conf.py) ::
+
+    extensions.append('doctool.extensions.navigation')
+    doctool_nav_prefix = 'project-id'
+"""
+import os
+import json
+import logging
+
+from sphinx import addnodes
+
+from doctool import settings
+from doctool.extensions import context
+
+logger = logging.getLogger(__name__)
+
+NAV_FILENAME = settings.NAV_FILENAME
+
+
+def current_docname(env):
+    """
+    Gets the document being read
+
+    :param env: The Sphinx environment
+
+    :rtype: str
+    :return: The document name
+    """
+    current = getattr(env, 'current_document', None)
+    return current.docname if current is not None else env.docname
+
+
+def doctree_read(app, doctree):
+    """
+    Records the toctree entries (title, reference) of the read document
+
+    :param app: The Sphinx application reference
+    :param doctree: The document doctree
+    """
+    entries = []
+    for node in doctree.findall(addnodes.toctree):
+        entries.extend((title, ref) for title, ref in node['entries'] if ref != 'self')
+
+    navigation = getattr(app.env, 'doctool_nav_entries', {})
+    navigation[current_docname(app.env)] = entries
+    app.env.doctool_nav_entries = navigation
+
+
+def resolve(env, docname, visited):
+    """
+    Resolves the navigation entries included by a document (depth-first)
+
+    :param env: The Sphinx environment
+    :param docname: The including document name
+
+    :param visited: The already resolved documents (cycles & duplicates are skipped)
+    :type visited: set
+
+    :rtype: list
+    :return: The navigation entries
+    """
+    entries = []
+    for title, ref in getattr(env, 'doctool_nav_entries', {}).get(docname, ()):
+        if '://' in ref:
+            entries.append(dict(url=ref, title=title or ref))
+            continue
+        if ref not in env.all_docs or ref in visited:
+            continue
+        visited.add(ref)
+
+        if not title:
+            title = env.titles[ref].astext() if ref in env.titles else ref
+        entry = dict(docname=ref, title=title)
+        children = resolve(env, ref, visited)
+        if children:
+            entry['children'] = children
+        entries.append(entry)
+    return entries
+
+
+def first_docname(entries):
+    """
+    Gets the first document of the navigation (depth-first)
+
+    :param entries: The navigation entries
+    :type entries: list
+
+    :rtype: str
+    :return: The first document name
+    """
+    for entry in entries:
+        if 'docname' in entry:
+            return entry['docname']
+
+
+def env_updated(app, env):
+    """
+    Exports the resolved navigation & injects the current project's first link
+
+    :param app: The Sphinx application reference
+    :param env: The Sphinx environment
+    """
+    root = env.config.root_doc if hasattr(env.config, 'root_doc') else env.config.master_doc
+    entries = resolve(env, root, {root})
+    nav = dict(root=root, first=first_docname(entries), entries=entries)
+
+    os.makedirs(str(app.outdir), exist_ok=True)
+    with open(os.path.join(str(app.outdir), NAV_FILENAME), 'w', encoding='utf8') as handle:
+        json.dump(nav, handle, separators=(',', ':'))
+
+    prefix = app.config.doctool_nav_prefix
+    current = context.load(app)['current_project'] if hasattr(app.config, 'doctool_context') else None
+    # A shard only holds a part of its project navigation, the latter is stitched by doctool
+    if prefix and current and current.get('id') == prefix:
+        if nav['first']:
+            current['first_link'] = '{0}/{1}.html'.format(prefix, nav['first'])
+
+
+def env_purge_doc(app, env, docname):
+    """
+    Forgets a purged document entries
+    """
+    getattr(env, 'doctool_nav_entries', {}).pop(docname, None)
+
+
+def env_merge_info(app, env, docnames, other):
+    """
+    Merges the entries recorded by parallel readers
+    """
+    navigation = getattr(env, 'doctool_nav_entries', {})
+    for docname in docnames:
+        if docname in getattr(other, 'doctool_nav_entries', {}):
+            navigation[docname] = other.doctool_nav_entries[docname]
+    env.doctool_nav_entries = navigation
+
+
+def setup(app):
+    """
+    Sphinx extension entry point
+
+    :param app: The Sphinx application reference
+    """
+    app.add_config_value('doctool_nav_prefix', '', 'html')
+
+    app.connect('doctree-read', doctree_read)
+    app.connect('env-updated', env_updated)
+    app.connect('env-purge-doc', env_purge_doc)
+    app.connect('env-merge-info', env_merge_info)
+
+    return {'parallel_read_safe': True, 'parallel_write_safe': True}
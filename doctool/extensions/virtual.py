@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Sphinx extension handing in-memory (virtual) sources straight to Sphinx
+
+The API projects generate their ReSt stubs in memory (see :class:`doctool.models.CodeProject`).
+All of them are serialized into a single JSON bundle instead of thousands of tiny files ::
+
+    {"sources": {docname: text, ...}, "keys": {docname: autodoc cache key, ...}}
+
+The cache key of a document covers the documented modules content and their statically resolved
+dependencies (see :class:`doctool.analysis.SourceAnalyzer`).
+
+This extension:
+
+    * adds every virtual docname to the Sphinx project (see :class:`VirtualProject`),
+      their sources being read out of a single (empty) placeholder file
+    * substitutes the placeholder content by the virtual source on `source-read`
+    * marks a virtual document as outdated only when its content or cache key changed,
+      the others being reused from the (persistent) doctrees, without running autodoc again
+    * does not copy the placeholder as the "Show Source" of the virtual documents
+
+Usage (conf.py) ::
+
+    extensions.append('doctool.extensions.virtual')
+    doctool_virtual_sources = '/path/to/bundle.json'
+"""
+import os
+import json
+import hashlib
+import logging
+
+from sphinx.project import Project
+
+from doctool import settings
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = settings.absjoin(settings.TEMPLATES_DIR, 'config', 'virtual_source.rst')
+
+
+def content_hash(text, key=''):
+    """
+    Computes the hash of a virtual source content
+
+    :param text: The source content
+    :type text: str
+
+    :param key: The source cache key (documented modules & dependencies)
+    :type key: str
+
+    :rtype: str
+    :return: The content hash
+    """
+    return hashlib.sha1('{0}\n{1}'.format(text, key).encode('utf8')).hexdigest()
+
+
+def load_sources(filename):
+    """
+    Loads the virtual sources bundle
+
+    :param filename: The bundle path
+    :type filename: str
+
+    :rtype: tuple
+    :return: The virtual sources (docname -> text) & their cache keys (docname -> key)
+    """
+    if not filename or not os.path.isfile(filename):
+        return {}, {}
+    with open(filename, 'r', encoding='utf8') as handle:
+        bundle = json.load(handle)
+    return bundle.get('sources', {}), bundle.get('keys', {})
+
+
+class VirtualProject(Project):
+    """
+    Sphinx Project adding the virtual documents to the discovered ones,
+    through the public discovery & path resolution methods only
+    """
+
+    def __init__(self, srcdir, source_suffix, virtual_docnames=()):
+        super(VirtualProject, self).__init__(srcdir, source_suffix)
+        self.virtual_docnames = frozenset(virtual_docnames)
+
+    def discover(self, *args, **kwargs):
+        docnames = super(VirtualProject, self).discover(*args, **kwargs)
+        docnames.update(self.virtual_docnames)
+        return docnames
+
+    def doc2path(self, docname, absolute):
+        # The relative path (`<docname><suffix>`) names the document (search index, source link),
+        # its content being read out of the placeholder
+        path = super(VirtualProject, self).doc2path(docname, absolute)
+        if absolute and docname in self.virtual_docnames:
+            return type(path)(PLACEHOLDER)
+        return path
+
+
+def builder_inited(app):
+    """
+    Loads the virtual sources & hands them to the Sphinx project, before it discovers the documents
+
+    :param app: The Sphinx application reference
+    """
+    # Kept on the application, not on the (pickled) environment
+    sources, keys = load_sources(app.config.doctool_virtual_sources)
+    app.doctool_virtual_sources = sources
+    app.doctool_virtual_keys = keys
+    if not sources:
+        return
+
+    # Module level class, the project is pickled along with the environment
+    project = VirtualProject(app.srcdir, app.config.source_suffix, sources)
+    project.restore(app.project)
+    app.project = app.env.project = project
+
+
+def source_read(app, docname, source):
+    """
+    Substitutes the placeholder content by the virtual one
+
+    :param app: The Sphinx application reference
+    :param docname: The document name
+    :param source: A one-item list holding the source content
+    """
+    sources = getattr(app, 'doctool_virtual_sources', None) or {}
+    if docname in sources:
+        source[0] = sources[docname]
+        hashes = getattr(app.env, 'doctool_virtual_hashes', {})
+        hashes[docname] = content_hash(sources[docname], app.doctool_virtual_keys.get(docname, ''))
+        app.env.doctool_virtual_hashes = hashes
+
+
+def env_get_outdated(app, env, added, changed, removed):
+    """
+    Virtual documents share a single placeholder (same mtime),
+    therefore their content hash & cache key tell whether they changed.
+
+    :return: The virtual documents whose content or cache key changed since the last build
+    :rtype: list
+    """
+    sources = getattr(app, 'doctool_virtual_sources', None) or {}
+    keys = getattr(app, 'doctool_virtual_keys', None) or {}
+    hashes = getattr(env, 'doctool_virtual_hashes', {})
+    return [
+        docname for docname, text in sources.items()
+        if docname not in added and hashes.get(docname) != content_hash(text, keys.get(docname, ''))
+    ]
+
+
+def html_page_context(app, pagename, templatename, context, doctree):
+    """
+    The placeholder is not copied as the source of a virtual document
+    """
+    if pagename in (getattr(app, 'doctool_virtual_sources', None) or {}):
+        context['sourcename'] = ''
+
+
+def env_purge_doc(app, env, docname):
+    """
+    Forgets a purged document hash
+    """
+    getattr(env, 'doctool_virtual_hashes', {}).pop(docname, None)
+
+
+def env_merge_info(app, env, docnames, other):
+    """
+    Merges the hashes computed by parallel readers
+    """
+    hashes = getattr(env, 'doctool_virtual_hashes', {})
+    for docname in docnames:
+        if docname in getattr(other, 'doctool_virtual_hashes', {}):
+            hashes[docname] = other.doctool_virtual_hashes[docname]
+    env.doctool_virtual_hashes = hashes
+
+
+def setup(app):
+    """
+    Sphinx extension entry point
+
+    :param app: The Sphinx application reference
+    """
+    # The bundle content is tracked by hashes, its location must not invalidate the environment
+    app.add_config_value('doctool_virtual_sources', '', '')
+
+    app.connect('builder-inited', builder_inited)
+    app.connect('source-read', source_read)
+    app.connect('env-get-outdated', env_get_outdated)
+    app.connect('html-page-context', html_page_context)
+    app.connect('env-purge-doc', env_purge_doc)
+    app.connect('env-merge-info', env_merge_info)
+
+    return {'parallel_read_safe': True, 'parallel_write_safe': True}
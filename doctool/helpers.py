@@ -32,12 +32,24 @@ SOFTWARE.
 import os
 import re
 import json
+import hashlib
+import posixpath
 import shutil
 import logging
 import functools
+import threading
 import traceback
 import subprocess
 import collections
+import collections.abc
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
 
 from doctool import settings
 from doctool import errors
@@ -147,7 +159,7 @@ class ProjectHelper(object):
     run_command = staticmethod(run_command)
 
     @classmethod
-    def __cptree(cls, src, dst, symlinks=False, ignore=None):
+    def __cptree(cls, src, dst, symlinks=False, ignore=None, copy_function=shutil.copy2):
         """
         Recursively copy a directory tree using copy2().
 
@@ -179,6 +191,9 @@ class ProjectHelper(object):
             list of names relative to the `src` directory that should
             not be copied.
 
+        :param copy_function: The function copying each file (e.g. :meth:`link_file`)
+        :type copy_function: callable
+
         :type ignore: callable
         """
         names = os.listdir(src)
@@ -199,9 +214,9 @@ class ProjectHelper(object):
                     linkto = os.readlink(srcname)
                     os.symlink(linkto, dstname)
                 elif os.path.isdir(srcname):
-                    cls.__cptree(srcname, dstname, symlinks=symlinks, ignore=ignore)
+                    cls.__cptree(srcname, dstname, symlinks=symlinks, ignore=ignore, copy_function=copy_function)
                 else:
-                    shutil.copy2(srcname, dstname)
+                    copy_function(srcname, dstname)
                     # XXX What about devices, sockets etc.?
             except (IOError, os.error) as why:
                 errors_.append((srcname, dstname, str(why)))
@@ -402,7 +417,23 @@ class ProjectHelper(object):
             logger.debug('File {0} already exists, skipping.'.format(fname))
 
     @classmethod
-    def cptree(cls, source, destination, symlinks=False, ignore=None):
+    def replace_file(cls, fname, content):
+        """
+        Writes content to the given filename atomically (readers get either the former or the new content)
+
+        :param fname: filename
+        :type fname: str
+
+        :param content: content to write
+        :type content: str
+        """
+        temporary = '{0}.{1}.tmp'.format(fname, os.getpid())
+        with open(temporary, 'w', encoding='utf8') as handle:
+            handle.write(content)
+        os.replace(temporary, fname)
+
+    @classmethod
+    def cptree(cls, source, destination, symlinks=False, ignore=None, copy_function=shutil.copy2):
         """
         Copy recursively a tree from the source directory to the destination directory
 
@@ -417,13 +448,35 @@ class ProjectHelper(object):
 
         :param destination: The destination where to copy
         :type destination: str
+
+        :param copy_function: The function copying each file (e.g. :meth:`link_file`)
+        :type copy_function: callable
         """
         if os.path.exists(source) and os.path.isdir(source):
             try:
-                cls.__cptree(source, destination, symlinks=symlinks, ignore=ignore)
+                cls.__cptree(source, destination, symlinks=symlinks, ignore=ignore, copy_function=copy_function)
             except errors.SysErrors + (shutil.Error,) as exc:
                 logger.exception(exc)
 
+    @staticmethod
+    def link_file(source, destination):
+        """
+        Hard links a file, copied instead when not supported (e.g. another file system)
+
+        .. note:: The linked file shares its content with the source one,
+                  it must be replaced (see :meth:`replace_file`), never rewritten in place.
+
+        :param source: The file to link
+        :type source: str
+
+        :param destination: The link path
+        :type destination: str
+        """
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)
+
     @classmethod
     def rmtree(cls, directory_path):
         """
@@ -628,12 +681,161 @@ class CodeProjectHelper(ProjectHelper):
     """
 
 
+class TitleCache(object):
+    """
+    Persistent RST titles cache, shared across projects & runs.
+
+    Entries are keyed on the file path and only valid as long as
+    the file size & modification time did not change. ::
+
+        {"/path/to/page.rst": [size, mtime_ns, "Page Title"], ...}
+    """
+    FILENAME = 'rst_titles.json'
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """
+        Gets the default cache instance (located into the doctool cache directory)
+
+        :rtype: TitleCache
+        :return: The default cache instance
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(settings.absjoin(settings.DOCTOOL_CACHE_DIR, cls.FILENAME))
+        return cls._default
+
+    def __init__(self, filename):
+        """
+        Constructor
+
+        :param filename: The cache file path
+        :type filename: str
+        """
+        self._filename = filename
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    @property
+    def entries(self):
+        """
+        Holds the cache entries (loaded once, lazily)
+
+        :rtype: dict
+        :return: The cache entries
+        """
+        if self._entries is None:
+            self._entries = {}
+            if os.path.isfile(self._filename):
+                try:
+                    with open(self._filename, 'r', encoding='utf8') as handle:
+                        self._entries = dict(json.load(handle))
+                except (ValueError, TypeError) + errors.SysErrors:
+                    logger.debug('Title cache {0} is corrupted, starting afresh.'.format(self._filename))
+        return self._entries
+
+    def get(self, path, extractor):
+        """
+        Gets the title of a RST file, extracting it only if the file changed
+
+        :param path: The RST file path
+        :type path: str
+
+        :param extractor: The title extractor (called with the path)
+        :type extractor: callable
+
+        :rtype: str
+        :return: The title (None if the file has no title)
+        """
+        try:
+            stat = os.stat(path)
+        except errors.SysErrors:
+            return extractor(path)
+
+        with self._lock:
+            entry = self.entries.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+
+        title = extractor(path)
+        with self._lock:
+            self.entries[path] = [stat.st_size, stat.st_mtime_ns, title]
+            self._dirty = True
+        return title
+
+    def save(self):
+        """
+        Writes the cache file (atomically) if any entry changed
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                ProjectHelper.createdirs(os.path.dirname(self._filename))
+                temporary = '{0}.{1}.tmp'.format(self._filename, os.getpid())
+                with open(temporary, 'w', encoding='utf8') as handle:
+                    json.dump(self._entries, handle)
+                os.replace(temporary, self._filename)
+                self._dirty = False
+            except errors.SysErrors as exc:
+                logger.warning('Title cache {0} could not be saved: {1}'.format(self._filename, exc))
+
+
+class FileLock(object):
+    """
+    Exclusive lock held on a file, across processes (e.g. concurrent doctool builds) ::
+
+        with FileLock('/path/to/file.lock'):
+            ...
+    """
+
+    def __init__(self, filename):
+        """
+        Constructor
+
+        :param filename: The lock file path (created if needed)
+        :type filename: str
+        """
+        self._filename = filename
+        self._handle = None
+
+    def __enter__(self):
+        ProjectHelper.createdirs(os.path.dirname(self._filename))
+        self._handle = open(self._filename, 'a+')
+        if fcntl:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        else:
+            self._handle.seek(0)
+            msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if fcntl:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            else:
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._handle.close()
+            self._handle = None
+
+
 class Types(object):
     """
     Groups some Useful Custom Types
 
         * AttributeString
         * AttributeDict
+        * KeyList
+        * PackageTrie
+        * TOCNode
+        * TOCTreeParser
+        * TOCList
     """
     OrderedDict = collections.OrderedDict
 
@@ -751,15 +953,479 @@ class Types(object):
             """
             return self.uid_index.get(uid)
 
+    class PackageTrie(object):
+        """
+        Package/Module trie, built once while scanning the API sources.
+
+        Each node is keyed by a dotted name part and carries, when a ReSt stub exists for it,
+        its document name & title. Insertion & lookup cost O(depth).
+
+        For example::
+
+            >>> trie = Types.PackageTrie()
+            >>> node = trie.insert('pkg.sub', title='sub Package')
+            >>> 'pkg.sub' in trie, 'pkg' in trie
+            (True, False)
+        """
+
+        def __init__(self, name=''):
+            """
+            Constructor
+
+            :param name: The node name (dotted name part)
+            :type name: str
+            """
+            self.name = name
+            self.title = ''
+            self.docname = ''
+            self.children = collections.OrderedDict()
+
+        def __contains__(self, dotted_name):
+            node = self.find(dotted_name)
+            return bool(node and node.docname)
+
+        def __len__(self):
+            return sum(1 for _ in self.documents())
+
+        def find(self, dotted_name):
+            """
+            Finds a node by its dotted name
+
+            :param dotted_name: The dotted name (ie. ``pkg.sub.module``)
+            :type dotted_name: str
+
+            :return: The node if any
+            :rtype: Types.PackageTrie or None
+            """
+            node = self
+            for part in dotted_name.split('.'):
+                node = node.children.get(part)
+                if node is None:
+                    break
+            return node
+
+        def insert(self, dotted_name, title=''):
+            """
+            Inserts a document into the trie (creating intermediate nodes)
+
+            :param dotted_name: The dotted name (ie. ``pkg.sub.module``), also used as document name
+            :type dotted_name: str
+
+            :param title: The document title
+            :type title: str
+
+            :return: The document node
+            :rtype: Types.PackageTrie
+            """
+            if not dotted_name:
+                return self
+            node = self
+            for part in dotted_name.split('.'):
+                if part not in node.children:
+                    node.children[part] = Types.PackageTrie(part)
+                node = node.children[part]
+            node.docname = dotted_name
+            node.title = title or node.title
+            return node
+
+        def sorted_children(self):
+            """
+            Gets the children nodes sorted by name
+
+            :rtype: list
+            :return: The sorted children nodes
+            """
+            return [self.children[name] for name in sorted(self.children)]
+
+        def documented_children(self):
+            """
+            Gets the nearest descendant nodes holding a document (sorted)
+
+            :rtype: list
+            :return: The document nodes
+            """
+            found, stack = [], list(reversed(self.sorted_children()))
+            while stack:
+                node = stack.pop()
+                if node.docname:
+                    found.append(node)
+                else:
+                    stack.extend(reversed(node.sorted_children()))
+            return found
+
+        def documents(self):
+            """
+            Iterates (depth-first, sorted) over the nodes holding a document
+
+            :return: A generator of document nodes
+            :rtype: generator
+            """
+            stack = [self]
+            while stack:
+                node = stack.pop()
+                if node.docname:
+                    yield node
+                stack.extend(reversed(node.sorted_children()))
+
+    class TOCNode(collections.abc.Mapping):
+        """
+        Compact (slotted) TOC tree node.
+
+        It behaves as a read-only mapping of the keys expected by the templates
+        (``name``, ``alias``, ``hash``, ``children`` & ``link`` for leaves),
+        its representation being the equivalent dictionary literal.
+        """
+        __slots__ = ('name', 'alias', 'hash', 'link', 'children')
+
+        def __init__(self, name, alias='', link=None):
+            """
+            Constructor
+
+            :param name: The node name (the page title for a leaf)
+            :type name: str
+
+            :param alias: The group display name (empty for a leaf)
+            :type alias: str
+
+            :param link: The page link (None for a group)
+            :type link: str
+            """
+            self.name = name
+            self.alias = alias
+            self.link = link
+            self.hash = ''
+            self.children = []
+
+        def __getitem__(self, key):
+            if key == 'link' and self.link is None or key not in self.__slots__:
+                raise KeyError(key)
+            return getattr(self, key)
+
+        def __iter__(self):
+            yield 'name'
+            yield 'alias'
+            yield 'hash'
+            yield 'children'
+            if self.link is not None:
+                yield 'link'
+
+        def __len__(self):
+            return 4 if self.link is None else 5
+
+        def __repr__(self):
+            return repr(dict(self))
+
+        @classmethod
+        def walk(cls, nodes):
+            """
+            Iterates (depth-first, pre-order, no recursion) over the nodes & their descendants
+
+            :param nodes: The root nodes
+            :type nodes: list
+
+            :return: A generator of nodes
+            :rtype: generator
+            """
+            stack = list(reversed(nodes))
+            while stack:
+                node = stack.pop()
+                yield node
+                stack.extend(reversed(node.children))
+
+        @classmethod
+        def make_id(cls, namespace, key):
+            """
+            Makes a stable node ID
+
+            :param namespace: The tree namespace (ie. the project ID)
+            :type namespace: str
+
+            :param key: The node key into its tree
+            :type key: str
+
+            :return: The node ID
+            :rtype: str
+            """
+            return hashlib.sha1('{0}:{1}'.format(namespace, key).encode('utf8')).hexdigest()[:10]
+
+        @classmethod
+        def identify(cls, nodes, namespace):
+            """
+            Gives (no recursion) every node its ID (``hash``), derived from the namespace & the node path:
+            a page is keyed on its link, a group on its branch of group names. Hence IDs (& the outputs
+            they are written into) only change when the node itself moves or is renamed.
+
+            :param nodes: The root nodes
+            :type nodes: list
+
+            :param namespace: The tree namespace (ie. the project ID)
+            :type namespace: str
+            """
+            stack = [(node, '') for node in reversed(nodes)]
+            while stack:
+                node, branch = stack.pop()
+                if node.link is None:
+                    branch = '{0}/{1}'.format(branch, node.name)
+                    node.hash = cls.make_id(namespace, 'group:{0}'.format(branch))
+                else:
+                    node.hash = cls.make_id(namespace, 'page:{0}'.format(node.link))
+                stack.extend((child, branch) for child in reversed(node.children))
+
+        @classmethod
+        def frontier(cls, nodes, maxdepth):
+            """
+            Gets (no recursion) the groups lying at the given depth,
+            their children being left out of a rendering limited to that depth
+
+            :param nodes: The root nodes (depth 1)
+            :type nodes: list
+
+            :param maxdepth: The maximum depth (unlimited if lower than 1)
+            :type maxdepth: int
+
+            :return: The groups whose children are beyond the maximum depth
+            :rtype: list
+            """
+            if maxdepth < 1:
+                return []
+            level = list(nodes)
+            for _ in range(maxdepth - 1):
+                level = [child for node in level for child in node.children]
+            return [node for node in level if node.children]
+
+    class TOCTreeParser(object):
+        """
+        Streaming parser of the RST ``toctree`` directives.
+
+        Each document is parsed (in a single pass over its lines) at most once,
+        its toctrees (options, caption & entries with their explicit titles) being memoized ::
+
+            [{"options": {"caption": "Guide", "glob": True}, "entries": [(None, "intro"), ("Title", "sub/*")]}]
+
+        Included documents are walked depth-first, each one only once (diamonds & cycles are safe),
+        :glob: patterns being matched against a directory index of all documents computed once.
+        """
+        DIRECTIVE = '.. toctree::'
+        EXPLICIT_TITLE = re.compile(r'^(.+?)\s*<([^<>]+)>$')
+        GLOB_CHARS = ('*', '?', '[')
+        SOURCE_SUFFIX = '.rst'
+
+        def __init__(self, reader, exists, docnames):
+            """
+            Constructor
+
+            :param reader: Gets the lines (an iterable) of a document by its name
+            :type reader: callable
+
+            :param exists: Tells whether a document exists by its name
+            :type exists: callable
+
+            :param docnames: Gets all document names (called once, when a :glob: pattern is met)
+            :type docnames: callable
+            """
+            self._reader = reader
+            self._exists = exists
+            self._docnames_getter = docnames
+            self._docnames = None
+            self._toctrees = {}
+
+        @property
+        def docnames(self):
+            """
+            Holds the directory index (all sorted document names), computed once
+
+            :rtype: list
+            :return: The document names
+            """
+            if self._docnames is None:
+                self._docnames = sorted(self._docnames_getter())
+            return self._docnames
+
+        @classmethod
+        def parse_entry(cls, entry):
+            """
+            Parses a toctree entry (``docname`` or ``Explicit Title <docname>``)
+
+            :param entry: The stripped entry
+            :type entry: str
+
+            :rtype: tuple
+            :return: The explicit title (None if not any) & the reference
+            """
+            match = cls.EXPLICIT_TITLE.match(entry)
+            if match:
+                return match.group(1), match.group(2).strip()
+            return None, entry
+
+        @classmethod
+        def parse_lines(cls, lines):
+            """
+            Parses the toctree directives out of RST lines, in a single pass
+
+            :param lines: The RST lines (ie. an opened file)
+            :type lines: iterable
+
+            :rtype: list
+            :return: The toctrees
+            """
+            toctrees, toctree, indent, in_options = [], None, 0, False
+            for line in lines:
+                expanded = line.expandtabs(8).rstrip()
+                stripped = expanded.lstrip()
+                if toctree is not None:
+                    if not stripped:
+                        # Options directly follow the directive, the content comes after a blank line
+                        in_options = False
+                        continue
+                    if len(expanded) - len(stripped) > indent:
+                        if in_options and stripped.startswith(':'):
+                            name, _, value = stripped[1:].partition(':')
+                            toctree['options'][name.strip()] = value.strip() or True
+                        elif not stripped.startswith('..'):
+                            in_options = False
+                            toctree['entries'].append(cls.parse_entry(stripped))
+                        continue
+                    # Dedented, the directive is over
+                    toctree = None
+
+                if stripped.startswith(cls.DIRECTIVE):
+                    indent, in_options = len(expanded) - len(stripped), True
+                    toctree = dict(options={}, entries=[])
+                    toctrees.append(toctree)
+            return toctrees
+
+        @classmethod
+        def resolve(cls, docname, reference):
+            """
+            Resolves a toctree reference into a document name
+
+            :param docname: The including document name
+            :type docname: str
+
+            :param reference: The reference (relative to the including document, or absolute if starting with ``/``)
+            :type reference: str
+
+            :rtype: str
+            :return: The referenced document name (or pattern)
+            """
+            if reference.endswith(cls.SOURCE_SUFFIX):
+                reference = reference[:-len(cls.SOURCE_SUFFIX)]
+            if reference.startswith('/'):
+                return posixpath.normpath(reference.lstrip('/'))
+            return posixpath.normpath(posixpath.join(posixpath.dirname(docname), reference))
+
+        @classmethod
+        def glob(cls, pattern):
+            """
+            Compiles a :glob: pattern (wildcards do not match the ``/`` separator)
+
+            :param pattern: The document names pattern
+            :type pattern: str
+
+            :rtype: re.Pattern
+            :return: The compiled pattern
+            """
+            regex, index = '', 0
+            while index < len(pattern):
+                char, index = pattern[index], index + 1
+                end = pattern.find(']', index) if char == '[' else -1
+                if char == '*':
+                    regex += '[^/]*'
+                elif char == '?':
+                    regex += '[^/]'
+                elif end != -1:
+                    body = pattern[index:end].replace('\\', '\\\\')
+                    regex += '[{0}]'.format('^' + body[1:] if body.startswith('!') else body)
+                    index = end + 1
+                else:
+                    regex += re.escape(char)
+            return re.compile(regex + '$')
+
+        def feed(self, docname, lines):
+            """
+            Parses a document out of the given lines (ie. already read), instead of reading it
+
+            :param docname: The document name
+            :type docname: str
+
+            :param lines: The document lines
+            :type lines: iterable
+            """
+            self._toctrees[docname] = self.parse_lines(lines)
+
+        def toctrees(self, docname):
+            """
+            Gets the toctrees of a document (parsed once)
+
+            :param docname: The document name
+            :type docname: str
+
+            :rtype: list
+            :return: The toctrees
+            """
+            if docname not in self._toctrees:
+                try:
+                    self._toctrees[docname] = self.parse_lines(self._reader(docname))
+                except errors.SysErrors + (KeyError, UnicodeDecodeError):
+                    logger.debug('Parsing the toctrees of {0} failed !'.format(docname))
+                    self._toctrees[docname] = []
+            return self._toctrees[docname]
+
+        def references(self, docname):
+            """
+            Iterates over the (existing) documents referenced by the toctrees of a document
+
+            .. note:: ``self`` & external (URL) entries are skipped
+
+            :param docname: The document name
+            :type docname: str
+
+            :return: A generator of (explicit title or None, document name)
+            :rtype: generator
+            """
+            for toctree in self.toctrees(docname):
+                is_glob = 'glob' in toctree['options']
+                for title, reference in toctree['entries']:
+                    if reference == 'self' or '://' in reference or reference.startswith('mailto:'):
+                        continue
+                    target = self.resolve(docname, reference)
+                    if is_glob and any(char in reference for char in self.GLOB_CHARS):
+                        pattern = self.glob(target)
+                        for match in self.docnames:
+                            if match != docname and pattern.match(match):
+                                yield None, match
+                    elif self._exists(target):
+                        yield title, target
+
+        def walk(self, root):
+            """
+            Iterates (depth-first, document order, no recursion) over the documents included from a root one,
+            each document being met only once
+
+            :param root: The root document name
+            :type root: str
+
+            :return: A generator of (explicit title or None, document name)
+            :rtype: generator
+            """
+            visited, stack = {root}, [self.references(root)]
+            while stack:
+                reference = next(stack[-1], None)
+                if reference is None:
+                    stack.pop()
+                    continue
+                title, docname = reference
+                if docname in visited:
+                    continue
+                visited.add(docname)
+                yield title, docname
+                stack.append(self.references(docname))
+
     class TOCList(list):
         """
         Represents a collection of TOCItem instances
         """
-        __IS_HIDDEN = False
-
-        GLOBAL_ID = 0
         RST_TITLE_TYPOS = ('#', '*', '-', '^', '~', '=', '"')
-        RST_ALL_TYPOS = RST_TITLE_TYPOS + ('..', ':')
 
         @classmethod
         def seek_for_title_info(cls, lines, symbols):
@@ -798,7 +1464,7 @@ class Types(object):
             :rtype: str
             """
             if not self._first_link:
-                self._first_link = self._recurse_over_links(self.items)
+                self._first_link = self._find_first_link(self.items)
             return self._first_link
 
         @property
@@ -809,7 +1475,7 @@ class Types(object):
             :return: The inner Items list
             :rtype: list
             """
-            return list(self.__items)
+            return list(self._items)
 
         def __init__(self, sequence=None,
                      src_dirname="",
@@ -818,22 +1484,29 @@ class Types(object):
                      master_name='index',
                      master_name_excluded=True,
                      joined_stripped=False,
-                     is_api=False):
+                     is_api=False,
+                     sources=None,
+                     tree=None):
             """
             Constructor
 
             :param sequence: A list to init this one
             :type sequence: tuple or list
+
+            :param sources: Optional in-memory sources (docname -> text) read instead of the files
+            :type sources: dict
+
+            :param tree: Optional package trie, mapped as is (no link extraction, nor file read)
+            :type tree: Types.PackageTrie
             """
             sequence = sequence or []
             super(Types.TOCList, self).__init__(sequence)
 
             self._is_api = is_api
 
-            self.__main_dict = collections.OrderedDict()
-            self.__items = Types.KeyList(key='hash')
-            self.__analysis_list = []
-            self.__alias = {}
+            # Root nodes & nodes index by (parent ID, kind, name), for this tree only
+            self._items = []
+            self._nodes = {}
 
             self._first_link = ""
             self._current_depth = 0
@@ -843,194 +1516,323 @@ class Types(object):
             self._master_name = master_name
             self._master_name_excluded = master_name_excluded
             self._joined_stripped = joined_stripped
+            self._sources = sources
+            self._tree = tree
 
-        def _get_title_from_rst_file(self, rst_file):
+        def _docname(self, rst_file):
             """
-            Get the title from a RST file (following RST convention)
+            Gets the document name of a RST file path, relatively to the base path
 
             :type rst_file: str
             :param rst_file: The RST file path
 
             :rtype: str
-            :return: The found title (stripped)
+            :return: The document name
             """
-            title = '@doctool.missing.title'
-            try:
-                with open(rst_file, 'rb') as page:
-                    lines = [str(l, 'utf8') for l in page.readlines()]
-                    found, index, symbol = self.seek_for_title_info(lines, self.RST_TITLE_TYPOS)
-                    if found:
-                        if lines[index + 2].startswith(symbol):
-                            title = str(lines[index + 1]).strip()
-                        else:
-                            title = str(lines[index - 1]).strip()
-            except errors.SysErrors + (Exception,):
-                logger.debug('Resolving RST file {0} title failed !'.format(rst_file))
-                logger.debug(traceback.format_exc())
+            relative = ProjectHelper.normpath(rst_file)[len(ProjectHelper.normpath(self._basepath)):]
+            return os.path.splitext(relative.strip('/'))[0]
+
+        def _exists(self, rst_file):
+            """
+            Tells whether the RST file exists, either in memory or on the file system
+
+            :type rst_file: str
+            :param rst_file: The RST file path
 
-            return title.strip()
+            :rtype: bool
+            :return: Whether the RST file exists
+            """
+            if self._sources is not None:
+                return self._docname(rst_file) in self._sources
+            return os.path.isfile(rst_file)
 
-        def _recurse_over_links(self, toc):
+        def _read_lines(self, rst_file):
             """
-            Recursive inner method.
+            Reads the RST file lines, either from memory or from the file system
 
-            Attempt to find the first valid link item and return it.
+            :type rst_file: str
+            :param rst_file: The RST file path
 
-            :param toc: The TOC tree list
-            :type toc: list
+            :rtype: list
+            :return: The file lines
+            """
+            if self._sources is not None:
+                return self._sources[self._docname(rst_file)].splitlines(True)
+            with open(rst_file, 'rb') as page:
+                return [str(l, 'utf8') for l in page.readlines()]
+
+        def _path(self, docname):
+            """
+            Gets the RST file path of a document
+
+            :type docname: str
+            :param docname: The document name
 
-            :return: A found valid link
             :rtype: str
+            :return: The RST file path
             """
-            for toc_item in toc:
-                if 'link' in toc_item:
-                    return toc_item['link']
-                elif 'children' in toc_item:
-                    return self._recurse_over_links(toc_item['children'])
+            if self._joined_stripped:
+                docname = docname.replace('/', '.')
+            return ProjectHelper.absjoin(self._basepath, '{0}.rst'.format(docname)).replace('\\', '/')
 
-        def _recursive_tree_mapping(self, data, trunk, alias):
+        def _stream_doc(self, docname):
             """
-            Recursive method.
+            Streams the lines of a document, either from memory or from the file system
 
-            Insert a branch of directories on its trunk.
+            :type docname: str
+            :param docname: The document name
 
-            :param data: A set of data (branch, links)
-            :type: tuple
+            :rtype: generator
+            :return: The document lines
+            """
+            if self._sources is not None:
+                yield from self._read_lines(self._path(docname))
+                return
+            with open(self._path(docname), 'r', encoding='utf8') as page:
+                yield from page
 
-            :param trunk: The data structure instance
-            :param trunk: dict
+        def _all_docnames(self):
             """
-            branch, relative_link, absolute_link = data
-            parts = branch.split('/', 1)
-            if len(parts) == 1:  # branch is a file
-                title = self._get_title_from_rst_file(absolute_link)
-                trunk[title or '{0}'.format(parts[0]).lower().capitalize()] = relative_link
-            else:
-                node, others = parts
-                if node not in trunk:
-                    trunk[node] = collections.OrderedDict()
-                    index_path = absolute_link.replace('{0}.rst'.format(branch),
-                                                       '{0}/{1}.rst'.format(node, self._master_name))
-                    title = self._get_title_from_rst_file(index_path)
-                    alias[node] = {
-                        '__alias__': title
-                        if title != 'Missing' and not self._is_api
-                        else ' '.join(node.split('_')).capitalize()
-                    }
-                self._recursive_tree_mapping((others, relative_link, absolute_link), trunk[node], alias[node])
-
-        def _recursive_tree_analysis(self, lines):
-            """
-            Recursive method.
-
-            Performs an analysis on links contained in self
-            to modify itself according nested index file (that contains another sub-links
+            Gets all the document names (the directory index :glob: patterns are matched against)
+
+            :rtype: list
+            :return: The document names
             """
+            if self._sources is not None:
+                return list(self._sources)
+            docnames = []
+            for root, dirs, files in os.walk(self._basepath):
+                dirs[:] = [name for name in dirs if not name.startswith(('.', '_'))]
+                docnames.extend(self._docname(os.path.join(root, name)) for name in files if name.endswith('.rst'))
+            return docnames
+
+        @classmethod
+        def from_nav(cls, nav, suffix, master_name='index'):
+            """
+            Converts a navigation exported out of the Sphinx environment into TOC items,
+            as expected by the Template engine instance
+
+            .. seealso:: :mod:`doctool.extensions.navigation`
+
+            :param nav: The exported navigation
+            :type nav: dict
+
+            :param suffix: The links prefix (the project ID)
+            :type suffix: str
+
+            :param master_name: The master document name (a master document only shows as a group)
+            :type master_name: str
+
+            :rtype: tuple
+            :return: The TOC items & the first link
+            """
+            items, stack = [], [(nav.get('entries') or [], None)]
+            while stack:
+                entries, parent = stack.pop()
+                siblings = parent.children if parent is not None else items
+                for entry in entries:
+                    docname, children = entry.get('docname', ''), entry.get('children')
+                    link = entry.get('url') or '{0}/{1}.html'.format(suffix, docname)
+                    if children:
+                        parts = docname.replace('.', '/').split('/')
+                        is_master = len(parts) > 1 and parts[-1] == master_name
+                        node = Types.TOCNode(parts[-2] if is_master else parts[-1], alias=entry['title'])
+                        if not is_master:
+                            node.children.append(Types.TOCNode(entry['title'], link=link))
+                        stack.append((children, node))
+                    else:
+                        node = Types.TOCNode(entry['title'], link=link)
+                    siblings.append(node)
+
+            Types.TOCNode.identify(items, suffix)
+            first = nav.get('first')
+            return items, '{0}/{1}.html'.format(suffix, first) if first else ''
+
+        @classmethod
+        def extract_title(cls, lines):
+            """
+            Extracts the title out of RST lines (following RST convention),
+            the lines being consumed only until the first heading is found.
+
+            :type lines: iterable
+            :param lines: The RST lines (ie. an opened file)
+
+            :rtype: str
+            :return: The found title (None if not any)
+            """
+            lines, previous = iter(lines), None
             for line in lines:
                 stripped = line.strip()
+                symbol = next((s for s in cls.RST_TITLE_TYPOS if stripped.startswith(s)), None) if stripped else None
+                if symbol:
+                    text, underline = next(lines, ''), next(lines, '')
+                    if underline.startswith(symbol):
+                        return text.strip()
+                    return previous.strip() if previous is not None else None
+                previous = line
+            return None
 
-                if not stripped:
-                    continue
+        @classmethod
+        def read_title(cls, rst_file):
+            """
+            Reads the title of a RST file, incrementally
 
-                if not self.__IS_HIDDEN and ':hidden:' in stripped:
-                    self.__IS_HIDDEN = True
-                elif self.__IS_HIDDEN and '.. toctree::' in stripped:
-                    self.__IS_HIDDEN = False
+            :type rst_file: str
+            :param rst_file: The RST file path
 
-                if self.__IS_HIDDEN:
-                    continue
+            :rtype: str
+            :return: The found title (None if not any)
+            """
+            with open(rst_file, 'r', encoding='utf8') as page:
+                return cls.extract_title(page)
 
-                might_be_a_link = bool([stripped for typo in self.RST_ALL_TYPOS
-                                        if stripped and not stripped.startswith(typo)])
-                if not might_be_a_link:
-                    continue
+        def _get_title_from_rst_file(self, rst_file):
+            """
+            Get the title from a RST file (following RST convention)
+
+            .. note:: Titles read from the file system go through the persistent :class:`TitleCache`
+
+            :type rst_file: str
+            :param rst_file: The RST file path
 
-                if self._joined_stripped:
-                    joined_strip = stripped.replace('/', '.')
-                    absolute_link = ProjectHelper.absjoin(self._basepath, '{0}.rst'.format(joined_strip))
-                    relative_link = '{0}/{1}.html'.format(self._suffix, joined_strip)
+            :rtype: str
+            :return: The found title (stripped)
+            """
+            title = None
+            try:
+                if self._sources is not None:
+                    title = self.extract_title(self._read_lines(rst_file))
                 else:
-                    absolute_link = ProjectHelper.absjoin(self._basepath, '{0}.rst'.format(stripped))
-                    relative_link = '{0}/{1}.html'.format(self._suffix, stripped)
+                    title = TitleCache.default().get(rst_file, self.read_title)
+            except errors.SysErrors + (Exception,):
+                logger.debug('Resolving RST file {0} title failed !'.format(rst_file))
+                logger.debug(traceback.format_exc())
 
-                if not os.path.isfile(absolute_link):
-                    continue
+            return '@doctool.missing.title' if title is None else title.strip()
 
-                self.append((stripped, relative_link, absolute_link.replace('\\', '/')))
+        @classmethod
+        def _find_first_link(cls, items):
+            """
+            Attempts to find the first valid link item (depth-first) and return it.
 
-                if self._joined_stripped:
-                    continue
+            :param items: The TOC tree list
+            :type items: list
 
-                if stripped.endswith(self._master_name):
-                    try:
-                        with open(absolute_link, 'r') as hdl:
-                            lines = hdl.readlines()
-                        if lines:
-                            root_index = stripped.replace(self._master_name, '')
-                            prepended_lines = []
-                            for l in lines:
-                                l_stripped = l.strip()
-                                if l_stripped:
-                                    prepended_lines.append(root_index + l_stripped)
-                            self._recursive_tree_analysis(prepended_lines)
-                    except errors.SysErrors:
-                        pass
+            :return: A found valid link
+            :rtype: str
+            """
+            for node in Types.TOCNode.walk(items):
+                if node.link:
+                    return node.link
 
-        def _recursive_children_analysis(self, data, alias, root_item=None):
+        def _node(self, kind, name, parent=None, alias='', link=None):
             """
-            Recursive method.
+            Gets (or creates & appends to its parent) the named node of the given kind
 
-            Performs Root/Children association on analysed data links
-            Therefore preparing well-structured data as expected by the
-            Template engine instance
+            :param kind: The node kind (``group`` or ``page``)
+            :type kind: str
 
-            :param data: A bunch of data
-            :type data: dict
+            :param name: The node name (unique by kind into its parent)
+            :type name: str
 
-            :param root_item: A Root/Parent bunch of data
-            :type root_item: dict
+            :param parent: The parent node (None for a root node)
+            :type parent: Types.TOCNode
+
+            :return: The node
+            :rtype: Types.TOCNode
+            """
+            key = (id(parent), kind, name)
+            node = self._nodes.get(key)
+            if node is None:
+                node = self._nodes[key] = Types.TOCNode(name, alias=alias, link=link)
+                (parent.children if parent is not None else self._items).append(node)
+            elif link is not None:
+                node.link = link
+            return node
+
+        def _map_link(self, branch, relative_link, absolute_link, title=None):
             """
-            for root, link in data.items():
+            Inserts a link on its branch of directories (groups)
 
-                is_file = isinstance(link, str)
-                is_children = issubclass(link.__class__, dict)
-                current_link = 'unknown{0}'.format(Types.TOCList.GLOBAL_ID)
+            :param branch: The link branch (ie. ``dir/sub/page``)
+            :type branch: str
 
-                current_root_item = dict(name=root,
-                                         alias="" if is_file else alias[root]['__alias__'],
-                                         hash=Types.TOCList.GLOBAL_ID,
-                                         children=Types.KeyList(key='hash'))
+            :param relative_link: The page relative link
+            :type relative_link: str
 
-                Types.TOCList.GLOBAL_ID += 1
+            :param absolute_link: The page absolute path
+            :type absolute_link: str
 
-                if link and is_file:
-                    current_root_item['link'] = current_link = link
+            :param title: The toctree entry explicit title (read out of the page if not any)
+            :type title: str
+            """
+            parts, parent = branch.split('/'), None
+            for index, part in enumerate(parts[:-1]):
+                if (id(parent), 'group', part) not in self._nodes:
+                    remaining = '/'.join(parts[index:])
+                    index_path = absolute_link.replace('{0}.rst'.format(remaining),
+                                                       '{0}/{1}.rst'.format(part, self._master_name))
+                    group_title = self._get_title_from_rst_file(index_path)
+                    alias = (group_title if group_title != 'Missing' and not self._is_api
+                             else ' '.join(part.split('_')).capitalize())
+                else:
+                    alias = ''
+                parent = self._node('group', part, parent=parent, alias=alias)
 
-                if root_item and current_link not in root_item['children']:
-                    root_item['children'].append(current_root_item)
-                elif current_link not in self.__items:
-                    self.__items.append(current_root_item)
+            title = title or self._get_title_from_rst_file(absolute_link) or parts[-1].lower().capitalize()
+            self._node('page', title, parent=parent, link=relative_link)
 
-                if link and is_children:
-                    self._recursive_children_analysis(link, alias[root], root_item=current_root_item)
+        def _map_trie(self, tree):
+            """
+            Maps a package trie the same way :meth:`_map_link` does for extracted links.
 
-        def _recursive_exclude_master_name_items(self, items):
+            :param tree: The package trie
+            :type tree: Types.PackageTrie
             """
-            Recursive method.
+            stack = [(tree, None)]
+            while stack:
+                trie_node, parent = stack.pop()
+                pending = []
+                for child in trie_node.sorted_children():
+                    if child.docname:
+                        title = child.title or child.name.lower().capitalize()
+                        link = '{0}/{1}.html'.format(self._suffix, child.docname)
+                        self._node('page', title, parent=parent, link=link)
+                    if child.children:
+                        alias = ' '.join(child.name.split('_')).capitalize()
+                        group = self._node('group', child.name, parent=parent, alias=alias)
+                        pending.append((child, group))
+                stack.extend(reversed(pending))
+
+        def _analyse(self, lines):
+            """
+            Performs an analysis on the toctrees of the given (master document) lines,
+            walking the included documents (depth-first, each document parsed once)
 
-            Excludes recursively all items having a link containing the master name string
+            .. note:: In joined (dotted) mode, only the master document toctrees are analysed
+            """
+            parser = Types.TOCTreeParser(self._stream_doc, lambda docname: self._exists(self._path(docname)),
+                                         self._all_docnames)
+            parser.feed(self._master_name, lines)
 
-            :param items: The TOC Items list
-            :type items: list
+            if self._joined_stripped:
+                references = parser.references(self._master_name)
+            else:
+                references = parser.walk(self._master_name)
+
+            for title, docname in references:
+                link = docname.replace('/', '.') if self._joined_stripped else docname
+                self.append((docname, '{0}/{1}.html'.format(self._suffix, link), self._path(docname), title))
+
+        def _exclude_master_name_items(self):
             """
-            for idx, item in enumerate(items):
-                if self._master_name in item.get('link', ""):
-                    del items[idx]
-                    del item
-                    continue
-                children = item.get('children')
-                if children:
-                    self._recursive_exclude_master_name_items(children)
+            Excludes (no recursion) all items having a link containing the master name string
+            """
+            stack = [self._items]
+            while stack:
+                items = stack.pop()
+                items[:] = [item for item in items if self._master_name not in (item.link or '')]
+                stack.extend(item.children for item in items if item.children)
 
         def _extract(self):
             """
@@ -1044,7 +1846,7 @@ class Types(object):
             # Clearing the Inner list (self)
             self.clear()
             # Iterate over the copied list and appending valid link(s) to self
-            self._recursive_tree_analysis(lines)
+            self._analyse(lines)
             return self
 
         def clear(self):
@@ -1075,39 +1877,42 @@ class Types(object):
                                  suffix=self._suffix,
                                  maxdepth=self._maxdepth,
                                  master_name=self._master_name,
-                                 joined_stripped=self._joined_stripped)
+                                 joined_stripped=self._joined_stripped,
+                                 sources=self._sources,
+                                 tree=self._tree)
                 return Types.TOCList(copy, **self_data)
             return copy
 
         def build(self):
             """
             Builds the TOC tree by extracting first all valid links from files
-            then mapping it to data structure and ordering them recursively from parent (root)
-            to children, therefore being well-prepared for templating data
+            then mapping them into a tree of :class:`Types.TOCNode` (from parent (root) to children),
+            therefore being well-prepared for templating data
 
             :return: Itself to allow chaining pattern on public methods
             :rtype: self
             """
-            for links in self._extract():
-                self._recursive_tree_mapping(links, self.__main_dict, self.__alias)
-            self._recursive_children_analysis(self.__main_dict, self.__alias)
+            if self._tree is not None:
+                self._map_trie(self._tree)
+            else:
+                for links in self._extract():
+                    self._map_link(*links)
+            Types.TOCNode.identify(self._items, self._suffix)
 
             if self._master_name_excluded:
-                self._recursive_exclude_master_name_items(self.__items)
+                self._exclude_master_name_items()
 
             return self
 
-        def pretty_print(self, d=None, indent=4):
+        def pretty_print(self, indent=4):
             """
-            Print the file tree structure with proper indentation.
+            Print the TOC tree structure with proper indentation.
 
-            :param d: The data structure to be printed
             :param indent: The indentation for the data structure depth
 
             :return: Itself to allow chaining pattern on public methods
             :rtype: self
             """
-            print(json.dumps(d or self.__main_dict, indent=indent))
-            print(json.dumps(self.__items, indent=indent))
+            print(json.dumps(self._items, indent=indent, default=dict))
 
             return self
@@ -33,6 +33,7 @@ Available Interfaces :
     * IBuilder
     * IProject
     * IManager
+    * IStage
 """
 import abc
 
@@ -170,6 +171,18 @@ class IManager(_ICommon):
         :rtype: str or unicode
         """
 
+    @property
+    @abc.abstractmethod
+    def conf_dir(self):
+        """
+        Abstract property
+
+        Should implement a way to get the directory holding the generated configurations of the current build.
+
+        :return: A valid configuration directory path
+        :rtype: str or unicode
+        """
+
     @abc.abstractmethod
     def run(self):
         """
@@ -177,3 +190,45 @@ class IManager(_ICommon):
 
         The whole process run
         """
+
+
+class IStage(_ICommon):
+    """
+    Interface for the post-build Stages, processing the generated output before it is published
+
+    Abstract Methods :
+
+        * setup : Must be implemented to treat all prerequisites.
+        * build : Must be implemented to process the (staging) output directory.
+        * teardown : Must be implemented to clean up once the output is published.
+    """
+
+    def __init__(self, manager):
+        """
+        Constructor
+
+        :param manager: The Project Manager instance
+        :type manager: IManager
+        """
+        self._manager = manager
+        self._report = None
+
+    @property
+    def manager(self):
+        """
+        Holds the Project Manager instance
+
+        :rtype: IManager
+        :return: The Project Manager instance
+        """
+        return self._manager
+
+    @property
+    def report(self):
+        """
+        Holds the last build report
+
+        :rtype: Types.AttributeDict or None
+        :return: The report (stage specific figures)
+        """
+        return self._report
@@ -54,7 +54,21 @@ Multiple Projects into one with a clear, user-friendly template (Android-like).
 
             #. bootstrap
 
-    * **-i, --interactive**: Use this option to get interactive mode.
+    * **-i, --interactive**: Deprecated, has no effect (the live output is no longer removed, the build
+        going into a staging snapshot).
+
+    * **-u, --update**: Use this option to rebuild the given projects only,
+        the others being kept as is into the existing documentation.
+
+    * **search-server**: Runs the search server answering JSON queries from the search databases
+        of an output directory (`SEARCH_DATABASE` global configuration) ::
+
+            doctool search-server -r OUTPUT [-H HOST] [-p PORT]
+
+    * **serve**: Runs the preview server of an output directory (thread pool, cache validators, ranges,
+        precompressed sidecars), answering the search queries as well ::
+
+            doctool serve OUTPUT [-H HOST] [-p PORT] [-w WORKERS]
 
 For more details get yourself posted about this tool at::
 
@@ -71,6 +85,7 @@ DOCTOOL_ROOTDIR = os.path.abspath(
 sys.path.insert(0, DOCTOOL_ROOTDIR)
 
 from doctool import settings
+from doctool import server
 from doctool.managers import ProjectManager
 
 
@@ -130,7 +145,13 @@ def make_parser(description=__doc__):
                         type=int,
                         dest="interactive",
                         default=0,
-                        help="Use this option to get interactive mode.")
+                        help="Deprecated, has no effect.")
+
+    parser.add_argument("-u", "--update",
+                        action="store_true",
+                        dest="update",
+                        help="Use this option to rebuild the given projects only, "
+                             "the others being kept as is into the existing documentation.")
 
     projects_group = parser.add_argument_group('Doctool Build Modes',
                                                '''SIMPLE : Match Sphinx behavior building from a single project source.
@@ -144,6 +165,48 @@ def make_parser(description=__doc__):
                                      "of keys from your Configuration file "
                                      "or a combination of directories path containing ReSt files.")
 
+    commands = parser.add_subparsers(dest='command', title='Commands')
+    search_server = commands.add_parser('search-server',
+                                        help="Runs the search server answering JSON queries "
+                                             "from the search databases of an output directory.")
+    search_server.add_argument("-r", "--root",
+                               type=str,
+                               dest="root",
+                               required=True,
+                               help="The output directory (holding the versions).")
+    search_server.add_argument("-H", "--host",
+                               type=str,
+                               dest="host",
+                               default="127.0.0.1",
+                               help="The host to listen to.")
+    search_server.add_argument("-p", "--port",
+                               type=int,
+                               dest="port",
+                               default=settings.DEFAULT_SEARCH_SERVER_PORT,
+                               help="The port to listen to.")
+
+    preview = commands.add_parser('serve',
+                                  help="Runs the preview server of an output directory "
+                                       "(cache validators, ranges, precompressed sidecars & search queries).")
+    preview.add_argument("root",
+                         type=str,
+                         help="The output directory (holding the versions).")
+    preview.add_argument("-H", "--host",
+                         type=str,
+                         dest="host",
+                         default="127.0.0.1",
+                         help="The host to listen to.")
+    preview.add_argument("-p", "--port",
+                         type=int,
+                         dest="port",
+                         default=settings.DEFAULT_PREVIEW_SERVER_PORT,
+                         help="The port to listen to.")
+    preview.add_argument("-w", "--workers",
+                         type=int,
+                         dest="workers",
+                         default=settings.DEFAULT_PREVIEW_WORKERS,
+                         help="The number of requests handled concurrently.")
+
     return parser
 
 
@@ -157,8 +220,16 @@ def main():
     parser_ = make_parser()
     namespace = parser_.parse_args(sys.argv[1:])
     exit_status = 0
-
-    if not (namespace.projects or namespace.list_projects):
+    command = namespace.__dict__.pop('command', None)
+
+    if command == 'search-server':
+        logging.basicConfig(level=logging.INFO)
+        exit_status = server.serve(namespace.root, host=namespace.host, port=namespace.port)
+    elif command == 'serve':
+        logging.basicConfig(level=logging.INFO)
+        exit_status = server.preview(namespace.root, host=namespace.host, port=namespace.port,
+                                     workers=namespace.workers)
+    elif not (namespace.projects or namespace.list_projects):
         parser_.print_help()
     else:
         # for performance, I do not use :func:`vars` builtin function
@@ -32,9 +32,12 @@ SOFTWARE.
 :summary: Groups all Project's Management Classes
 """
 import os
+import re
 import json
+import time
 import jinja2
 import logging
+import tempfile
 
 from doctool import settings
 
@@ -45,9 +48,18 @@ from doctool.interfaces import IBuilder
 from doctool.builders import SphinxBuilder
 
 from doctool.helpers import Types
+from doctool.helpers import FileLock
 from doctool.helpers import ProjectHelper
 from doctool.helpers import CodeProjectHelper
 
+from doctool.stages.compress import Precompress
+from doctool.stages.fingerprint import Fingerprint
+from doctool.stages.images import ImageOptimizer
+from doctool.stages.static import StaticStore
+from doctool.search import SearchIndex
+from doctool.searchdb import SearchDatabase
+from doctool.versions import VersionsManifest
+
 from doctool.models import Theme
 from doctool.models import RSTProject
 from doctool.models import CodeProject
@@ -71,12 +83,11 @@ class ProjectManager(IManager):
 
     ** Doctool uses as initial inputs **
 
-    #. Project Mode : {mode}
+    #. Project Mode : {mode}{update}
     #. Generated Project(s) : {ranked_projects}
     #. Master Documentation Title : {this.master_title}
     #. Theme used : {this.theme.name}
-    #. Output destination directory : {this.output_dir}
-    #. Interactive Mode : {interactive}
+    #. Output destination directory : {this.live_output_dir}
 
     '''
 
@@ -107,7 +118,8 @@ class ProjectManager(IManager):
                  conf_file="",
                  master_title="",
                  theme_name="bootstrap",
-                 interactive=1):
+                 interactive=1,
+                 update=False):
         """
         Doctool Projects Manager Constructor.
 
@@ -140,8 +152,11 @@ class ProjectManager(IManager):
         :param theme_name: Provides the theme name to your whole generated documentation.
         :type theme_name: str
 
-        :param interactive: Gets the interactive mode.
+        :param interactive: Deprecated, has no effect (the live output is no longer removed before building).
         :type interactive: int
+
+        :param update: Rebuilds the given projects only, into the existing bundle.
+        :type update: bool
         """
         self._helper = None
         self._api_helper = None
@@ -154,6 +169,11 @@ class ProjectManager(IManager):
         self._projects_collection = []
         self._ranked_projects = []
         self._garbage = []
+        self._conf_dir = None
+        self._cache_lock = None
+        self._staging = None
+        self._stages = []
+        self._manifest = Types.OrderedDict()
 
         self._list_projects = list_projects
         self._conf_file = conf_file or settings.DEFAULT_CONFIG
@@ -197,6 +217,7 @@ class ProjectManager(IManager):
         self._output_format = output_format
         self._theme_name = theme_name
         self._interactive = interactive
+        self._update = update
 
         if not list_projects:
             projects_count = len(self._projects_ids)
@@ -246,6 +267,63 @@ class ProjectManager(IManager):
             )
         return self._ranked_projects
 
+    @property
+    def bundle_projects(self):
+        """
+        Sorts all projects of the bundle based on their rank attribute,
+        the ones not rebuilt (`--update` mode) being restored from the bundle manifest
+
+        :rtype: list
+        :return: The ranked projects list (project instances & manifest records)
+        """
+        built = set(p.id for p in self.ranked_projects)
+        records = [record for uid, record in self._manifest.items() if uid not in built]
+        if not records:
+            return self.ranked_projects
+        return sorted(self.ranked_projects + records, key=lambda item: item.rank)
+
+    @property
+    def is_update(self):
+        """
+        Is the instance rebuilding some projects into an existing bundle ?
+
+        :rtype: bool
+        :return: True if the Current instance runs in update mode
+        """
+        return bool(self._update)
+
+    @property
+    def manifest_filename(self):
+        """
+        The bundle manifest path (absolute path)
+
+        :rtype: str or unicode
+        :return: The bundle manifest path
+        """
+        return self.helper.absjoin(self.output_dir, settings.MANIFEST_FILENAME)
+
+    @property
+    def menus_digest(self):
+        """
+        The digest of all the bundle menus (identifies their client-side cached copies)
+
+        :rtype: str
+        :return: The menus digest
+        """
+        digests = dict((uid, record.get('menu_digest', '')) for uid, record in self._manifest.items())
+        digests.update(self._builder.menus_digests)
+        return SphinxBuilder.combine_digests(digests)
+
+    @property
+    def stages(self):
+        """
+        Holds the post-build stages, run on the staging output before it is published
+
+        :rtype: list
+        :return: The stage instances (IStage sub-classes)
+        """
+        return self._stages
+
     @property
     def extensions_manager(self):
         """
@@ -260,11 +338,51 @@ class ProjectManager(IManager):
         """
         The global output path (absolute path)
 
+        .. note:: While building, the staging directory (see :meth:`_stage`)
+
+        :rtype: str or unicode
+        :return: A valid output path
+        """
+        return self._staging or self._output
+
+    @property
+    def live_output_dir(self):
+        """
+        The published output path (absolute path), namely `OUTPUT/<version>`
+
         :rtype: str or unicode
         :return: A valid output path
         """
         return self._output
 
+    @property
+    def snapshots_dir(self):
+        """
+        The directory holding the published snapshots & the staging ones (absolute path)
+
+        :rtype: str or unicode
+        :return: A valid snapshots path
+        """
+        return self.helper.absjoin(self._output, '..', settings.SNAPSHOTS_DIRNAME)
+
+    @property
+    def conf_dir(self):
+        """
+        The generated Sphinx configurations directory (absolute path)
+
+        .. note:: Created once per build under the scratch root (see ``settings.DOCTOOL_CONF_DIR``)
+                  and removed at the end of the build, even a failed one,
+                  concurrent builds of the same sources never sharing it.
+
+        :rtype: str or unicode
+        :return: A valid configuration directory path
+        """
+        if self._conf_dir is None:
+            self.helper.createdirs(settings.DOCTOOL_CONF_DIR)
+            self._conf_dir = tempfile.mkdtemp(prefix='build-', dir=settings.DOCTOOL_CONF_DIR)
+            self._garbage.append(self._conf_dir)
+        return self._conf_dir
+
     @property
     def projects_from_build_info(self):
         """
@@ -368,6 +486,9 @@ class ProjectManager(IManager):
         context = self.global_conf.copy()
         context.update({
             'VERSION': self.version,
+            # Changes along with the project menus only (their client-side cached copies get invalidated)
+            'BUILD_ID': self.menus_digest if self._builder else '',
+            'MENU_FILENAME': settings.MENU_FILENAME,
             'master_title': self.master_title_slug
         })
         context.update(options)
@@ -424,29 +545,44 @@ class ProjectManager(IManager):
         template_html = settings_template.render(self.data_context_builder())
         self.helper.write_file(settings_filename, template_html, mode='w', override=True)
 
+    @property
+    def versions_manifest(self):
+        """
+        Property returning the versions manifest of the output
+        (retention policy from the `VERSIONS_PER_MINOR` & `VERSIONS_MAX_SIZE` global configuration)
+
+        :return: The versions manifest
+        :rtype: VersionsManifest
+        """
+        template_mgr = self._builder.template_mgr
+        # Megabytes
+        max_size = float(self.global_conf.get('VERSIONS_MAX_SIZE', 0)) * 1024 * 1024
+        return VersionsManifest(self.helper.absjoin(self.live_output_dir, '..'),
+                                template=template_mgr.template_by_name('config/doctool-versions.js'),
+                                per_minor=self.global_conf.get('VERSIONS_PER_MINOR', 0),
+                                max_size=max_size)
+
     def write_js_versions_scripts(self):
         """
-        Method in charge of writing JS Settings scripts to project directory
+        Method in charge of registering the published version into the versions manifest,
+        the JS Versions script being written from it
+
+        :return: The versions manifest
+        :rtype: VersionsManifest
         """
         logger.debug('Writing JS Versions scripts...')
 
-        doctool_versions = 'doctool-versions.js'
-        template_mgr = self._builder.template_mgr
-        versions_filename = self.helper.absjoin(self.output_dir, '..', doctool_versions)
-        versions_template = template_mgr.template_by_name('config/%s' % doctool_versions)
-        template_html = versions_template.render(
-            available_versions=sorted([
-                version for version in os.listdir(self.helper.absjoin(self.output_dir, '..'))
-                if version not in (doctool_versions,)
-            ], reverse=True)
-        )
-        self.helper.write_file(versions_filename, template_html, mode='w', override=True)
+        manifest = self.versions_manifest
+        pruned = manifest.register(self.version, self.live_output_dir)
+        logger.info('Versions: %s%s', ', '.join(manifest.versions),
+                    ' (pruned: {0})'.format(', '.join(pruned)) if pruned else '')
+        return manifest
 
     def write_js_scripts(self):
         """
         Template method in charge of grouping all JS writing operations
+        (the JS Versions script is written once the version is published)
         """
-        self.write_js_versions_scripts()
         self.write_js_settings_scripts()
 
     def _write_global_index(self):
@@ -464,17 +600,60 @@ class ProjectManager(IManager):
         index_filename = self.helper.absjoin(self.output_dir, 'index.html')
         index_template = template_mgr.template_by_name('config/index_wrapper.html')
         template_html = index_template.render(
-            self.data_context_builder(redirect=self.ranked_projects[0].first_link)
+            self.data_context_builder(redirect=self.bundle_projects[0].first_link)
         )
         self.helper.write_file(index_filename, template_html, mode='w', override=True)
 
+    def _write_search_index(self, projects):
+        """
+        Merges the search index of every searchable project (scope) into the cross-project one,
+        sharded by term prefix beyond the `SEARCH_SHARD_THRESHOLD` size (global configuration, bytes).
+        The SQLite search database is written as well if `SEARCH_DATABASE` is enabled.
+
+        :param projects: The projects (bundle records), in the search page order
+        :type projects: list
+
+        :return: The merged search index
+        :rtype: SearchIndex
+        """
+        scopes = [(project, scope) for project in projects if project.search for scope in project.search_scopes]
+        indexes = SearchIndex.read_all([self.helper.absjoin(self.output_dir, scope, 'searchindex.js')
+                                        for _, scope in scopes])
+
+        search_index = SearchIndex()
+        for (project, scope), index in zip(scopes, indexes):
+            if index is not None:
+                search_index.add(project, scope, index)
+
+        filename = self.helper.absjoin(self.output_dir, settings.SEARCH_INDEX_FILENAME)
+        shards_dir = self.helper.absjoin(self.output_dir, settings.SEARCH_SHARDS_DIRNAME)
+        threshold = int(self.global_conf.get('SEARCH_SHARD_THRESHOLD', settings.DEFAULT_SEARCH_SHARD_THRESHOLD))
+        if search_index.size > threshold:
+            count = search_index.write_sharded(filename, shards_dir, bloom=self.global_conf.get('SEARCH_BLOOM', True))
+            logger.info('Search index: %d document(s) of %d project(s) merged into %d shard(s)',
+                        len(search_index.docs), len(search_index.projects), count)
+        else:
+            # Former shards (`--update` mode) are outdated
+            if os.path.isdir(shards_dir):
+                self.helper.rmtree(shards_dir)
+            search_index.write(filename)
+            logger.info('Search index: %d document(s) of %d project(s) merged',
+                        len(search_index.docs), len(search_index.projects))
+
+        if self.global_conf.get('SEARCH_DATABASE'):
+            # Queried by the search server (`doctool search-server`)
+            database = SearchDatabase(self.helper.absjoin(self.output_dir, settings.SEARCH_DATABASE_FILENAME))
+            logger.info('Search database: %d page(s) indexed', database.build(search_index, self.output_dir))
+        return search_index
+
     def _write_global_search(self):
         """
         Builds a Global search files based on all projects
+        (a single search index merged from the projects ones)
         """
         logger.debug('Wrapping global search files...')
         doc_projects, api_doc_projects, home_project = [], [], None
-        for p in self.ranked_projects:
+        for p in self.bundle_projects:
             if p.home:
                 home_project = p
             elif p.is_api:
@@ -482,34 +661,229 @@ class ProjectManager(IManager):
             else:
                 doc_projects.append(p)
 
-        # Generate the search file only if at least 2 searchable projects are present
-        if len([p.search for p in doc_projects + api_doc_projects]) < 2:
+        # Generate the search file only if at least 2 searchable scopes are present
+        # (A sharded project holds one search scope per shard, see the `global_search` template context as well)
+        if sum(len(p.search_scopes) for p in doc_projects + api_doc_projects if p.search) < 2:
             return
 
-        static = self.helper.absjoin(self.output_dir, self.ranked_projects[0].id, '_static')
+        static = self.helper.absjoin(self.output_dir, self.bundle_projects[0].id, '_static')
         if os.path.isdir(static):
             target = self.helper.absjoin(self.output_dir, '_static')
             self.helper.cptree(static, target)
-            self.helper.cptree(static, target)
+
+        self._write_search_index(doc_projects + api_doc_projects)
 
         template_mgr = self._builder.template_mgr
         index_filename = self.helper.absjoin(self.output_dir, 'search.html')
         index_template = template_mgr.template_by_name('config/full_search_wrapper.html')
 
         current_project_name = ''
-        if len(self.ranked_projects) == 1:
-            current_project_name = self.ranked_projects[0].name
+        if len(self.bundle_projects) == 1:
+            current_project_name = self.bundle_projects[0].name
 
         template_html = index_template.render(
             self.data_context_builder(
                 home_project=home_project,
                 doc_projects=doc_projects,
                 api_doc_projects=api_doc_projects,
-                current_project_name=current_project_name
+                current_project_name=current_project_name,
+                search_index=settings.SEARCH_INDEX_FILENAME
             )
         )
         self.helper.write_file(index_filename, template_html, mode='w', override=True)
 
+    def _project_record(self, project):
+        """
+        Exports a built project as a bundle manifest record
+
+        :param project: A project instance (IProject sub-class)
+        :type project: IProject sub-class
+
+        :rtype: Types.AttributeDict
+        :return: The project record
+        """
+        return Types.AttributeDict(
+            id=project.id,
+            name=project.name,
+            rank=project.rank,
+            home=project.home,
+            is_api=project.is_api,
+            nav=project.nav,
+            icon=project.icon,
+            slug=project.slug,
+            search=project.search,
+            search_scopes=project.search_scopes,
+            layout=project.layout,
+            menu=project.menu,
+            first_link=project.first_link,
+            src_dirname=project.src_dirname,
+            menu_digest=self._builder.menus_digests.get(project.id, '')
+        )
+
+    def _load_manifest(self):
+        """
+        Loads the bundle manifest, the projects not rebuilt (`--update` mode) being restored from it
+        """
+        manifest_filename = self.helper.absjoin(self.live_output_dir, settings.MANIFEST_FILENAME)
+        if not os.path.isfile(manifest_filename):
+            logger.warning('No bundle manifest found into %s, the bundle only holds the built project(s)',
+                           self.live_output_dir)
+            return
+
+        try:
+            with open(manifest_filename, 'r', encoding='utf8') as handle:
+                manifest = json.load(handle)
+            records = dict((record['id'], Types.AttributeDict(record)) for record in manifest.get('projects', []))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            # Truncated or corrupt manifest (e.g. interrupted copy)
+            logger.warning('Bundle manifest %s could not be loaded (%s), the bundle only holds the built project(s)',
+                           manifest_filename, exc)
+            return
+        self._manifest.update(records)
+
+    def _write_manifest(self):
+        """
+        Writes the bundle manifest, the built projects being merged into the restored ones
+        """
+        built = dict((p.id, self._project_record(p)) for p in self.ranked_projects)
+        records = [built.get(p.id) or p for p in self.bundle_projects]
+        self.helper.write_file(self.manifest_filename,
+                               json.dumps(dict(version=self.version, projects=records), indent=2),
+                               mode='w', override=True)
+
+    def _snapshot_dirname(self, suffix=''):
+        """
+        Makes a new snapshot directory path (into the snapshots directory)
+
+        :param suffix: An optional suffix (e.g. `.staging` for a snapshot being built)
+        :type suffix: str
+
+        :rtype: str
+        :return: The snapshot directory path
+        """
+        name = '{0}-{1}-{2}{3}'.format(self.version, time.strftime('%Y%m%d%H%M%S'), os.getpid(), suffix)
+        return self.helper.absjoin(self.snapshots_dir, name)
+
+    def _stage(self):
+        """
+        Creates the staging directory the bundle is built into, the live one being served meanwhile
+        """
+        self._staging = self._snapshot_dirname('.staging')
+        self.helper.createdirs(self._staging)
+        logger.info('Building into the staging directory %s', self._staging)
+
+    def _seed_staging(self):
+        """
+        Copies the live outputs to be reused into the staging directory
+        (files metadata preserved, Sphinx then only rewrites the outdated ones)
+
+            * `--update` mode: the whole live bundle, the outputs of the other projects (kept as is)
+              being hard linked rather than copied
+            * otherwise: the outputs of the projects being built
+        """
+        live = self.live_output_dir
+        if not os.path.isdir(live):
+            return
+        if self.is_update:
+            built = set(p.id for p in self.ranked_projects)
+            kept = set(self.helper.absjoin(live, p.id) for p in self.bundle_projects if p.id not in built)
+            # Sphinx & the bundle root pages rewrite their files in place, the stages replace them
+            self.helper.cptree(live, self._staging, symlinks=True,
+                               ignore=lambda src, names: [n for n in names if os.path.join(src, n) in kept])
+            for path in kept:
+                self.helper.cptree(path, self.helper.absjoin(self._staging, os.path.relpath(path, live)),
+                                   symlinks=True, copy_function=self.helper.link_file)
+            return
+        for project in self.ranked_projects:
+            self.helper.cptree(self.helper.absjoin(live, project.id),
+                               self.helper.absjoin(self._staging, project.id), symlinks=True)
+
+    def _publish(self):
+        """
+        Publishes the staging directory as a snapshot, `OUTPUT/<version>` being atomically
+        flipped to it (a symbolic link replaced by a rename)
+        """
+        live = self.live_output_dir
+        snapshot = self._snapshot_dirname()
+        os.rename(self._staging, snapshot)
+        self._staging = None
+
+        if os.path.isdir(live) and not os.path.islink(live):
+            # A former output (real directory) is kept as a snapshot as well
+            os.rename(live, self._snapshot_dirname('.previous'))
+
+        link = self.helper.absjoin(live, '..', '.{0}.{1}.link'.format(self.version, os.getpid()))
+        try:
+            # Relative, the whole output location can be moved
+            os.symlink(os.path.relpath(snapshot, os.path.dirname(live)), link, target_is_directory=True)
+            os.replace(link, live)
+        except (OSError, NotImplementedError) as exc:
+            # No symbolic link support, the snapshot directory is moved into place instead
+            logger.warning('Symbolic link to %s failed (%s), moving it into place', snapshot, exc)
+            self.helper.remove(link)
+            os.rename(snapshot, live)
+
+        logger.info('Published %s', os.path.realpath(live))
+        self._prune_snapshots()
+
+    def _prune_snapshots(self):
+        """
+        Removes the oldest snapshots of the version,
+        the `SNAPSHOTS` ones (global configuration) being kept, the published one included
+        """
+        keep = max(int(self.global_conf.get('SNAPSHOTS', settings.DEFAULT_SNAPSHOTS)), 1)
+        current = os.path.realpath(self.live_output_dir)
+        # The other versions snapshots (e.g. `1.0-beta-...` for `1.0`) & the ones being built
+        # by a concurrent build (`.staging`) are left alone
+        pattern = re.compile(r'^{0}-\d{{14}}-\d+(\.previous)?$'.format(re.escape(self.version)))
+
+        snapshots = []
+        if os.path.isdir(self.snapshots_dir):
+            for name in os.listdir(self.snapshots_dir):
+                path = self.helper.absjoin(self.snapshots_dir, name)
+                if pattern.match(name) and path != current:
+                    snapshots.append(path)
+
+        # Snapshots are named after their build time, the newest first
+        snapshots.sort(reverse=True)
+        for path in snapshots[keep - 1:]:
+            logger.info('Removing the snapshot %s', path)
+            self.helper.rmtree(path)
+
+    def _discard_staging(self):
+        """
+        Removes the staging directory (failed build), the live output being left untouched
+        """
+        if self._staging:
+            logger.error('The build failed, %s is left untouched', self.live_output_dir)
+            self.helper.rmtree(self._staging)
+            self._staging = None
+
+    def lock_cache(self):
+        """
+        Holds the persistent cache lock of the version until the build is over,
+        concurrent builds of the same version (e.g. watch & CI) not overwriting
+        each other's API sources & Sphinx environments
+        """
+        if self._cache_lock is None:
+            lock = FileLock(self.helper.absjoin(settings.DOCTOOL_CACHE_DIR, 'locks', '{0}.lock'.format(self.version)))
+            self._cache_lock = lock.__enter__()
+
+    def _release_cache_lock(self):
+        """
+        Releases the persistent cache lock, if held
+        """
+        if self._cache_lock is not None:
+            self._cache_lock.__exit__(None, None, None)
+            self._cache_lock = None
+
+    def _remove_garbage(self):
+        """
+        Removes the temporary files & directories of the build (the generated configurations, ...)
+        """
+        while self._garbage:
+            self.helper.remove(self._garbage.pop())
+
     def _initial_report(self):
         """
         Prints Initial Doctool state.
@@ -523,15 +897,15 @@ class ProjectManager(IManager):
 
         logger.info(self.__initial_report.format(this=self,
                                                  mode='SIMPLE' if self.is_simple else 'MULTIPLE',
-                                                 ranked_projects=ranked_projects,
-                                                 interactive='Yes' if self._interactive else 'No'))
+                                                 update=' (update)' if self.is_update else '',
+                                                 ranked_projects=ranked_projects))
 
     def _print_report(self):
         """
         Prints a User-Friendly Execution Report at the end of the process
         """
-        data = (self.output_dir,
-                self._helper.absjoin(self.output_dir, 'index.html'))
+        data = (self.live_output_dir,
+                self._helper.absjoin(self.live_output_dir, 'index.html'))
         logger.info(self.__final_report.format(*data))
 
     def setup(self):
@@ -552,21 +926,26 @@ class ProjectManager(IManager):
 
         self._theme = self._theme_manager.get_theme(self._theme_name or self.global_conf.THEME)
 
-        output_dir = self.output_dir
-        if os.path.isdir(output_dir):
-            remove = True
-            if self._interactive:
-                user_response = input('The Destination folder : {0} already exists ! \n'
-                                      'Do you wanna remove it ? (Y/n)'.format(output_dir))
-                if user_response not in ('Yes', 'yes', 'y'):
-                    remove = False
-            if remove:
-                if self.helper.rmtree(output_dir):
-                    logger.info('Folder ({0}) successfully removed!'.format(output_dir))
-                else:
-                    logger.exception('Error while removing directory : {0} !'.format(output_dir))
-
-        self.helper.createdirs(output_dir)
+        # The live output is served until the staging one is published
+        self._stage()
+
+        self._stages = []
+        if self.global_conf.get('OPTIMIZE_IMAGES', True):
+            self._stages.append(ImageOptimizer(self))
+        minify, fingerprint = self.global_conf.get('MINIFY', True), self.global_conf.get('FINGERPRINT', True)
+        if minify or fingerprint:
+            # Sidecars are written out of the minified & renamed outputs
+            self._stages.append(Fingerprint(self, minify=minify, fingerprint=fingerprint))
+        if self.global_conf.get('PRECOMPRESS', True):
+            # Sidecars of the static assets are shared through the store as well
+            self._stages.append(Precompress(self))
+        self._stages.append(StaticStore(self))
+        for stage in self._stages:
+            stage.setup()
+
+        if self.is_update:
+            # The other projects outputs are kept as is
+            self._load_manifest()
 
     def build(self):
         """
@@ -592,6 +971,7 @@ class ProjectManager(IManager):
             project_conf = ProjectHelper.load_from_file(project_conf_hint)
             _ = self._create_project(project_conf, CodeProject if project_conf.get('api') else RSTProject)
 
+        self._seed_staging()
         self._initial_report()
         logger.info('Generating Documentation (this operation may take a while) ...')
         return self._builder.build(self.ranked_projects)
@@ -600,13 +980,20 @@ class ProjectManager(IManager):
     def teardown(self):
         """
         * Implements a way to aggregate all generated Projects if the Mode is MULTIPLE
+        * Runs the post-build stages & publishes the output
         * Cleans all remaining temporary file(s)
         """
         if self.is_simple or self.is_multiple:
             self._write_global_index()
+        self._write_manifest()
+        for stage in self._stages:
+            stage.build()
+        self._publish()
+        self.write_js_versions_scripts()
+        for stage in self._stages:
+            stage.teardown()
 
-        for item in self._garbage:
-            self.helper.remove(item)
+        self._remove_garbage()
 
         self._print_report()
 
@@ -631,9 +1018,19 @@ class ProjectManager(IManager):
                                                                                 index + 1)
             logger.info(projects_list)
         else:
-            self.setup()
-            if self.build() == IBuilder.Status.SUCCESS:
-                self.teardown()
+            try:
+                self.setup()
+                if self.build() == IBuilder.Status.SUCCESS:
+                    self.teardown()
+                else:
+                    self._discard_staging()
+            except BaseException:
+                # Unknown project, Sphinx or stage error: the live output is left untouched
+                self._discard_staging()
+                raise
+            finally:
+                self._remove_garbage()
+                self._release_cache_lock()
 
 
 class TemplateManager(object):
@@ -30,10 +30,12 @@ SOFTWARE.
 """
 import re
 import os
-import time
+import json
+import hashlib
 import logging
-import tempfile
 
+from doctool import settings
+from doctool.analysis import SourceAnalyzer
 from doctool.helpers import Types
 from doctool.helpers import ProjectHelper
 
@@ -69,15 +71,22 @@ class RSTProject(PartialProject):
 
     def build(self):
         """
-        Method building the doc tree
+        Method getting the Project's first link (pointed to by the projects built before it)
+
+        .. note:: The navigation exported by the previous build (seeded into the staging directory) is reused,
+                  the index tree being parsed by the first build only. Both are replaced by the exact navigation
+                  once Sphinx ran (see :meth:`load_nav`).
         """
-        self.build_toctree(self.src_dirname)
+        if not self.load_nav():
+            self.build_toctree(self.src_dirname)
 
     def teardown(self):
         """
         Cleaning all what need to be cleaned
+
+        .. note:: The configuration is written out of the sources (see ``conf_dirname``),
+                  its directory being removed by the manager once the build is over.
         """
-        self.manager.garbage.append(self.conf_filename)
 
 
 class CodeProject(RSTProject):
@@ -86,6 +95,7 @@ class CodeProject(RSTProject):
     """
 
     __INIT__ = '__init__.py'
+    SOURCES_BUNDLE = 'doctool_sources.json'
     EXCLUDED_MODULES_DEFAULT = {
         '^test.*',
         '^build.*'
@@ -173,8 +183,13 @@ class CodeProject(RSTProject):
         self._current_package = None
         self.indices_and_tables = False
         self._output_dir = ""
-        self._api_toc = []
-        self._api_toctree = []
+        # Packages & modules found while scanning, along with their stub title
+        self._api_tree = Types.PackageTrie()
+        # The generated ReSt stubs are kept in memory (docname -> text)
+        self._sources = Types.OrderedDict()
+        # The modules each stub documents, to compute its autodoc cache key
+        self._source_modules = {}
+        self._analyzer = SourceAnalyzer()
 
         self._excluded_modules = CodeProject.EXCLUDED_MODULES_DEFAULT.copy()
         self._notoc = self.configuration.get('notoc', False)
@@ -186,21 +201,56 @@ class CodeProject(RSTProject):
         self._filtered_packages = self.configuration.get('filtered_packages', {})
         self._dev_mode_src_root = self.configuration.get('dev_mode_src_root', "")
 
+        # Sharding splits the API project into several Sphinx sub-projects,
+        # either one per top-level package (`shard_by`) or by a target modules count (`shard_size`)
+        self._shards = []
+        self._shard_by = self.configuration.get('shard_by', "")
+        self._shard_size = self.configuration.get('shard_size', 0)
+        self._shard_workers = self.configuration.get('shard_workers', 0) or os.cpu_count() or 1
+
+    @property
+    def api_tree(self):
+        """
+        Holds the API project analysis package trie
+
+        :rtype: Types.PackageTrie
+        :return: The API project analysis package trie
+        """
+        return self._api_tree
+
     @property
-    def api_toctree(self):
+    def shards(self):
         """
-        Holds the API project analysis sorted toctree
+        Holds the API project's shards (sub-projects built in parallel), if any
 
         :rtype: list
-        :return: The API project analysis sorted toctree
+        :return: The list of CodeProjectShard instances
         """
-        if not self._api_toctree and self._api_toc:
-            self._api_toc.sort()
-            self._api_toctree = []
-            for name in self._api_toc:
-                self._api_toctree.append(name.replace('.', '/'))
+        return self._shards
 
-        return self._api_toctree
+    @property
+    def shard_workers(self):
+        """
+        Holds the maximum number of shards to be built in parallel
+
+        :rtype: int
+        :return: The maximum number of parallel shard builds
+        """
+        return self._shard_workers
+
+    @property
+    def search_scopes(self):
+        """
+        Override
+
+        A sharded project is searched through all its shards
+
+        :rtype: list
+        :return: The search scopes (project's UIDs)
+        """
+        if self._shards:
+            return [shard.id for shard in self._shards]
+        return super(CodeProject, self).search_scopes
 
     @property
     def notoc(self):
@@ -229,13 +279,59 @@ class CodeProject(RSTProject):
         """
         Holds the API project's ReSt output directory where all API analysis writes files
 
-        .. note:: This directory is created in the system temporary folder via :mod:`tempfile`.
+        .. note:: This directory is created in the persistent cache folder (see ``settings.DOCTOOL_CACHE_DIR``).
 
         :rtype: str or unicode
         :return: The ReSt output directory
         """
         return self._output_dir
 
+    @property
+    def sources(self):
+        """
+        Holds the API project's in-memory ReSt sources
+
+        :rtype: Types.OrderedDict
+        :return: The generated sources (docname -> text)
+        """
+        return self._sources
+
+    @property
+    def cache_key(self):
+        """
+        Holds the key identifying the project into the persistent cache
+
+        .. note:: Scoped by version, the builds of several versions of the same sources not sharing
+                  their API sources & Sphinx environment (see ``ProjectManager.lock_cache``).
+
+        :rtype: str
+        :return: The cache key (project ID, sources location & version)
+        """
+        location = '{0}\n{1}'.format(self.src_dirname, self.manager.version)
+        location = hashlib.sha1(location.encode('utf8')).hexdigest()[:8]
+        return '{0}-{1}'.format(self.id, location)
+
+    @property
+    def doctree_dir(self):
+        """
+        Holds the persistent Sphinx doctrees directory,
+        the autodoc results of unchanged modules being reused from one build to another
+
+        :rtype: str
+        :return: The doctrees directory
+        """
+        return self.helper.absjoin(settings.DOCTOOL_CACHE_DIR, 'doctrees', self.cache_key)
+
+    @property
+    def sources_bundle(self):
+        """
+        Holds the path of the single file handing the in-memory sources over to Sphinx
+
+        :rtype: str
+        :return: The sources bundle path
+        """
+        return self.helper.absjoin(self.output_dir, self.SOURCES_BUNDLE)
+
     @property
     def data(self):
         """
@@ -247,6 +343,9 @@ class CodeProject(RSTProject):
         data = super(CodeProject, self).data
         data.source_dir = self.output_dir
         data.dirs2append = [self.helper.absjoin(self.src_dirname, '..')]
+        if self._sources:
+            data.virtual_sources = self.sources_bundle
+            data.doctree_dir = self.doctree_dir
         return data
 
     @property
@@ -269,28 +368,47 @@ class CodeProject(RSTProject):
         :param source_dir: The source directory
         """
         self._toctree = []
-        toctree = Types.TOCList(self.api_toctree,
-                                is_api=True,
+        toctree = Types.TOCList(is_api=True,
                                 maxdepth=self.maxdepth,
                                 src_dirname=source_dir,
                                 suffix=self.id,
                                 master_name=self.master_doc,
-                                joined_stripped=True)
+                                joined_stripped=True,
+                                tree=self._api_tree)
         self._toctree = toctree.build().items
         self._first_link = toctree.first_link
 
     def write_file(self, name, text, mode='wb'):
         """
-        Write the output file for module/package <name>.
+        Write the output for module/package <name> into the in-memory sources.
+
+        .. note:: Nothing reaches the disk until :meth:`write_sources` bundles them all.
 
-        :param mode: open mode
+        :param mode: open mode (kept for compatibility)
         :param name: Package or Module name.
         :param text: Content to be written.
         """
         if not name or self.dryrun:
             return
-        filename = ProjectHelper.absjoin(self._output_dir, "{0}.{1}".format(name, self.suffix))
-        ProjectHelper.write_file(filename, text, mode, self.override)
+        if self.override or name not in self._sources:
+            self._sources[name] = text
+        else:
+            logger.debug('Source {0} already exists, skipping.'.format(name))
+
+    def write_sources(self):
+        """
+        Hands the in-memory sources over to Sphinx as a single JSON bundle
+
+        .. seealso:: :mod:`doctool.extensions.virtual`
+        """
+        if not self._sources or self.dryrun:
+            return
+        keys = {
+            name: self._analyzer.combined_key(modules)
+            for name, modules in self._source_modules.items()
+        }
+        bundle = dict(sources=self._sources, keys=keys)
+        ProjectHelper.write_file(self.sources_bundle, json.dumps(bundle), mode='w', override=True)
 
     def format_directive(self, module, package=None):
         """
@@ -315,11 +433,15 @@ class CodeProject(RSTProject):
         :param package: Package name
         :param module: Module name
         """
-        text = self.format_heading(1, '{0} Module'.format(module))
+        title = '{0} Module'.format(module)
+        text = self.format_heading(1, title)
         text += self.format_heading(2, ':mod:`{0}` Module'.format(module))
         text += self.format_directive(module, package)
 
-        self.write_file(self.makename(package, module, writing=1, sub=self._dev_mode_src_root), text)
+        name = self.makename(package, module, writing=1, sub=self._dev_mode_src_root)
+        self.write_file(name, text)
+        self._api_tree.insert(name.strip(), title=title)
+        self._source_modules[name] = [self.makename(package, module, sub=self._dev_mode_src_root)]
 
     def include_module(self, module):
         """
@@ -387,7 +509,9 @@ class CodeProject(RSTProject):
         :param subs:
         """
         package = os.path.split(root)[-1]
-        text = self.format_heading(1, '{0} Package'.format(package))
+        title = '{0} Package'.format(package)
+        text = self.format_heading(1, title)
+        modules = []
         # add each package's module
         for py_file in py_files:
             if self.skip(os.path.join(root, py_file)) or (self._filtered_packages and
@@ -410,28 +534,21 @@ class CodeProject(RSTProject):
             text += self.format_heading(2, heading)
             text += self.format_directive(is_package and subroot or py_path, master_package)
             text += '\n'
-
-        # build a list of directories that are packages (contains an INIT file)
-        subs = [sub for sub in subs if os.path.isfile(os.path.join(root, sub, self.__INIT__))]
-
-        # if there are some package directories, add a TOC for theses subpackages
-        if subs:
-            # text += self.format_heading(2, 'Subpackages')
-            # text += '\n'
-            # text += '.. toctree::\n'
-            # text += '   :hidden:\n\n'
-            for sub in subs:
-
-                if self.is_excluded(sub) or not self.include_package(sub, master_package):
-                    continue
-                name = '{0}.{1}'.format(self.makename(master_package, subroot, writing=1,
-                                                      sub=self._dev_mode_src_root), sub)
-                # text += '   :mod:`{0}`\n'.format(name)
-                if name not in self._api_toc:
-                    self._api_toc.append(name)
-            # text += '\n'
-
-        self.write_file(self.makename(master_package, subroot, writing=1, sub=self._dev_mode_src_root), text, mode='w')
+            modules.append(self.makename(master_package, is_package and subroot or py_path,
+                                         sub=self._dev_mode_src_root))
+
+        # subpackages got registered into the API trie while being scanned (bottom-up walk)
+        name = self.makename(master_package, subroot, writing=1, sub=self._dev_mode_src_root)
+        node = self._api_tree.find(name.strip()) if name.strip() else None
+        subpackages = [child.docname for child in node.documented_children()] if node else []
+        if subpackages:
+            # hidden, the subpackages only show in the navigation
+            text += '.. toctree::\n   :hidden:\n\n'
+            text += ''.join('   {0}\n'.format(subpackage) for subpackage in subpackages)
+            text += '\n'
+        self.write_file(name, text, mode='w')
+        self._api_tree.insert(name.strip(), title=title)
+        self._source_modules[name] = modules
 
     def create_modules_toc_file(self, modules, name=None):
         """
@@ -486,6 +603,67 @@ class CodeProject(RSTProject):
                 return 1
         return 0
 
+    def in_shard(self, root):
+        """
+        Tells whether the given directory belongs to this project.
+
+        .. note:: A non-sharded project holds the whole source tree.
+
+        :param root: The directory path to be scanned
+        :type root: str
+
+        :rtype: bool
+        :return: Whether the directory is to be analysed by this project
+        """
+        return True
+
+    def top_level_packages(self):
+        """
+        Maps each top-level package of the source tree to its modules count
+
+        :rtype: Types.OrderedDict
+        :return: The modules count per top-level package name
+        """
+        packages = Types.OrderedDict()
+        for name in sorted(os.listdir(self.src_dirname)):
+            path = os.path.join(self.src_dirname, name)
+            if name[0] in ('.', '_') or not os.path.isfile(os.path.join(path, self.__INIT__)):
+                continue
+            if self.is_excluded(path):
+                continue
+            packages[name] = sum(
+                len([f for f in filenames if f.endswith('.py')])
+                for _, _, filenames in os.walk(path)
+            )
+        return packages
+
+    def plan_shards(self):
+        """
+        Groups the top-level packages into shards
+
+            * `shard_by` set to `package`: one shard per top-level package
+            * `shard_size` set to N: consecutive top-level packages are grouped
+              until a shard holds about N modules
+
+        :rtype: list
+        :return: A list of top-level package names list (one per shard)
+        """
+        packages = self.top_level_packages()
+        groups = []
+        if self._shard_size:
+            current, size = [], 0
+            for name, count in packages.items():
+                if current and size + count > self._shard_size:
+                    groups.append(current)
+                    current, size = [], 0
+                current.append(name)
+                size += count
+            if current:
+                groups.append(current)
+        elif self._shard_by == 'package':
+            groups = [[name] for name in packages]
+        return groups
+
     def load(self, configuration):
         """
         ** Override **
@@ -508,12 +686,25 @@ class CodeProject(RSTProject):
         """
         super(CodeProject, self).setup()
 
+        groups = self.plan_shards() if self._shard_by or self._shard_size else []
+        if len(groups) > 1:
+            self._shards = [
+                CodeProjectShard(self, packages, with_root=index == 0)
+                for index, packages in enumerate(groups)
+            ]
+            for shard in self._shards:
+                shard.setup()
+            return
+
         # use absolute path for root,
         # as relative paths like '../../foo' cause
         # 'if "/." in root ...' to filter out
         # *all* modules otherwise
 
-        self._output_dir = tempfile.mkdtemp(str(time.time()).replace('.', '_'), 'doctoolAPI')
+        # The output directory is kept across builds, so is the Sphinx environment relying on it
+        self.manager.lock_cache()
+        self._output_dir = self.helper.absjoin(settings.DOCTOOL_CACHE_DIR, 'sources', self.cache_key)
+        self.helper.createdirs(self._output_dir)
         pattern = re.compile(r'.*\.py$')
 
         # check if the base directory
@@ -534,6 +725,13 @@ class CodeProject(RSTProject):
                 # remove hidden ('.') and private ('_') directories
             subs = sorted([sub for sub in subs if sub[0] not in ['.', '_']])
 
+            # index every module, even the filtered out ones, as they might be imported
+            subroot = root[len(self.src_dirname):].lstrip(os.path.sep).replace(os.path.sep, '.')
+            for py_file in py_files:
+                module = subroot if py_file == self.__INIT__ else self.makename(subroot, os.path.splitext(py_file)[0])
+                self._analyzer.add(self.makename(package_name, module, sub=self._dev_mode_src_root),
+                                   os.path.join(root, py_file))
+
             # check if there are valid files to process
             if not py_files:
                 continue
@@ -541,6 +739,8 @@ class CodeProject(RSTProject):
                 continue
             if not self.include_package(root, package_name):
                 continue
+            if not self.in_shard(root):
+                continue
 
             if self.__INIT__ in py_files:
                 # we are in package ...
@@ -550,14 +750,11 @@ class CodeProject(RSTProject):
                         # ... with some module(s)
                         # ... with a not-to-be-skipped INIT file
                         not self.skip(os.path.join(root, self.__INIT__))):
-                    subroot = root[len(self.src_dirname):].lstrip(os.path.sep).replace(os.path.sep, '.')
-
-                    self.create_package_file(root, package_name, subroot, py_files, subs)
                     name = self.makename(package_name, subroot, writing=1, sub=self._dev_mode_src_root).strip()
 
-                    if name not in self._api_toc:
+                    if name not in self._api_tree:
                         toc.append(name)
-                        self._api_toc.append(name)
+                    self.create_package_file(root, package_name, subroot, py_files, subs)
 
             elif root == self.src_dirname:
                 # if we are at the root level,
@@ -566,12 +763,11 @@ class CodeProject(RSTProject):
                 for py_file in py_files:
                     if not self.skip(os.path.join(self.src_dirname, py_file)):
                         module = os.path.splitext(py_file)[0]
-                        self.create_module_file(package_name, module)
                         name = self.makename(package_name, module, writing=1, sub=self._dev_mode_src_root).strip()
 
-                        if name not in self._api_toc:
+                        if name not in self._api_tree:
                             toc.append(name)
-                            self._api_toc.append(name)
+                        self.create_module_file(package_name, module)
 
         # create the module's index
         if not self.notoc:
@@ -583,15 +779,104 @@ class CodeProject(RSTProject):
 
         Look for every file in the directory
         tree and create the corresponding ReST files.
+
+        .. note:: A sharded project stitches all its shards TOC trees into a single one.
         """
+        if self._shards:
+            for shard in self._shards:
+                shard.build()
+            self.stitch_shards()
+            return
         self.build_toctree(self._output_dir)
+        self.write_sources()
+
+    def stitch_shards(self):
+        """
+        Stitches all shards TOC trees into a single one
+
+        .. note:: Shards nodes IDs are derived from their own shard ID, hence unique into the stitched tree
+        """
+        self._toctree, self._first_link = [], ""
+        for shard in self._shards:
+            self._toctree.extend(shard.toctree or [])
+            self._first_link = self._first_link or shard.first_link
 
     def teardown(self):
         """
         Override
 
         Cleaning all what need to be cleaned
-            * The output directory
+
+        .. note:: The output directory is part of the persistent cache, it is kept.
         """
+        if self._shards:
+            for shard in self._shards:
+                shard.teardown()
+            return
         super(CodeProject, self).teardown()
-        self.manager.garbage.append(self._output_dir)
+
+
+class CodeProjectShard(CodeProject):
+    """
+    A shard of an API project.
+
+    It holds a subset of the top-level packages and is built as its own Sphinx sub-project,
+    its output lying under the parent project's output directory.
+    """
+
+    def __init__(self, parent, packages, with_root=False):
+        """
+        Constructor
+
+        :param parent: The sharded API project
+        :type parent: CodeProject
+
+        :param packages: The top-level package names held by this shard
+        :type packages: list
+
+        :param with_root: Whether the root-level modules belong to this shard
+        :type with_root: bool
+        """
+        super(CodeProjectShard, self).__init__(parent.manager, parent.configuration)
+        self._parent = parent
+        self._packages = set(packages)
+        self._with_root = with_root
+        self._shard_by, self._shard_size = "", 0
+
+        shard_name = packages[0] if len(packages) == 1 else '{0}-{1}'.format(packages[0], packages[-1])
+        self._uid = '{0}/{1}'.format(parent.id, shard_name)
+
+    @property
+    def parent(self):
+        """
+        Holds the sharded API project
+
+        :rtype: CodeProject
+        :return: The parent project
+        """
+        return self._parent
+
+    @property
+    def packages(self):
+        """
+        Holds the top-level package names of this shard
+
+        :rtype: set
+        :return: The top-level package names
+        """
+        return self._packages
+
+    def in_shard(self, root):
+        """
+        Override
+
+        :param root: The directory path to be scanned
+        :type root: str
+
+        :rtype: bool
+        :return: Whether the directory is to be analysed by this shard
+        """
+        relative = self.helper.normpath(root)[len(self.src_dirname):].strip('/')
+        if not relative:
+            return self._with_root
+        return relative.split('/')[0] in self._packages
@@ -30,8 +30,10 @@ SOFTWARE.
 """
 import os
 import abc
+import json
 import logging
 
+from doctool import errors
 from doctool import settings
 from doctool.helpers import Types
 from doctool.helpers import ProjectHelper
@@ -404,6 +406,17 @@ class PartialProject(IProject):
         """
         return self._first_link
 
+    @property
+    def search_scopes(self):
+        """
+        Holds the project's search scopes, namely the UIDs of the Sphinx outputs
+        holding a search index for this project
+
+        :return: the project's search scopes
+        :rtype: list
+        """
+        return [self.id]
+
     @property
     def manager(self):
         """
@@ -452,6 +465,7 @@ class PartialProject(IProject):
             master_doc='index',
             output_dir=self.helper.absjoin(self.manager.output_dir, self.id),
             source_dir=self.src_dirname,
+            conf_dir=self.conf_dirname,
             output_format=self._output_format,
             extra_paths=self.extra_paths,
             html_static_paths=self.html_static_paths,
@@ -459,6 +473,17 @@ class PartialProject(IProject):
             theme=self.theme
         )
 
+    @property
+    def conf_dirname(self):
+        """
+        Property holding the Configuration directory,
+        out of the project sources (see :attr:`doctool.interfaces.IManager.conf_dir`)
+
+        :return: The Configuration directory
+        :rtype: str or unicode
+        """
+        return self.helper.absjoin(self.manager.conf_dir, self.id)
+
     @property
     def conf_filename(self):
         """
@@ -468,12 +493,46 @@ class PartialProject(IProject):
         :return: The Configuration filename
         :rtype: str or unicode
         """
-        return self.helper.absjoin(self.src_dirname, 'conf.py')
+        return self.helper.absjoin(self.conf_dirname, 'conf.py')
+
+    @property
+    def nav_file(self):
+        """
+        Property holding the navigation file exported by the Sphinx run
+        (see :mod:`doctool.extensions.navigation`)
+
+        :return: The navigation file path
+        :rtype: str
+        """
+        return self.helper.absjoin(self.manager.output_dir, self.id, settings.NAV_FILENAME)
+
+    def load_nav(self):
+        """
+        Loads the navigation exported by the Sphinx run,
+        replacing the (pre-build) Toctree computed by :meth:`build_toctree`
+
+        :return: Whether the navigation was loaded
+        :rtype: bool
+        """
+        if not os.path.isfile(self.nav_file):
+            return False
+        try:
+            with open(self.nav_file, 'r', encoding='utf8') as handle:
+                nav = json.load(handle)
+        except (ValueError,) + errors.SysErrors as exc:
+            logger.warning('Navigation file {0} could not be loaded: {1}'.format(self.nav_file, exc))
+            return False
+
+        self._toctree, first_link = Types.TOCList.from_nav(nav, self.id)
+        self._first_link = first_link or self._first_link
+        return True
 
     def build_toctree(self, source_dir):
         """
         Builds the Project's Toctree according the context
 
+        .. note:: This pre-build Toctree is replaced by the exact one once Sphinx ran (see :meth:`load_nav`)
+
         :param source_dir: The source directory
         """
         self._toctree = []
@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Cross-project search index, merged from the Sphinx search index of each searchable scope
+
+Each scope (a project output, or a shard of it) holds its own `searchindex.js`, its documents being
+numbered from 0. They are merged into a single index (see :data:`doctool.settings.SEARCH_INDEX_FILENAME`),
+the documents being renumbered & qualified by their scope, the global search page running a single
+query engine against it (`doctool-search.js`) ::
+
+    var doctoolSearchIndex = {
+        "projects": [{"id": "user_doc", "name": "User Guide"}, {"id": "api_doc", "name": "API"}],
+        "docs": [[0, "user_doc/index.html", "Welcome"], [1, "api_doc/core/mypkg.html", "mypkg Package"]],
+        "terms": {"packag": [0, 1]},
+        "titleterms": {"mypkg": [1]},
+        "objects": [[1, "mypkg.core", "#module-mypkg.core", "Python module", 0]]
+    };
+
+Terms are the ones stemmed by Sphinx, the search page stemming the query words the same way (`language_data.js`).
+
+Beyond a size (`SEARCH_SHARD_THRESHOLD` global configuration), the index is sharded by term prefix
+(see :data:`doctool.settings.SEARCH_SHARDS_DIRNAME`), the search page only fetching the shards a query needs ::
+
+    OUTPUT/<version>/doctool-searchindex.js     dictionary: projects, shards (prefix => file, Bloom filter)
+    OUTPUT/<version>/_search/656e.json          postings (terms, title terms & objects) of the prefix `en`
+    OUTPUT/<version>/_search/docs-0.json        documents 0 to 999
+
+The Bloom filter of a shard holds its terms (their prefixes too, partial matches), a query word it rejects
+is known to match nothing without fetching the shard.
+
+.. note:: Sharded, a partial match is a prefix one (within the shard) & objects are looked up by
+          the prefix of one of their dotted names.
+"""
+import os
+import json
+import base64
+import logging
+from concurrent import futures
+
+from doctool import settings
+from doctool.helpers import ProjectHelper
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter(object):
+    """
+    Bloom filter of strings (UTF-8), double hashing over two FNV-1a 32 bits hashes
+    (mirrored by `doctool-search.js`)
+    """
+    # Seeds of both FNV-1a hashes
+    seeds = (2166136261, 2538058380)
+
+    def __init__(self, count, bits_per_entry=10, hashes=7):
+        """
+        Constructor
+
+        :param count: The expected number of entries
+        :type count: int
+
+        :param bits_per_entry: The number of bits per entry (10, ~1% of false positives)
+        :type bits_per_entry: int
+
+        :param hashes: The number of hashes per entry
+        :type hashes: int
+        """
+        self._size = max(64, ((count * bits_per_entry + 7) // 8) * 8)
+        self._hashes = hashes
+        self._bits = bytearray(self._size // 8)
+
+    @property
+    def size(self):
+        """
+        Property returning the number of bits
+
+        :return: The number of bits
+        :rtype: int
+        """
+        return self._size
+
+    @classmethod
+    def fnv1a(cls, data, seed):
+        """
+        FNV-1a 32 bits hash
+
+        :param data: The data to hash
+        :type data: bytes
+
+        :param seed: The offset basis
+        :type seed: int
+
+        :return: The hash
+        :rtype: int
+        """
+        value = seed
+        for byte in data:
+            value = ((value ^ byte) * 16777619) & 0xffffffff
+        return value
+
+    def positions(self, item):
+        """
+        Computes the bits positions of an item
+
+        :param item: The item
+        :type item: str
+
+        :return: The bits positions
+        :rtype: list
+        """
+        data = item.encode('utf8')
+        first = self.fnv1a(data, self.seeds[0])
+        second = self.fnv1a(data, self.seeds[1]) | 1
+        return [((first + index * second) & 0xffffffff) % self._size for index in range(self._hashes)]
+
+    def add(self, item):
+        """
+        Adds an item
+
+        :param item: The item
+        :type item: str
+        """
+        for position in self.positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+    def export(self):
+        """
+        Exports the filter (search page)
+
+        :return: The number of bits, of hashes & the bits (base64)
+        :rtype: dict
+        """
+        return {'bits': self._size, 'hashes': self._hashes, 'data': base64.b64encode(bytes(self._bits)).decode('ascii')}
+
+
+class SearchIndex(object):
+    """
+    Search index merging the Sphinx search indexes of several projects (scopes)
+    """
+    # Sphinx HTML pages suffix
+    suffix = '.html'
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._projects = []
+        self._docs = []
+        self._terms = {}
+        self._titleterms = {}
+        self._objects = []
+
+    @property
+    def projects(self):
+        """
+        Property returning the merged projects
+
+        :return: The projects (id, name), in the order they were merged
+        :rtype: list
+        """
+        return self._projects
+
+    @property
+    def docs(self):
+        """
+        Property returning the merged documents
+
+        :return: The documents ([project index, URL relative to the version, title])
+        :rtype: list
+        """
+        return self._docs
+
+    @property
+    def data(self):
+        """
+        Property returning the merged index
+
+        :return: The merged index
+        :rtype: dict
+        """
+        return {
+            'projects': self._projects,
+            'docs': self._docs,
+            'terms': self._terms,
+            'titleterms': self._titleterms,
+            'objects': self._objects,
+        }
+
+    @property
+    def size(self):
+        """
+        Property returning the size of the whole (not sharded) index
+
+        :return: The size (bytes)
+        :rtype: int
+        """
+        return len(json.dumps(self.data, separators=(',', ':')))
+
+    @classmethod
+    def read_all(cls, filenames, workers=None):
+        """
+        Reads Sphinx search indexes in parallel (processes pool, parsing being CPU bound)
+
+        :param filenames: The `searchindex.js` filenames
+        :type filenames: list
+
+        :param workers: The number of processes (defaults to the CPU count)
+        :type workers: int
+
+        :return: The search indexes (None for the missing or unreadable ones)
+        :rtype: list
+        """
+        if len(filenames) < 2:
+            return [cls.read(filename) for filename in filenames]
+        with futures.ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            return list(executor.map(cls.read, filenames))
+
+    @classmethod
+    def read(cls, filename):
+        """
+        Reads a Sphinx search index (`Search.setIndex({...})`)
+
+        :param filename: The `searchindex.js` filename
+        :type filename: str
+
+        :return: The search index, None if missing or unreadable
+        :rtype: dict
+        """
+        try:
+            with open(filename, 'r', encoding='utf8') as handle:
+                content = handle.read()
+            return json.loads(content[content.index('(') + 1:content.rindex(')')])
+        except (OSError, ValueError) as exc:
+            logger.warning('Search index %s could not be read: %s', filename, exc)
+            return None
+
+    @classmethod
+    def _postings(cls, value):
+        """
+        Normalizes the Sphinx postings of a term (a single document or a list)
+
+        :param value: The postings
+        :type value: int or list
+
+        :return: The postings
+        :rtype: list
+        """
+        return value if isinstance(value, list) else [value]
+
+    def _project_index(self, project):
+        """
+        Gets (or registers) the index of a project
+
+        :param project: The project (or its bundle manifest record)
+        :type project: IProject sub-class or Types.AttributeDict
+
+        :return: The project index
+        :rtype: int
+        """
+        for index, known in enumerate(self._projects):
+            if known['id'] == project.id:
+                return index
+        self._projects.append({'id': project.id, 'name': project.name})
+        return len(self._projects) - 1
+
+    def add(self, project, scope, index):
+        """
+        Merges the Sphinx search index of a project scope
+
+        :param project: The project (or its bundle manifest record)
+        :type project: IProject sub-class or Types.AttributeDict
+
+        :param scope: The scope (output path relative to the version, e.g. `api_doc/core`)
+        :type scope: str
+
+        :param index: The Sphinx search index (see :meth:`read`)
+        :type index: dict
+        """
+        project_index = self._project_index(project)
+        offset = len(self._docs)
+        titles = index.get('titles', [])
+        for doc, docname in enumerate(index.get('docnames', [])):
+            title = titles[doc] if doc < len(titles) else docname
+            self._docs.append([project_index, '{0}/{1}{2}'.format(scope, docname, self.suffix), title])
+
+        for key, terms in (('terms', self._terms), ('titleterms', self._titleterms)):
+            for term, postings in index.get(key, {}).items():
+                terms.setdefault(term, []).extend(offset + doc for doc in self._postings(postings))
+
+        objnames = index.get('objnames', {})
+        for prefix, objects in index.get('objects', {}).items():
+            for doc, objtype, priority, anchor, name in objects:
+                fullname = '{0}.{1}'.format(prefix, name) if prefix else name
+                domain, kind, label = objnames.get(str(objtype), ('', '', ''))
+                # Same anchors as the Sphinx search
+                if anchor == '':
+                    anchor = fullname
+                elif anchor == '-':
+                    anchor = '{0}-{1}'.format(kind, fullname)
+                self._objects.append([offset + doc, fullname, '#' + anchor, label, priority])
+
+    def write(self, filename):
+        """
+        Writes the merged index as a script (`doctoolSearchIndex` variable)
+
+        :param filename: The script filename
+        :type filename: str
+        """
+        content = 'var doctoolSearchIndex = {0};\n'.format(json.dumps(self.data, separators=(',', ':')))
+        ProjectHelper.replace_file(filename, content)
+
+    @classmethod
+    def shard_key(cls, word, prefix_length):
+        """
+        Gets the shard key of a term (or an object name, lowered)
+
+        :param word: The term
+        :type word: str
+
+        :param prefix_length: The shards prefix length
+        :type prefix_length: int
+
+        :return: The shard key
+        :rtype: str
+        """
+        return word[:prefix_length]
+
+    @classmethod
+    def shard_filename(cls, key):
+        """
+        Gets the filename of a shard (hexadecimal UTF-8 key, any character being allowed in a term)
+
+        :param key: The shard key
+        :type key: str
+
+        :return: The shard filename
+        :rtype: str
+        """
+        return '{0}.json'.format(key.encode('utf8').hex())
+
+    @classmethod
+    def object_names(cls, entry):
+        """
+        Gets the dotted names of an object (lowered), e.g. `mypkg`, `core` & `engine` for `mypkg.core.Engine`
+
+        :param entry: The object entry ([document, fullname, anchor, label, priority])
+        :type entry: list
+
+        :return: The object names
+        :rtype: list
+        """
+        return [name for name in entry[1].lower().split('.') if name]
+
+    @classmethod
+    def _bloom_entries(cls, word):
+        """
+        Gets the Bloom filter entries of a word: itself & its prefixes a partial match may look for
+
+        :param word: The term (or an object name, lowered)
+        :type word: str
+
+        :return: The entries
+        :rtype: set
+        """
+        return {word} | {word[:length] for length in range(3, len(word))}
+
+    def shards(self, prefix_length=settings.SEARCH_PREFIX_LENGTH):
+        """
+        Splits the postings by prefix
+
+        :param prefix_length: The shards prefix length
+        :type prefix_length: int
+
+        :return: The shards (prefix => terms, title terms & objects)
+        :rtype: dict
+        """
+        shards = {}
+        for name, terms in (('terms', self._terms), ('titleterms', self._titleterms)):
+            for term, postings in terms.items():
+                shard = shards.setdefault(self.shard_key(term, prefix_length),
+                                          {'terms': {}, 'titleterms': {}, 'objects': []})
+                shard[name][term] = postings
+        for entry in self._objects:
+            # An object is found by any of its dotted names (e.g. its package)
+            for key in {self.shard_key(name, prefix_length) for name in self.object_names(entry)}:
+                shard = shards.setdefault(key, {'terms': {}, 'titleterms': {}, 'objects': []})
+                shard['objects'].append(entry)
+        return shards
+
+    def write_sharded(self, filename, dirname, prefix_length=settings.SEARCH_PREFIX_LENGTH,
+                      bloom=True, workers=None):
+        """
+        Writes the index sharded by term prefix, the dictionary (`doctoolSearchIndex` variable) holding
+        the projects, the shards & their Bloom filter
+
+        :param filename: The dictionary script filename
+        :type filename: str
+
+        :param dirname: The shards directory (emptied first)
+        :type dirname: str
+
+        :param prefix_length: The shards prefix length
+        :type prefix_length: int
+
+        :param bloom: Whether a Bloom filter is written per shard
+        :type bloom: bool
+
+        :param workers: The number of writing threads (defaults to the CPU count)
+        :type workers: int
+
+        :return: The number of shards
+        :rtype: int
+        """
+        if os.path.isdir(dirname):
+            ProjectHelper.rmtree(dirname)
+        ProjectHelper.createdirs(dirname)
+
+        chunk = settings.SEARCH_DOCS_CHUNK
+        files = {}
+        dictionary = {
+            'projects': self._projects,
+            'prefix': prefix_length,
+            'path': os.path.basename(dirname),
+            'docs': {'count': len(self._docs), 'chunk': chunk},
+            'shards': {},
+        }
+        for index in range(0, len(self._docs), chunk):
+            files['docs-{0}.json'.format(index // chunk)] = self._docs[index:index + chunk]
+
+        for key, shard in self.shards(prefix_length).items():
+            entry = {'file': self.shard_filename(key)}
+            if bloom:
+                entries = set()
+                for term in list(shard['terms']) + list(shard['titleterms']):
+                    entries |= self._bloom_entries(term)
+                for obj in shard['objects']:
+                    for name in self.object_names(obj):
+                        entries |= self._bloom_entries(name)
+                bloom_filter = BloomFilter(len(entries))
+                for item in entries:
+                    bloom_filter.add(item)
+                entry['bloom'] = bloom_filter.export()
+            dictionary['shards'][key] = entry
+            files[entry['file']] = shard
+
+        def write(item):
+            name, content = item
+            with open(os.path.join(dirname, name), 'w', encoding='utf8') as handle:
+                json.dump(content, handle, separators=(',', ':'))
+
+        with futures.ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            list(executor.map(write, files.items()))
+
+        content = 'var doctoolSearchIndex = {0};\n'.format(json.dumps(dictionary, separators=(',', ':')))
+        ProjectHelper.replace_file(filename, content)
+        return len(dictionary['shards'])
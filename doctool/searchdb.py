@@ -0,0 +1,259 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: SQLite FTS5 search database of a version output, queried by the search server (see doctool.server)
+
+For very large bundles (hundreds of thousands of pages), the client-side search is no longer viable.
+Once enabled (`SEARCH_DATABASE` global configuration), every page of the cross-project search index
+(see :class:`doctool.search.SearchIndex`) is written into **OUTPUT/<version>/doctool-search.sqlite** ::
+
+    projects(id, name, position)
+    pages(title, body, anchors, project UNINDEXED, url UNINDEXED)     -- FTS5, porter stemming
+
+The body is the text of the page sections (docutils `<section>` elements), the anchors being their
+identifiers (sections, objects, ...), hence `Engine.run` matches its page.
+"""
+import os
+import re
+import sqlite3
+import logging
+from html.parser import HTMLParser
+from concurrent import futures
+
+logger = logging.getLogger(__name__)
+
+
+class PageTextParser(HTMLParser):
+    """
+    Collects the text & the anchors of the sections of a Sphinx HTML page
+    """
+    skipped = ('script', 'style')
+
+    def __init__(self):
+        super(PageTextParser, self).__init__(convert_charrefs=True)
+        self._sections = 0
+        self._skipped = 0
+        self._skipped_tags = []
+        self._text = []
+        self.anchors = []
+
+    @property
+    def text(self):
+        """
+        Property returning the collected text
+
+        :return: The text (whitespaces collapsed)
+        :rtype: str
+        """
+        return re.sub(r'\s+', ' ', ''.join(self._text)).strip()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'section':
+            self._sections += 1
+        elif tag in self.skipped or (tag == 'a' and 'headerlink' in (attrs.get('class') or '').split()):
+            # Permalinks (¶) are no text
+            self._skipped += 1
+            self._skipped_tags.append(tag)
+        if self._sections and attrs.get('id'):
+            self.anchors.append(attrs['id'])
+
+    def handle_endtag(self, tag):
+        if tag == 'section' and self._sections:
+            self._sections -= 1
+        elif self._skipped_tags and tag == self._skipped_tags[-1]:
+            self._skipped -= 1
+            self._skipped_tags.pop()
+        elif self._sections:
+            # Blocks are words boundaries
+            self._text.append(' ')
+
+    def handle_data(self, data):
+        if self._sections and not self._skipped:
+            self._text.append(data)
+
+
+class SearchDatabase(object):
+    """
+    SQLite FTS5 search database
+    """
+    # Columns weights (title, body, anchors) of the BM25 ranking
+    weights = (10.0, 1.0, 5.0)
+
+    def __init__(self, filename):
+        """
+        Constructor
+
+        :param filename: The database filename
+        :type filename: str
+        """
+        self._filename = filename
+
+    @property
+    def filename(self):
+        """
+        Property returning the database filename
+
+        :return: The database filename
+        :rtype: str
+        """
+        return self._filename
+
+    @classmethod
+    def page_text(cls, filename):
+        """
+        Extracts the text & the anchors of an HTML page
+
+        :param filename: The HTML page filename
+        :type filename: str
+
+        :return: The text & the anchors (space separated), None if the page could not be read
+        :rtype: tuple
+        """
+        parser = PageTextParser()
+        try:
+            with open(filename, 'r', encoding='utf8') as handle:
+                parser.feed(handle.read())
+        except (OSError, ValueError) as exc:
+            logger.warning('Page %s could not be indexed: %s', filename, exc)
+            return None
+        return parser.text, ' '.join(parser.anchors)
+
+    def build(self, search_index, output_dir, workers=None):
+        """
+        Writes the database of the search index pages (replacing the former one atomically),
+        the pages being parsed in parallel (processes pool)
+
+        :param search_index: The cross-project search index
+        :type search_index: doctool.search.SearchIndex
+
+        :param output_dir: The version output directory (the pages location)
+        :type output_dir: str
+
+        :param workers: The number of processes (defaults to the CPU count)
+        :type workers: int
+
+        :return: The number of indexed pages
+        :rtype: int
+        """
+        filenames = [os.path.join(output_dir, *url.split('/')) for _, url, _ in search_index.docs]
+        with futures.ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+            pages = list(executor.map(self.page_text, filenames, chunksize=64))
+
+        temporary = '{0}.{1}.tmp'.format(self._filename, os.getpid())
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        connection = sqlite3.connect(temporary)
+        try:
+            with connection:
+                connection.execute('CREATE TABLE projects(id TEXT PRIMARY KEY, name TEXT, position INTEGER)')
+                connection.execute('CREATE VIRTUAL TABLE pages USING fts5('
+                                   'title, body, anchors, project UNINDEXED, url UNINDEXED, '
+                                   'tokenize="porter unicode61")')
+                connection.executemany('INSERT INTO projects VALUES (?, ?, ?)',
+                                       [(project['id'], project['name'], position)
+                                        for position, project in enumerate(search_index.projects)])
+                connection.executemany('INSERT INTO pages VALUES (?, ?, ?, ?, ?)', [
+                    (title, page[0], page[1], search_index.projects[project]['id'], url)
+                    for (project, url, title), page in zip(search_index.docs, pages) if page is not None
+                ])
+                connection.execute("INSERT INTO pages(pages) VALUES ('optimize')")
+                count = connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+        finally:
+            connection.close()
+        os.replace(temporary, self._filename)
+        return count
+
+    @classmethod
+    def match_expression(cls, query):
+        """
+        Translates a user query into an FTS5 expression: all words are required (prefix match),
+        the `-word` ones excluded
+
+        :param query: The user query
+        :type query: str
+
+        :return: The FTS5 expression, empty if no word is required
+        :rtype: str
+        """
+        required, excluded = [], []
+        for word in query.split():
+            terms = re.findall(r'\w+', word)
+            if not terms:
+                continue
+            phrase = '"{0}"'.format(' '.join(terms))
+            if word.startswith('-'):
+                excluded.append(phrase)
+            else:
+                required.append(phrase + '*')
+        if not required:
+            return ''
+        expression = ' AND '.join(required)
+        if excluded:
+            expression = '({0}) NOT {1}'.format(expression, ' NOT '.join(excluded))
+        return expression
+
+    def query(self, query, scope='', limit=100):
+        """
+        Queries the database (read only)
+
+        :param query: The user query
+        :type query: str
+
+        :param scope: Restricts the results to a project (its id)
+        :type scope: str
+
+        :param limit: The maximum number of results
+        :type limit: int
+
+        :return: The results grouped by project, the groups ranked by their best result
+            (same as the `doctool-search.js` engine)
+        :rtype: list
+        """
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+
+        uri = 'file:{0}?mode=ro'.format(self._filename.replace('?', '%3f').replace('#', '%23'))
+        connection = sqlite3.connect(uri, uri=True)
+        try:
+            sql = ('SELECT pages.project, projects.name, pages.url, pages.title, '
+                   "snippet(pages, 1, '', '', '...', 24), -bm25(pages, ?, ?, ?) AS score "
+                   'FROM pages JOIN projects ON projects.id = pages.project '
+                   'WHERE pages MATCH ?{0} ORDER BY score DESC LIMIT ?').format(' AND pages.project = ?' if scope else '')
+            parameters = list(self.weights) + [expression] + ([scope] if scope else []) + [limit]
+            rows = connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+        groups = {}
+        for project, name, url, title, snippet, score in rows:
+            group = groups.setdefault(project, {'project': {'id': project, 'name': name},
+                                                'score': score, 'results': []})
+            group['results'].append({'url': url, 'title': title, 'descr': snippet, 'score': score})
+        return sorted(groups.values(), key=lambda group: group['score'], reverse=True)
@@ -0,0 +1,537 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Lightweight search server answering JSON queries from the search databases (see doctool.searchdb)
+
+Serves every version of an output directory ::
+
+    doctool search-server -r OUTPUT -p 8765
+
+    GET /search?q=engine&scope=api_doc&version=1.0
+
+    {"version": "1.0", "groups": [{"project": {"id": "api_doc", "name": "API"}, "score": 4.2,
+                                   "results": [{"url": "api_doc/core/mypkg.core.html", "title": "core Package",
+                                                "descr": "...An engine...", "score": 4.2}]}]}
+
+The version defaults to the newest one (versions manifest), the search page pointing at the server
+through the `SEARCH_SERVER` global configuration.
+
+The preview server serves the output directory itself (answering the search queries as well) ::
+
+    doctool serve OUTPUT -p 8000
+
+Requests are handled by a threads pool (HTTP/1.1 keep-alive connections), files being sent with their
+validators (`ETag`, `Last-Modified`, conditional requests), byte ranges & precompressed sidecars
+(see :mod:`doctool.stages.compress`). The fingerprinted assets are cached as immutable,
+as listed by the cache policy of their version (see :mod:`doctool.stages.fingerprint`).
+"""
+import io
+import os
+import re
+import json
+import logging
+import sqlite3
+import email.utils
+from concurrent import futures
+from http.server import BaseHTTPRequestHandler
+from http.server import SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+from doctool import errors
+from doctool import settings
+from doctool.searchdb import SearchDatabase
+from doctool.versions import VersionsManifest
+
+logger = logging.getLogger(__name__)
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the `/search` queries
+    """
+
+    def _send(self, status, content):
+        data = json.dumps(content).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        # The documentation is served from another origin
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') != '/search':
+            return self._send(404, {'error': 'Unknown path {0}'.format(url.path)})
+        return self.search(url)
+
+    def search(self, url):
+        """
+        Answers a search query
+
+        :param url: The request URL
+        :type url: urllib.parse.SplitResult
+        """
+        arguments = {key: values[0] for key, values in parse_qs(url.query).items()}
+        version = arguments.get('version') or self.server.default_version()
+        database = self.server.database(version)
+        if not database:
+            return self._send(404, {'error': 'No search database for the version {0}'.format(version)})
+
+        try:
+            limit = min(int(arguments.get('limit', self.server.limit)), self.server.limit)
+            groups = database.query(arguments.get('q', ''), scope=arguments.get('scope', ''), limit=limit)
+        except sqlite3.Error as exc:
+            # Locked, corrupt or being replaced by a publication
+            logger.warning('Search database of the version %s failed: %s', version, exc)
+            return self._send(503, {'error': 'The search database is unavailable: {0}'.format(exc)})
+        except (ValueError, OSError) as exc:
+            return self._send(400, {'error': str(exc)})
+        return self._send(200, {'version': version, 'groups': groups})
+
+    def log_message(self, fmt, *args):
+        logger.debug('%s - %s', self.address_string(), fmt % args)
+
+
+class SearchServer(ThreadingHTTPServer):
+    """
+    Search server of an output directory (all its versions)
+    """
+    daemon_threads = True
+    handler_class = SearchRequestHandler
+
+    def __init__(self, address, root, limit=100):
+        """
+        Constructor
+
+        :param address: The (host, port) to listen to
+        :type address: tuple
+
+        :param root: The output root directory (holding the versions)
+        :type root: str
+
+        :param limit: The maximum number of results per query
+        :type limit: int
+        """
+        super(SearchServer, self).__init__(address, self.handler_class)
+        self.root = os.path.abspath(root)
+        self.limit = limit
+
+    def default_version(self):
+        """
+        Gets the newest version (versions manifest)
+
+        :return: The newest version, None if no version is published
+        :rtype: str
+        """
+        versions = VersionsManifest(self.root).load()
+        return versions[0]['version'] if versions else None
+
+    def database(self, version):
+        """
+        Gets the search database of a version (opened per query, a new build being published meanwhile)
+
+        :param version: The version
+        :type version: str
+
+        :return: The search database, None if missing
+        :rtype: SearchDatabase
+        """
+        if not version or version.startswith('.') or os.sep in version or '/' in version:
+            return None
+        filename = os.path.join(self.root, version, settings.SEARCH_DATABASE_FILENAME)
+        return SearchDatabase(filename) if os.path.isfile(filename) else None
+
+
+class PreviewRequestHandler(SearchRequestHandler, SimpleHTTPRequestHandler):
+    """
+    Serves the files of the output directory & answers the `/search` queries
+    """
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive connections give their worker back
+    timeout = 15
+    RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+    SIDECARS = (('br', '.br'), ('gzip', '.gz'))
+    CHARSET_TYPES = ('application/javascript', 'application/json', 'image/svg+xml')
+    extensions_map = dict(SimpleHTTPRequestHandler.extensions_map, **{
+        '.html': 'text/html',
+        '.js': 'text/javascript',
+        '.mjs': 'text/javascript',
+        '.css': 'text/css',
+        '.json': 'application/json',
+        '.map': 'application/json',
+        '.svg': 'image/svg+xml',
+        '.txt': 'text/plain',
+        '.woff': 'font/woff',
+        '.woff2': 'font/woff2',
+        '.ttf': 'font/ttf',
+        '.eot': 'application/vnd.ms-fontobject',
+        '.sqlite': 'application/vnd.sqlite3',
+    })
+
+    def __init__(self, request, client_address, server):
+        self._range = None
+        super(PreviewRequestHandler, self).__init__(request, client_address, server, directory=server.root)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') == '/search':
+            return self.search(url)
+        handle = self.send_head()
+        if handle:
+            try:
+                self.copyfile(handle, self.wfile)
+            finally:
+                handle.close()
+
+    def do_HEAD(self):
+        handle = self.send_head()
+        if handle:
+            handle.close()
+
+    def accepted_encodings(self):
+        """
+        Lists the content codings accepted by the client (`Accept-Encoding`)
+
+        :rtype: set
+        :return: The accepted codings
+        """
+        accepted = set()
+        for coding in self.headers.get('Accept-Encoding', '').split(','):
+            name, _, parameters = coding.strip().partition(';')
+            quality = parameters.strip()
+            if quality.startswith('q=') and quality[2:].strip('0.') == '':
+                # q=0, explicitly refused
+                continue
+            accepted.add(name.strip().lower())
+        return accepted
+
+    def content_type(self, path):
+        """
+        Gets the MIME type of a file (UTF-8 for the text ones)
+
+        :param path: The file path
+        :type path: str
+
+        :rtype: str
+        :return: The content type
+        """
+        content_type = self.guess_type(path)
+        if content_type.startswith('text/') or content_type in self.CHARSET_TYPES:
+            content_type += '; charset=utf-8'
+        return content_type
+
+    def not_modified(self, etag, mtime):
+        """
+        Checks the validators sent by the client (`If-None-Match` first, `If-Modified-Since` otherwise)
+
+        :param etag: The entity tag of the file
+        :type etag: str
+
+        :param mtime: The modification time of the file
+        :type mtime: float
+
+        :rtype: bool
+        :return: Whether the cached copy of the client is up to date
+        """
+        if 'If-None-Match' in self.headers:
+            tags = [tag.strip() for tag in self.headers['If-None-Match'].split(',')]
+            return '*' in tags or etag in tags or 'W/' + etag in tags
+        if 'If-Modified-Since' in self.headers:
+            try:
+                since = email.utils.parsedate_to_datetime(self.headers['If-Modified-Since'])
+            except (TypeError, ValueError, IndexError):
+                return False
+            return since is not None and int(mtime) <= since.timestamp()
+        return False
+
+    def byte_range(self, etag, size):
+        """
+        Parses the (single) byte range requested, multiple ranges being answered by the whole file
+
+        :param etag: The entity tag of the file (`If-Range`)
+        :type etag: str
+
+        :param size: The file size
+        :type size: int
+
+        :rtype: tuple or None
+        :return: The (first, last) bytes, None for the whole file
+
+        :raises ValueError: The range is not satisfiable
+        """
+        match = self.RANGE_RE.match(self.headers.get('Range', '').replace(' ', ''))
+        if not match or self.headers.get('If-Range', etag) != etag:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            # Suffix range, the last N bytes
+            first, last = max(size - int(last), 0), size - 1
+        else:
+            first, last = int(first), min(int(last), size - 1) if last else size - 1
+        if first >= size or first > last:
+            raise ValueError('Range not satisfiable')
+        return first, last
+
+    def send_head(self):
+        self._range = None
+        url = urlsplit(self.path)
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, 'index.html')
+            if url.path == '/' and not os.path.isfile(index) and self.server.default_version():
+                # The newest version
+                self.send_response(302)
+                self.send_header('Location', '/{0}/'.format(self.server.default_version()))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return None
+            if not url.path.endswith('/') or not os.path.isfile(index):
+                # Redirection or directory listing
+                return super(PreviewRequestHandler, self).send_head()
+            path = index
+        if not os.path.isfile(path):
+            self.send_error(404, 'File not found')
+            return None
+
+        served, encoding = path, None
+        accepted = self.accepted_encodings()
+        for coding, extension in self.SIDECARS:
+            if coding in accepted and os.path.isfile(path + extension):
+                served, encoding = path + extension, coding
+                break
+
+        try:
+            handle = open(served, 'rb')
+        except errors.SysErrors:
+            self.send_error(404, 'File not found')
+            return None
+        try:
+            stat = os.fstat(handle.fileno())
+            etag = '"{0:x}-{1:x}{2}"'.format(stat.st_mtime_ns, stat.st_size, '-' + encoding if encoding else '')
+            status = 200
+            if self.not_modified(etag, stat.st_mtime):
+                status = 304
+            else:
+                try:
+                    self._range = self.byte_range(etag, stat.st_size)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header('Content-Range', 'bytes */{0}'.format(stat.st_size))
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    handle.close()
+                    return None
+                if self._range:
+                    status = 206
+
+            self.send_response(status)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', self.date_time_string(stat.st_mtime))
+            self.send_header('Cache-Control', self.server.cache_control(os.path.relpath(path, self.server.root)))
+            if served != path or any(os.path.isfile(path + extension) for _, extension in self.SIDECARS):
+                self.send_header('Vary', 'Accept-Encoding')
+            if status == 304:
+                self.end_headers()
+                handle.close()
+                return None
+
+            self.send_header('Content-Type', self.content_type(path))
+            self.send_header('Accept-Ranges', 'bytes')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if self._range:
+                first, last = self._range
+                self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(first, last, stat.st_size))
+                self.send_header('Content-Length', str(last - first + 1))
+            else:
+                self.send_header('Content-Length', str(stat.st_size))
+            self.end_headers()
+            return handle
+        except errors.SysErrors:
+            handle.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        """
+        Sends the file (or its requested range) through the socket (zero-copy `sendfile` where supported)
+
+        :param source: The opened file
+        :type source: file
+
+        :param outputfile: The response stream
+        :type outputfile: file
+        """
+        try:
+            size = os.fstat(source.fileno()).st_size
+        except (AttributeError, io.UnsupportedOperation):
+            # e.g. a directory listing
+            return super(PreviewRequestHandler, self).copyfile(source, outputfile)
+        first, last = self._range or (0, size - 1)
+        outputfile.flush()
+        self.connection.sendfile(source, offset=first, count=last - first + 1)
+
+
+class PreviewServer(SearchServer):
+    """
+    Preview server of an output directory (all its versions), requests being handled by a threads pool
+    """
+    handler_class = PreviewRequestHandler
+    request_queue_size = 128
+
+    def __init__(self, address, root, workers=settings.DEFAULT_PREVIEW_WORKERS, limit=100):
+        """
+        Constructor
+
+        :param address: The (host, port) to listen to
+        :type address: tuple
+
+        :param root: The output root directory (holding the versions)
+        :type root: str
+
+        :param workers: The number of requests handled concurrently
+        :type workers: int
+
+        :param limit: The maximum number of results per search query
+        :type limit: int
+        """
+        super(PreviewServer, self).__init__(address, root, limit=limit)
+        self._executor = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='doctool-preview')
+        self._policies = {}
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self.process_request_thread, request, client_address)
+
+    def server_close(self):
+        super(PreviewServer, self).server_close()
+        self._executor.shutdown(wait=True)
+
+    def cache_policy(self, version):
+        """
+        Gets the cache policy of a version, loaded again once a new build is published
+
+        :param version: The version
+        :type version: str
+
+        :return: The cache policy (see :class:`doctool.stages.fingerprint.Fingerprint`), empty if missing
+        :rtype: dict
+        """
+        filename = os.path.join(self.root, version, settings.CACHE_POLICY_FILENAME)
+        try:
+            mtime = os.stat(filename).st_mtime_ns
+        except errors.SysErrors:
+            return {}
+        cached = self._policies.get(version)
+        if not cached or cached[0] != mtime:
+            try:
+                with open(filename, 'r', encoding='utf8') as handle:
+                    policy = json.load(handle)
+                policy['files'] = set(policy.get('files', ()))
+            except (OSError, ValueError):
+                return {}
+            cached = self._policies[version] = (mtime, policy)
+        return cached[1]
+
+    def cache_control(self, relpath):
+        """
+        Gets the `Cache-Control` of a file, the fingerprinted assets being immutable
+
+        :param relpath: The file path, relative to the output root directory
+        :type relpath: str
+
+        :return: The Cache-Control header value
+        :rtype: str
+        """
+        version, _, path = relpath.replace(os.sep, '/').partition('/')
+        policy = self.cache_policy(version) if path else {}
+        if path in policy.get('files', ()):
+            return policy.get('immutable', settings.CACHE_CONTROL_IMMUTABLE)
+        return policy.get('default', settings.CACHE_CONTROL_DEFAULT)
+
+
+def serve(root, host='127.0.0.1', port=settings.DEFAULT_SEARCH_SERVER_PORT):
+    """
+    Runs the search server until interrupted
+
+    :param root: The output root directory (holding the versions)
+    :type root: str
+
+    :param host: The host to listen to
+    :type host: str
+
+    :param port: The port to listen to
+    :type port: int
+
+    :return: The exit status
+    :rtype: int
+    """
+    server = SearchServer((host, port), root)
+    logger.info('Search server of %s listening on http://%s:%d/search', server.root, host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def preview(root, host='127.0.0.1', port=settings.DEFAULT_PREVIEW_SERVER_PORT,
+            workers=settings.DEFAULT_PREVIEW_WORKERS):
+    """
+    Runs the preview server until interrupted
+
+    :param root: The output root directory (holding the versions)
+    :type root: str
+
+    :param host: The host to listen to
+    :type host: str
+
+    :param port: The port to listen to
+    :type port: int
+
+    :param workers: The number of requests handled concurrently
+    :type workers: int
+
+    :return: The exit status
+    :rtype: int
+    """
+    server = PreviewServer((host, port), root, workers=workers)
+    logger.info('Preview server of %s listening on http://%s:%d/ (%d workers)', server.root, host, port, workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -84,6 +84,61 @@ DEFAULT_CONFIG = absjoin(DOCUMENTATION_REPO, 'doctool_settings.json')
 DEFAULT_OUTPUT_DIRNAME = absjoin(DOCUMENTATION_REPO, __OUTPUT_DIRNAME__)
 DEFAULT_OUTPUT_LOG_FILENAME = absjoin(DEFAULT_OUTPUT_DIRNAME, 'doctool_logs.txt')
 
+# Navigation exported out of the Sphinx environment (see doctool.extensions.navigation)
+NAV_FILENAME = 'doctool-nav.json'
+# Project menu (left navigation) rendered once per project & loaded by doctool.js
+MENU_FILENAME = 'doctool-menu.html'
+# Directory (into the project output directory) holding the menu chunks (groups beyond the project maxdepth)
+MENU_CHUNKS_DIRNAME = '_menu'
+# Projects data (navigation bar, search scopes, ...) handed to Sphinx next to the conf.py (see doctool.extensions.context)
+CONTEXT_FILENAME = 'doctool-context.json'
+# Bundle manifest (every built project data), merged into by the `--update` mode
+MANIFEST_FILENAME = 'doctool-manifest.json'
+# Directory (next to the versions) holding the published snapshots, `OUTPUT/<version>` linking to the current one
+SNAPSHOTS_DIRNAME = '.snapshots'
+# Number of published snapshots kept per version (the current one included), for an instant rollback
+DEFAULT_SNAPSHOTS = 3
+# Content-addressed store (next to the versions) the static assets of all outputs are hard-linked to
+STATIC_STORE_DIRNAME = '.static-store'
+# Directory (next to the versions) holding the content digests of the precompressed outputs, per version
+PRECOMPRESS_DIRNAME = '.precompressed'
+# Cross-project search index (into the version output directory), merged from the projects ones (see doctool.search)
+SEARCH_INDEX_FILENAME = 'doctool-searchindex.js'
+# Directory (into the version output directory) holding the search index shards (beyond the threshold below)
+SEARCH_SHARDS_DIRNAME = '_search'
+# Size (bytes) of the cross-project search index beyond which it is sharded by term prefix
+DEFAULT_SEARCH_SHARD_THRESHOLD = 2 * 1024 * 1024
+# Length of the terms prefix the search index is sharded by
+SEARCH_PREFIX_LENGTH = 2
+# Number of documents (titles & links) per search index chunk, once sharded
+SEARCH_DOCS_CHUNK = 1000
+# SQLite FTS5 search database (into the version output directory), if enabled (see doctool.searchdb)
+SEARCH_DATABASE_FILENAME = 'doctool-search.sqlite'
+# Port the search server (`doctool search-server`) listens to by default
+DEFAULT_SEARCH_SERVER_PORT = 8765
+# Cache policy of a version (into the version output directory), listing its fingerprinted assets (see doctool.stages.fingerprint)
+CACHE_POLICY_FILENAME = 'doctool-cache-policy.json'
+# Cache-Control of the fingerprinted assets (their content never changes)
+CACHE_CONTROL_IMMUTABLE = 'public, max-age=31536000, immutable'
+# Cache-Control of any other output (pages, versions selector, search index shards, ...)
+CACHE_CONTROL_DEFAULT = 'no-cache'
+# Port the preview server (`doctool serve`) listens to by default
+DEFAULT_PREVIEW_SERVER_PORT = 8000
+# Number of requests the preview server handles concurrently by default
+DEFAULT_PREVIEW_WORKERS = 32
+# Versions manifest (next to the versions), their build time & size (see doctool.versions)
+VERSIONS_FILENAME = 'doctool-versions.json'
+# Lock file serializing the versions manifest updates of concurrent builds
+VERSIONS_LOCK_FILENAME = '.doctool-versions.lock'
+
+# Persistent cache (generated API sources, Sphinx doctrees, ...) kept across builds
+DOCTOOL_CACHE_DIR = normpath(os.environ.get('DOCTOOL_CACHE_DIR') or
+                             os.path.join(os.path.expanduser('~'), '.doctool', 'cache'))
+# Scratch root of the generated Sphinx configurations (one directory per build, the sources are never modified)
+DOCTOOL_CONF_DIR = absjoin(DOCTOOL_CACHE_DIR, 'conf')
+# Optimized images, per content digest (see doctool.stages.images), shared by all builds
+DOCTOOL_IMAGES_CACHE_DIR = absjoin(DOCTOOL_CACHE_DIR, 'images')
+
 DOCTOOL_GLOBAL_LOGGING_LEVEL = logging.DEBUG
 DOCTOOL_GLOBAL_LOGGING_LEVELS = {
     'DEBUG': logging.DEBUG,
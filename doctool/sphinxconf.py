@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Doctool Sphinx configuration shared by all projects
+
+The generated conf.py only holds the project specific values, its Sphinx hooks being defined here once
+(compiled & cached by Python as any other module) ::
+
+    from doctool import sphinxconf
+
+    def setup(app):
+        sphinxconf.setup(app)
+
+The projects data are loaded lazily from the project context sidecar (see :mod:`doctool.extensions.context`).
+"""
+import os
+import re
+
+from doctool import settings
+from doctool.roles import jira
+from doctool.roles import downloads as downloads_roles
+from doctool.directives import epydoc
+from doctool.directives import releases
+from doctool.directives import downloads
+from doctool.extensions import context
+from doctool.helpers import ProjectHelper as Helper
+
+re_relative_path = re.compile(r'(\.\./|\./)')
+re_file_directives = re.compile(r'(.. include::|.. literalinclude::|.. image::|.. figure::|:download:)')
+
+
+def doctool_doctree(app, doctree, docname=None):
+    """
+    Doctool doctree hook
+
+    :param app:
+    :param doctree:
+    """
+    paths = [settings.REPO_BASE] + context.load(app)['paths']
+
+    try:
+        # FIXME
+        import xml.etree.ElementTree as ET
+        xml_node = ET.fromstring('{0}'.format(doctree))
+        targets = xml_node.xpath('//download_reference//attribute::reftarget')
+        for possible_link_node in targets:
+            if not os.path.exists(possible_link_node):
+                cleaned_link = re_relative_path.sub('', possible_link_node)
+
+                for base in paths:
+                    guess = Helper.absjoin(base, cleaned_link)
+                    if os.path.exists(guess):
+                        possible_link_node.getparent().attrib['reftarget'] = guess
+                        break
+
+    except Exception as exc:
+        print('XML Handled Exception : {0}'.format(exc))
+
+
+def setup(app):
+    # Allow to connect an handler on pre-process `autodoc-process-docstring` signal
+    # app.connect('autodoc-process-docstring', debug_docstring)
+    """
+
+    :param app:
+    """
+    epydoc.setup(app)
+    releases.setup(app)
+    downloads.setup(app)
+
+    app.add_role('jira_issue', jira.issue_role)
+    app.add_role('jira_story', jira.story_role)
+    app.add_role('download-inline', downloads_roles.download_inline_role)
+
+    app.add_config_value('jira_project_url', None, 'env')
+
+    app.connect('doctree-resolved', doctool_doctree)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Stage writing precompressed sidecars (gzip & brotli) of the text outputs
+
+Every HTML, JS, CSS, JSON & SVG file of the (staging) output gets its `.gz` sidecar (`.br` as well when
+the optional `brotli` package is installed), so that the static server serves them as is
+(e.g. nginx `gzip_static` / `brotli_static`) instead of compressing on the fly ::
+
+    OUTPUT/1.0/user_doc/index.html
+    OUTPUT/1.0/user_doc/index.html.gz
+    OUTPUT/1.0/user_doc/index.html.br
+
+Files are compressed by a processes pool. The content digest of each file is recorded (see
+:data:`doctool.settings.PRECOMPRESS_DIRNAME`), the files unchanged since the last published build
+keeping their sidecars (copied along with the live output, see
+:meth:`doctool.managers.ProjectManager._seed_staging`). A sidecar not smaller than its file is not written.
+"""
+import os
+import gzip
+import json
+import hashlib
+import logging
+from concurrent import futures
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from doctool import errors
+from doctool import settings
+from doctool.helpers import Types
+from doctool.helpers import ProjectHelper
+from doctool.interfaces import IStage
+
+logger = logging.getLogger(__name__)
+
+
+def compress_file(filename, digest=None, encodings=()):
+    """
+    Writes the sidecars of a file, unless its content is unchanged (processes pool worker)
+
+    :param filename: The file path
+    :type filename: str
+
+    :param digest: The content digest recorded by the last build, if any
+    :type digest: str
+
+    :param encodings: The sidecars extensions recorded by the last build
+    :type encodings: list
+
+    :rtype: tuple
+    :return: The filename, its digest, the sidecars extensions, whether it was skipped & the sizes
+        (original, gzip, brotli) of the compressed file
+    """
+    with open(filename, 'rb') as handle:
+        data = handle.read()
+    current = hashlib.sha256(data).hexdigest()
+    if current == digest and all(os.path.isfile(filename + extension) for extension in encodings):
+        return filename, current, list(encodings), True, (0, 0, 0)
+
+    compressors = [('.gz', lambda content: gzip.compress(content, compresslevel=9, mtime=0))]
+    if brotli:
+        compressors.append(('.br', lambda content: brotli.compress(content, quality=11)))
+
+    written, sizes = [], [len(data), 0, 0]
+    for index, (extension, compress) in enumerate(compressors):
+        sidecar = filename + extension
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            # Useless, the file is served as is
+            if os.path.isfile(sidecar):
+                os.remove(sidecar)
+            continue
+        temporary = '{0}.{1}.tmp'.format(sidecar, os.getpid())
+        with open(temporary, 'wb') as handle:
+            handle.write(compressed)
+        os.replace(temporary, sidecar)
+        written.append(extension)
+        sizes[index + 1] = len(compressed)
+    return filename, current, written, False, tuple(sizes)
+
+
+class Precompress(IStage):
+    """
+    Writes the gzip (& brotli) sidecars of the text outputs
+    """
+    EXTENSIONS = ('.html', '.js', '.css', '.json', '.svg')
+    SIDECARS = ('.gz', '.br')
+
+    def __init__(self, manager):
+        super(Precompress, self).__init__(manager)
+        self._manifest = None
+
+    @property
+    def manifest_filename(self):
+        """
+        Holds the digests manifest of the version, next to the versions (kept across builds)
+
+        :rtype: str
+        :return: The manifest filename
+        """
+        return self.manager.helper.absjoin(self.manager.live_output_dir, '..', settings.PRECOMPRESS_DIRNAME,
+                                           '{0}.json'.format(self.manager.version))
+
+    @classmethod
+    def text_files(cls, output_dir, previous=None):
+        """
+        Lists the text outputs to be compressed, the orphan sidecars (their file being removed) being deleted
+
+        .. note:: Only the sidecars of a text output (or recorded by the last build) are orphans,
+                  compressed downloads (e.g. `_downloads/<hash>/data.tar.gz`) being left alone.
+
+        :param output_dir: The output directory
+        :type output_dir: str
+
+        :param previous: The digests manifest of the last published build (relative paths => digest, sidecars)
+        :type previous: dict
+
+        :rtype: list
+        :return: The text outputs paths
+        """
+        previous = previous or {}
+        files = []
+        for dirname, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.join(dirname, filename)
+                base, extension = os.path.splitext(path)
+                if extension in cls.SIDECARS:
+                    if os.path.exists(base):
+                        continue
+                    relbase = os.path.relpath(base, output_dir).replace(os.sep, '/')
+                    if os.path.splitext(base)[1].lower() in cls.EXTENSIONS or relbase in previous:
+                        os.remove(path)
+                elif extension.lower() in cls.EXTENSIONS and not os.path.islink(path):
+                    files.append(path)
+        return files
+
+    def load_manifest(self):
+        """
+        Loads the digests manifest of the last published build
+
+        :rtype: dict
+        :return: The relative paths => [digest, sidecars extensions]
+        """
+        try:
+            with open(self.manifest_filename, 'r', encoding='utf8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def setup(self):
+        """
+        Checks the optional compressors
+        """
+        if not brotli:
+            logger.info('The brotli package is not installed, only gzip sidecars are written')
+
+    def build(self):
+        """
+        Compresses the text outputs of the (staging) output, in parallel
+        """
+        output_dir = self.manager.output_dir
+        previous = self.load_manifest()
+        files = self.text_files(output_dir, previous)
+        arguments = [previous.get(os.path.relpath(filename, output_dir).replace(os.sep, '/'), (None, ()))
+                     for filename in files]
+
+        report = Types.AttributeDict(files=len(files), compressed=0, skipped=0, size=0, gzip_size=0, brotli_size=0)
+        manifest = {}
+        workers = os.cpu_count() or 1
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(compress_file, files, [digest for digest, _ in arguments],
+                                   [encodings for _, encodings in arguments], chunksize=32)
+            try:
+                for filename, digest, encodings, skipped, sizes in results:
+                    manifest[os.path.relpath(filename, output_dir).replace(os.sep, '/')] = [digest, encodings]
+                    if skipped:
+                        report.skipped += 1
+                    else:
+                        report.compressed += 1
+                        report.size += sizes[0]
+                        report.gzip_size += sizes[1]
+                        report.brotli_size += sizes[2]
+            except errors.SysErrors as exc:
+                logger.warning('Precompression of %s failed (%s)', output_dir, exc)
+                manifest = {}
+
+        logger.info('Precompress: %d file(s), %d compressed (%d => %d byte(s) gzip), %d unchanged',
+                    report.files, report.compressed, report.size, report.gzip_size, report.skipped)
+        self._manifest = manifest
+        self._report = report
+
+    def teardown(self):
+        """
+        Records the digests of the published output, the next build skipping its unchanged files
+        """
+        if self._manifest is None:
+            return
+        ProjectHelper.createdirs(os.path.dirname(self.manifest_filename))
+        ProjectHelper.replace_file(self.manifest_filename, json.dumps(self._manifest))
@@ -0,0 +1,586 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Stage minifying the HTML, CSS & JS outputs & fingerprinting the assets (cache busting)
+
+The JS & CSS assets referenced by the HTML pages (`src` / `href` attributes, the scripts loaded by the
+inline loaders, relative to the version) are renamed after their content digest ::
+
+    OUTPUT/1.0/doctool.js                          => OUTPUT/1.0/doctool.3f9c0e21ab.js
+    OUTPUT/1.0/user_doc/_static/bootstrap-sphinx.css => OUTPUT/1.0/user_doc/_static/bootstrap-sphinx.5d1e8a0b2c.css
+
+the references of all the pages being rewritten accordingly (the pages of the projects not rebuilt included).
+Assets referenced by a stylesheet (`@import`, `url()`) keep their name, as well as the versions selector
+(`doctool-versions.js`, shared by all versions).
+
+A fingerprinted asset never changes, the cache policy of the version (see :data:`doctool.settings.CACHE_POLICY_FILENAME`)
+lists them for the CDN / static server to cache them as immutable, everything else being revalidated.
+
+The minification is a conservative one (comments & whitespace), lines being kept in JS (no automatic
+semicolon insertion pitfall). Already minified assets (`.min.` names) are left as is.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import posixpath
+from concurrent import futures
+
+from doctool import settings
+from doctool.helpers import Types
+from doctool.helpers import ProjectHelper
+from doctool.interfaces import IStage
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 10
+FINGERPRINT_RE = re.compile(r'\.[0-9a-f]{%d}(?=\.(?:js|css)$)' % HASH_LENGTH)
+ATTRIBUTE_RE = re.compile(r'''(?P<prefix>\b(?:src|href)=(?P<quote>["']))(?P<path>[^"'?#:]+?\.(?:js|css))(?=[?#"'])''')
+LITERAL_RE = re.compile(r'''(?P<quote>["'])(?P<path>[\w./-]+?\.(?:js|css))(?P=quote)''')
+SCRIPT_RE = re.compile(r'(<script\b(?:(?!\bsrc=)[^>])*>)(.*?)(</script>)', re.S | re.I)
+HTML_PROTECTED_RE = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2>)', re.S | re.I)
+HTML_COMMENT_RE = re.compile(r'<!--(?!\[if).*?-->', re.S)
+CSS_REFERENCE_RE = re.compile(r'''(?:@import\s+|url\()\s*["']?(?P<path>[^"')\s?#]+)''')
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+JS_REGEX_KEYWORDS = re.compile(r'(?:^|[^\w$])(?:return|typeof|case|in|of|void|delete|throw|new|else|do)$')
+
+
+def _string_end(source, index, quote):
+    """
+    Finds the end of a string literal
+
+    :param source: The source
+    :type source: str
+
+    :param index: The opening quote index
+    :type index: int
+
+    :param quote: The quote character
+    :type quote: str
+
+    :rtype: int
+    :return: The index following the closing quote (the end of the line / source if unterminated)
+    """
+    length = len(source)
+    index += 1
+    while index < length:
+        char = source[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == quote:
+            return index + 1
+        if char == '\n' and quote != '`':
+            return index
+        index += 1
+    return length
+
+
+def _regex_end(source, index):
+    """
+    Finds the end of a JS regular expression literal
+
+    :param source: The source
+    :type source: str
+
+    :param index: The opening slash index
+    :type index: int
+
+    :rtype: int or None
+    :return: The index following the flags, None if it is not a regular expression
+    """
+    length, in_class = len(source), False
+    index += 1
+    while index < length:
+        char = source[index]
+        if char == '\\':
+            index += 2
+            continue
+        if char == '\n':
+            return None
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            index += 1
+            while index < length and (source[index].isalnum() or source[index] in '_$'):
+                index += 1
+            return index
+        index += 1
+    return None
+
+
+def minify_js(source):
+    """
+    Removes the comments (but `/*! ... */` ones) & the superfluous whitespace of a script, lines being kept
+
+    :param source: The script
+    :type source: str
+
+    :rtype: str
+    :return: The minified script
+    """
+    output, index, length = [], 0, len(source)
+    last = ''
+
+    def append(chunk):
+        output.append(chunk)
+        return chunk[-1]
+
+    while index < length:
+        char = source[index]
+        if char in '\'"`':
+            end = _string_end(source, index, char)
+            last = append(source[index:end])
+            index = end
+        elif source.startswith('//', index):
+            end = source.find('\n', index)
+            index = length if end == -1 else end
+        elif source.startswith('/*', index):
+            end = source.find('*/', index + 2)
+            end = length if end == -1 else end + 2
+            comment = source[index:end]
+            if comment.startswith('/*!'):
+                last = append(comment)
+            elif '\n' in comment:
+                if last not in ('', '\n'):
+                    last = append('\n')
+            elif last not in ('', ' ', '\n'):
+                last = append(' ')
+            index = end
+        elif char == '/':
+            end = None
+            tail = ''.join(output[-4:]).rstrip()
+            if not tail or tail[-1] in JS_REGEX_PRECEDERS or JS_REGEX_KEYWORDS.search(tail):
+                end = _regex_end(source, index)
+            end = end or index + 1
+            last = append(source[index:end])
+            index = end
+        elif char == '\n':
+            if output and output[-1] == ' ':
+                output.pop()
+            if last not in ('', '\n'):
+                last = append('\n')
+            index += 1
+        elif char in ' \t\r\f\v':
+            if last not in ('', ' ', '\n'):
+                last = append(' ')
+            index += 1
+        else:
+            end = index + 1
+            while end < length and source[end] not in '\'"`/ \t\r\n\f\v':
+                end += 1
+            last = append(source[index:end])
+            index = end
+    return ''.join(output).strip() + '\n'
+
+
+def minify_css(source):
+    """
+    Removes the comments (but `/*! ... */` ones) & the superfluous whitespace of a stylesheet
+
+    :param source: The stylesheet
+    :type source: str
+
+    :rtype: str
+    :return: The minified stylesheet
+    """
+    output, index, length = [], 0, len(source)
+    while index < length:
+        char = source[index]
+        if char in '\'"':
+            end = _string_end(source, index, char)
+            output.append(source[index:end])
+            index = end
+        elif source.startswith('/*', index):
+            end = source.find('*/', index + 2)
+            end = length if end == -1 else end + 2
+            if source.startswith('/*!', index):
+                output.append(source[index:end])
+            index = end
+        elif char.isspace():
+            while index < length and source[index].isspace():
+                index += 1
+            previous = output[-1][-1] if output else ''
+            following = source[index] if index < length else ''
+            if previous and previous not in '{};,>:' and following not in '{};,>':
+                output.append(' ')
+        else:
+            if char in '{};,>' and output and output[-1] == ' ':
+                output.pop()
+            if char == '}' and output and output[-1] == ';':
+                output.pop()
+            output.append(char)
+            index += 1
+    return ''.join(output).strip() + '\n'
+
+
+def minify_html(source):
+    """
+    Removes the comments (but the conditional ones) & the lines indentation of a page,
+    the preformatted (`pre`, `textarea`) & inline script / style blocks being kept as is
+
+    :param source: The page
+    :type source: str
+
+    :rtype: str
+    :return: The minified page
+    """
+    parts = HTML_PROTECTED_RE.split(source)
+    output = []
+    # split() yields [text, block, tag name, text, block, tag name, ..., text]
+    for index in range(0, len(parts), 3):
+        text = HTML_COMMENT_RE.sub('', parts[index])
+        output.append(re.sub(r'[ \t]*\n\s*', '\n', text))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return ''.join(output).strip() + '\n'
+
+
+def resolve(reference, base):
+    """
+    Resolves a reference to an asset of the output
+
+    :param reference: The reference (e.g. `_static/doctools.js`)
+    :type reference: str
+
+    :param base: The directory it is relative to (output relative, POSIX)
+    :type base: str
+
+    :rtype: str or None
+    :return: The output relative (POSIX) path of the asset, its fingerprint stripped, None if out of the output
+    """
+    if reference.startswith('/'):
+        return None
+    path = posixpath.normpath(posixpath.join(base, reference))
+    if path.startswith('..'):
+        return None
+    return FINGERPRINT_RE.sub('', path)
+
+
+def page_references(content, page):
+    """
+    Lists the assets references of a page, attributes & inline loaders literals
+
+    :param content: The page content
+    :type content: str
+
+    :param page: The page path (output relative, POSIX)
+    :type page: str
+
+    :rtype: generator
+    :return: The (match, output relative asset path) couples, attributes first
+    """
+    base = posixpath.dirname(page)
+    for match in ATTRIBUTE_RE.finditer(content):
+        yield match, resolve(match.group('path'), base)
+    for script in SCRIPT_RE.finditer(content):
+        for match in LITERAL_RE.finditer(script.group(2)):
+            # The loaders load the doctool scripts relatively to the version
+            yield match, resolve(match.group('path'), '')
+
+
+def scan_page(filename, output_dir):
+    """
+    Lists the assets referenced by a page (processes pool worker)
+
+    :param filename: The page path
+    :type filename: str
+
+    :param output_dir: The output directory
+    :type output_dir: str
+
+    :rtype: set
+    :return: The output relative (POSIX) paths of the referenced assets
+    """
+    page = os.path.relpath(filename, output_dir).replace(os.sep, '/')
+    with open(filename, 'r', encoding='utf8', errors='replace') as handle:
+        content = handle.read()
+    return {path for _, path in page_references(content, page) if path}
+
+
+def rewrite_page(filename, output_dir, assets, minify):
+    """
+    Rewrites the assets references of a page (& minifies it) (processes pool worker)
+
+    :param filename: The page path
+    :type filename: str
+
+    :param output_dir: The output directory
+    :type output_dir: str
+
+    :param assets: The fingerprinted assets, output relative (POSIX) path => fingerprinted one
+    :type assets: dict
+
+    :param minify: Whether the page is minified
+    :type minify: bool
+
+    :rtype: tuple
+    :return: The page sizes (before, after)
+    """
+    page = os.path.relpath(filename, output_dir).replace(os.sep, '/')
+    base = posixpath.dirname(page)
+    try:
+        with open(filename, 'r', encoding='utf8') as handle:
+            original = handle.read()
+    except UnicodeDecodeError:
+        return 0, 0
+
+    def replace(match, path):
+        reference = match.group('path')
+        if path not in assets:
+            # Not fingerprinted (anymore)
+            return FINGERPRINT_RE.sub('', reference)
+        name = posixpath.basename(assets[path])
+        dirname = posixpath.dirname(reference)
+        return posixpath.join(dirname, name) if dirname else name
+
+    def rewrite_attribute(match):
+        path = resolve(match.group('path'), base)
+        return match.group('prefix') + replace(match, path)
+
+    def rewrite_literal(match):
+        path = resolve(match.group('path'), '')
+        return match.group('quote') + replace(match, path) + match.group('quote')
+
+    def rewrite_script(match):
+        return match.group(1) + LITERAL_RE.sub(rewrite_literal, match.group(2)) + match.group(3)
+
+    content = minify_html(original) if minify else original
+    content = ATTRIBUTE_RE.sub(rewrite_attribute, content)
+    content = SCRIPT_RE.sub(rewrite_script, content)
+    if content != original:
+        ProjectHelper.replace_file(filename, content)
+    return len(original.encode('utf8')), len(content.encode('utf8'))
+
+
+def process_asset(filename, minify, fingerprint):
+    """
+    Minifies an asset & renames it after its content digest (processes pool worker)
+
+    :param filename: The asset path
+    :type filename: str
+
+    :param minify: Whether the asset is minified
+    :type minify: bool
+
+    :param fingerprint: Whether the asset is fingerprinted
+    :type fingerprint: bool
+
+    :rtype: tuple
+    :return: The asset (final) path & its sizes (before, after)
+    """
+    with open(filename, 'rb') as handle:
+        data = handle.read()
+    size = len(data)
+    base, extension = os.path.splitext(filename)
+    if minify and '.min.' not in os.path.basename(filename):
+        try:
+            source = data.decode('utf8')
+        except UnicodeDecodeError:
+            source = None
+        if source is not None:
+            minified = (minify_js if extension == '.js' else minify_css)(source)
+            if len(minified) < len(source):
+                data = minified.encode('utf8')
+                ProjectHelper.replace_file(filename, minified)
+    if fingerprint:
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        target = '{0}.{1}{2}'.format(base, digest, extension)
+        os.replace(filename, target)
+        filename = target
+    return filename, size, len(data)
+
+
+class Fingerprint(IStage):
+    """
+    Minifies the HTML, CSS & JS outputs & fingerprints the assets referenced by the pages
+    """
+    ASSETS = ('.js', '.css')
+    # Read back by the next builds (projects search indexes) or shared by all versions
+    KEPT = ('searchindex.js', 'doctool-versions.js')
+
+    def __init__(self, manager, minify=True, fingerprint=True):
+        """
+        Constructor
+
+        :param manager: The Project Manager instance
+        :type manager: IManager
+
+        :param minify: Whether the outputs are minified
+        :type minify: bool
+
+        :param fingerprint: Whether the assets are fingerprinted
+        :type fingerprint: bool
+        """
+        super(Fingerprint, self).__init__(manager)
+        self._minify = minify
+        self._fingerprint = fingerprint
+        self._assets = {}
+
+    @property
+    def assets(self):
+        """
+        Holds the fingerprinted assets of the output
+
+        :rtype: dict
+        :return: The output relative (POSIX) paths => fingerprinted ones
+        """
+        return self._assets
+
+    @property
+    def cache_policy_filename(self):
+        """
+        Holds the cache policy of the version (into the version output directory)
+
+        :rtype: str
+        :return: The cache policy filename
+        """
+        return self.manager.helper.absjoin(self.manager.output_dir, settings.CACHE_POLICY_FILENAME)
+
+    @classmethod
+    def output_files(cls, output_dir):
+        """
+        Lists the pages & the assets of the output, the fingerprinted assets superseded by a fresh copy
+        (e.g. the doctool scripts, written at each build) being removed
+
+        :param output_dir: The output directory
+        :type output_dir: str
+
+        :rtype: tuple
+        :return: The pages, the fresh assets & the fingerprinted ones (paths)
+        """
+        pages, assets, fingerprinted = [], [], []
+        for dirname, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.join(dirname, filename)
+                extension = os.path.splitext(filename)[1].lower()
+                if os.path.islink(path):
+                    continue
+                if extension == '.html':
+                    pages.append(path)
+                elif extension in cls.ASSETS:
+                    plain = FINGERPRINT_RE.sub('', filename)
+                    if plain == filename:
+                        assets.append(path)
+                    elif plain in filenames:
+                        os.remove(path)
+                    else:
+                        fingerprinted.append(path)
+        return pages, assets, fingerprinted
+
+    @staticmethod
+    def stylesheet_references(filenames, output_dir):
+        """
+        Lists the assets referenced by stylesheets (`@import`, `url()`), their name being kept
+
+        :param filenames: The assets paths
+        :type filenames: list
+
+        :param output_dir: The output directory
+        :type output_dir: str
+
+        :rtype: set
+        :return: The output relative (POSIX) paths of the referenced assets
+        """
+        references = set()
+        for filename in filenames:
+            if not filename.endswith('.css'):
+                continue
+            base = posixpath.dirname(os.path.relpath(filename, output_dir).replace(os.sep, '/'))
+            with open(filename, 'r', encoding='utf8', errors='replace') as handle:
+                for match in CSS_REFERENCE_RE.finditer(handle.read()):
+                    if ':' not in match.group('path'):
+                        references.add(resolve(match.group('path'), base))
+        return references
+
+    def setup(self):
+        """
+        Nothing to set up
+        """
+
+    def build(self):
+        """
+        Minifies the (staging) output & fingerprints its assets, in parallel
+        """
+        output_dir = self.manager.output_dir
+
+        def relative(path):
+            return os.path.relpath(path, output_dir).replace(os.sep, '/')
+
+        pages, assets, fingerprinted = self.output_files(output_dir)
+        report = Types.AttributeDict(pages=len(pages), assets=len(assets), fingerprinted=0, size=0, minified_size=0)
+        workers = os.cpu_count() or 1
+        # No error is caught, an output whose assets are renamed but not its pages is never published
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            candidates = set()
+            if self._fingerprint:
+                for references in executor.map(scan_page, pages, [output_dir] * len(pages), chunksize=32):
+                    candidates.update(references)
+                candidates -= self.stylesheet_references(assets + fingerprinted, output_dir)
+
+            flags = [relative(filename) in candidates and os.path.basename(filename) not in self.KEPT
+                     for filename in assets]
+            results = executor.map(process_asset, assets, [self._minify] * len(assets), flags, chunksize=32)
+            for filename, size, minified_size in results:
+                report.size += size
+                report.minified_size += minified_size
+                if FINGERPRINT_RE.search(filename):
+                    fingerprinted.append(filename)
+                    report.fingerprinted += 1
+
+            self._assets = {FINGERPRINT_RE.sub('', relative(filename)): relative(filename)
+                            for filename in fingerprinted}
+            results = executor.map(rewrite_page, pages, [output_dir] * len(pages),
+                                   [self._assets] * len(pages), [self._minify] * len(pages), chunksize=32)
+            for size, minified_size in results:
+                report.size += size
+                report.minified_size += minified_size
+
+        self.write_cache_policy()
+        logger.info('Fingerprint: %d page(s), %d asset(s) (%d fingerprinted), %d => %d byte(s)',
+                    report.pages, report.assets, report.fingerprinted, report.size, report.minified_size)
+        self._report = report
+
+    def write_cache_policy(self):
+        """
+        Writes the cache policy of the version, the fingerprinted assets being immutable
+        """
+        policy = dict(
+            immutable=settings.CACHE_CONTROL_IMMUTABLE,
+            default=settings.CACHE_CONTROL_DEFAULT,
+            files=sorted(self._assets.values()),
+        )
+        ProjectHelper.replace_file(self.cache_policy_filename, json.dumps(policy, indent=2))
+
+    def teardown(self):
+        """
+        Nothing to clean up, the superseded assets being removed at the next build
+        """
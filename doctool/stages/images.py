@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Stage optimizing the images of the outputs (lossless) & loading them lazily
+
+Graphviz, PlantUML & imgmath images (copied into each project `_images` directory) are recompressed
+losslessly by a processes pool:
+
+    * PNG: the image data is deflated again at the highest level (best of the zlib strategies),
+      the metadata chunks (text, time) being dropped
+    * JPEG: Huffman tables optimized & progressive encoding by `jpegtran` (if installed)
+
+The results are cached per content digest (see :data:`doctool.settings.DOCTOOL_IMAGES_CACHE_DIR`),
+an image (or its optimized copy) being processed once across builds, projects & versions.
+
+The pages images are then loaded lazily (`loading="lazy"`), their intrinsic size being set
+(`width` & `height`, the layout being reserved) unless explicitly sized.
+"""
+import os
+import re
+import zlib
+import shutil
+import struct
+import hashlib
+import logging
+import posixpath
+import subprocess
+from concurrent import futures
+
+try:
+    import imagesize
+except ImportError:
+    imagesize = None
+
+from doctool import errors
+from doctool import settings
+from doctool.helpers import Types
+from doctool.helpers import ProjectHelper
+from doctool.interfaces import IStage
+
+logger = logging.getLogger(__name__)
+
+JPEGTRAN = shutil.which('jpegtran')
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_METADATA_CHUNKS = (b'tEXt', b'zTXt', b'iTXt', b'tIME')
+IMG_RE = re.compile(r'<img\b[^>]*>', re.I)
+SRC_RE = re.compile(r'''\ssrc=(["'])(?P<src>[^"']+)\1''', re.I)
+SCRIPT_RE = re.compile(r'(<script\b.*?</script>)', re.S | re.I)
+
+
+def recompress_png(data):
+    """
+    Deflates the image data of a PNG again, at the highest level, the metadata chunks being dropped
+
+    :param data: The PNG content
+    :type data: bytes
+
+    :rtype: bytes or None
+    :return: The recompressed content, None if not a (still) PNG image
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+    chunks, idat, index = [], [], len(PNG_SIGNATURE)
+    try:
+        while index < len(data):
+            length, kind = struct.unpack('>I4s', data[index:index + 8])
+            body = data[index + 8:index + 8 + length]
+            index += length + 12
+            if kind == b'acTL':
+                # Animated, the frames being compressed separately
+                return None
+            if kind == b'IDAT':
+                if not idat:
+                    chunks.append((kind, None))
+                idat.append(body)
+            elif kind not in PNG_METADATA_CHUNKS:
+                chunks.append((kind, body))
+        raw = zlib.decompress(b''.join(idat))
+    except (struct.error, zlib.error):
+        return None
+
+    candidates = []
+    for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, zlib.MAX_WBITS, 9, strategy)
+        candidates.append(compressor.compress(raw) + compressor.flush())
+    compressed = min(candidates, key=len)
+
+    output = [PNG_SIGNATURE]
+    for kind, body in chunks:
+        body = compressed if body is None else body
+        output.append(struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body)))
+    return b''.join(output)
+
+
+def optimize_jpeg(data):
+    """
+    Optimizes the Huffman tables of a JPEG (progressive encoding), all markers (EXIF, ICC, ...) being kept
+
+    :param data: The JPEG content
+    :type data: bytes
+
+    :rtype: bytes or None
+    :return: The optimized content, None if `jpegtran` is not installed or failed
+    """
+    if not JPEGTRAN:
+        return None
+    try:
+        process = subprocess.run([JPEGTRAN, '-copy', 'all', '-optimize', '-progressive'],
+                                 input=data, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 check=True, timeout=60)
+    except (subprocess.SubprocessError, OSError):
+        return None
+    return process.stdout or None
+
+
+OPTIMIZERS = {
+    '.png': ('png', recompress_png),
+    '.jpg': ('jpeg', optimize_jpeg),
+    '.jpeg': ('jpeg', optimize_jpeg),
+}
+
+
+def _store(filename, content):
+    """
+    Writes a cache entry atomically (concurrent builds)
+
+    :param filename: The cache entry path
+    :type filename: str
+
+    :param content: The entry content
+    :type content: bytes
+    """
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+    with open(temporary, 'wb') as handle:
+        handle.write(content)
+    os.replace(temporary, filename)
+
+
+def optimize_image(filename, cache_dir):
+    """
+    Optimizes an image, unless already processed (processes pool worker)
+
+    The cache entry of a content holds its optimized copy, empty if it cannot be made smaller.
+
+    :param filename: The image path
+    :type filename: str
+
+    :param cache_dir: The images cache directory
+    :type cache_dir: str
+
+    :rtype: tuple
+    :return: The filename, whether it was cached & its sizes (before, after)
+    """
+    kind, optimizer = OPTIMIZERS[os.path.splitext(filename)[1].lower()]
+    with open(filename, 'rb') as handle:
+        data = handle.read()
+    digest = hashlib.sha256(data).hexdigest()
+    entry = os.path.join(cache_dir, kind, digest[:2], digest)
+
+    cached = os.path.isfile(entry)
+    if cached:
+        with open(entry, 'rb') as handle:
+            optimized = handle.read() or data
+    else:
+        optimized = optimizer(data) or data
+        if len(optimized) >= len(data):
+            optimized = data
+        _store(entry, b'' if optimized is data else optimized)
+        if optimized is not data:
+            # An optimized copy (e.g. published output) is not processed again
+            optimized_digest = hashlib.sha256(optimized).hexdigest()
+            _store(os.path.join(cache_dir, kind, optimized_digest[:2], optimized_digest), b'')
+
+    if len(optimized) < len(data):
+        temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+        with open(temporary, 'wb') as handle:
+            handle.write(optimized)
+        os.replace(temporary, filename)
+    return filename, cached, len(data), len(optimized)
+
+
+def image_size(filename):
+    """
+    Reads the intrinsic size of an image (file header)
+
+    :param filename: The image path
+    :type filename: str
+
+    :rtype: tuple or None
+    :return: The (width, height), None if unknown
+    """
+    if not imagesize or not os.path.isfile(filename):
+        return None
+    try:
+        width, height = imagesize.get(filename)
+    except (ValueError, OSError):
+        return None
+    if isinstance(width, int) and isinstance(height, int) and width > 0 and height > 0:
+        return width, height
+    return None
+
+
+def annotate_page(filename, output_dir):
+    """
+    Loads the images of a page lazily, setting their intrinsic size (processes pool worker)
+
+    :param filename: The page path
+    :type filename: str
+
+    :param output_dir: The output directory
+    :type output_dir: str
+
+    :rtype: int
+    :return: The number of annotated images
+    """
+    dirname, root = os.path.dirname(filename), os.path.join(os.path.normpath(output_dir), '')
+    try:
+        with open(filename, 'r', encoding='utf8') as handle:
+            content = handle.read()
+    except UnicodeDecodeError:
+        return 0
+
+    def has(tag, attribute):
+        return re.search(r'\s{0}\s*='.format(attribute), tag, re.I) is not None
+
+    annotated = [0]
+
+    def annotate(match):
+        tag = match.group(0)
+        attributes = []
+        if not has(tag, 'loading'):
+            attributes.append('loading="lazy"')
+        if not any(has(tag, attribute) for attribute in ('width', 'height', 'style')):
+            src = SRC_RE.search(tag)
+            reference = src.group('src') if src else ''
+            if reference and ':' not in reference and not reference.startswith('/'):
+                path = os.path.normpath(os.path.join(dirname, *posixpath.normpath(reference).split('/')))
+                size = image_size(path) if path.startswith(root) else None
+                if size:
+                    attributes.append('width="{0}" height="{1}"'.format(*size))
+        if not attributes:
+            return tag
+        annotated[0] += 1
+        closing = '/>' if tag.endswith('/>') else '>'
+        return '{0} {1}{2}'.format(tag[:-len(closing)].rstrip(), ' '.join(attributes),
+                                   ' />' if closing == '/>' else '>')
+
+    # Markup built by the inline scripts is left as is
+    parts = SCRIPT_RE.split(content)
+    parts[::2] = [IMG_RE.sub(annotate, part) for part in parts[::2]]
+    if annotated[0]:
+        ProjectHelper.replace_file(filename, ''.join(parts))
+    return annotated[0]
+
+
+class ImageOptimizer(IStage):
+    """
+    Optimizes the images of the outputs (lossless) & loads them lazily
+    """
+
+    @property
+    def cache_dir(self):
+        """
+        Holds the optimized images cache, shared by all builds
+
+        :rtype: str
+        :return: The cache directory
+        """
+        return settings.DOCTOOL_IMAGES_CACHE_DIR
+
+    @staticmethod
+    def output_files(output_dir):
+        """
+        Lists the images & the pages of the output
+
+        :param output_dir: The output directory
+        :type output_dir: str
+
+        :rtype: tuple
+        :return: The images & the pages paths
+        """
+        images, pages = [], []
+        for dirname, _, filenames in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.join(dirname, filename)
+                extension = os.path.splitext(filename)[1].lower()
+                if os.path.islink(path):
+                    continue
+                if extension in OPTIMIZERS:
+                    images.append(path)
+                elif extension == '.html':
+                    pages.append(path)
+        return images, pages
+
+    def setup(self):
+        """
+        Ensures the cache directory & checks the optional tools
+        """
+        self.manager.helper.createdirs(self.cache_dir)
+        if not JPEGTRAN:
+            logger.info('jpegtran is not installed, JPEG images are kept as is')
+        if not imagesize:
+            logger.info('The imagesize package is not installed, the images size is not set')
+
+    def build(self):
+        """
+        Optimizes the images of the (staging) output & annotates its pages, in parallel
+        """
+        output_dir = self.manager.output_dir
+        images, pages = self.output_files(output_dir)
+        report = Types.AttributeDict(images=len(images), optimized=0, cached=0, size=0, optimized_size=0,
+                                     pages=len(pages), annotated=0)
+        workers = os.cpu_count() or 1
+        with futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                results = executor.map(optimize_image, images, [self.cache_dir] * len(images), chunksize=8)
+                for _, cached, size, optimized_size in results:
+                    report.cached += cached
+                    report.optimized += optimized_size < size
+                    report.size += size
+                    report.optimized_size += optimized_size
+            except errors.SysErrors as exc:
+                logger.warning('Images optimization of %s failed (%s)', output_dir, exc)
+
+            try:
+                results = executor.map(annotate_page, pages, [output_dir] * len(pages), chunksize=32)
+                report.annotated = sum(results)
+            except errors.SysErrors as exc:
+                logger.warning('Images annotation of %s failed (%s)', output_dir, exc)
+
+        logger.info('Images: %d image(s), %d optimized (%d => %d byte(s)), %d cached, %d annotated',
+                    report.images, report.optimized, report.size, report.optimized_size, report.cached,
+                    report.annotated)
+        self._report = report
+
+    def teardown(self):
+        """
+        Nothing to clean up, the cache being shared by all builds
+        """
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Stage sharing the static assets of all outputs through a content-addressed store
+
+Every Sphinx output holds its own `_static` copy (theme, jQuery, fonts, doctool scripts, ...),
+duplicated across projects, versions & snapshots. Once built, each static asset is hard-linked to its
+content entry of the store (see :data:`doctool.settings.STATIC_STORE_DIRNAME`), next to the versions ::
+
+    OUTPUT/.static-store/3f/3f9c...e1
+    OUTPUT/1.0/user_doc/_static/jquery.js   -> same inode
+    OUTPUT/2.0/api_doc/_static/jquery.js    -> same inode
+
+.. note:: The outputs being built are fresh copies (see :meth:`doctool.managers.ProjectManager._seed_staging`),
+          hence a linked asset is never written in place.
+"""
+import os
+import hashlib
+import logging
+
+from doctool import errors
+from doctool import settings
+from doctool.helpers import Types
+from doctool.interfaces import IStage
+
+logger = logging.getLogger(__name__)
+
+
+class StaticStore(IStage):
+    """
+    Hard-links the static assets of the output to the content-addressed store
+    """
+    STATIC_DIRNAME = '_static'
+    CHUNK_SIZE = 1 << 16
+
+    @property
+    def store_dir(self):
+        """
+        Holds the store directory, shared by all the outputs of the output location
+
+        :rtype: str
+        :return: The store directory
+        """
+        return self.manager.helper.absjoin(self.manager.live_output_dir, '..', settings.STATIC_STORE_DIRNAME)
+
+    def store_path(self, digest):
+        """
+        Gets the store entry path of a content
+
+        :param digest: The content digest
+        :type digest: str
+
+        :rtype: str
+        :return: The store entry path
+        """
+        return os.path.join(self.store_dir, digest[:2], digest)
+
+    @classmethod
+    def file_digest(cls, filename):
+        """
+        Computes the digest of a file content
+
+        :param filename: The file path
+        :type filename: str
+
+        :rtype: str
+        :return: The content digest
+        """
+        digest = hashlib.sha256()
+        with open(filename, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(cls.CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def static_files(cls, output_dir):
+        """
+        Lists the static assets of an output (files within a `_static` directory)
+
+        :param output_dir: The output directory
+        :type output_dir: str
+
+        :rtype: generator
+        :return: The static assets paths
+        """
+        for dirname, dirnames, filenames in os.walk(output_dir):
+            parts = os.path.relpath(dirname, output_dir).split(os.sep)
+            if cls.STATIC_DIRNAME not in parts:
+                continue
+            for filename in filenames:
+                path = os.path.join(dirname, filename)
+                if not os.path.islink(path):
+                    yield path
+
+    @staticmethod
+    def link(source, destination):
+        """
+        Atomically replaces the destination by a hard link to the source
+
+        :param source: The linked file path
+        :type source: str
+
+        :param destination: The replaced file path
+        :type destination: str
+        """
+        temporary = '{0}.{1}.link'.format(destination, os.getpid())
+        os.link(source, temporary)
+        try:
+            os.replace(temporary, destination)
+        except errors.SysErrors:
+            os.unlink(temporary)
+            raise
+
+    def setup(self):
+        """
+        Ensures the store directory
+        """
+        self.manager.helper.createdirs(self.store_dir)
+
+    def build(self):
+        """
+        Links the static assets of the (staging) output to the store,
+        new contents being added to it
+        """
+        report = Types.AttributeDict(files=0, stored=0, bytes_saved=0, inodes_saved=0)
+        for filename in self.static_files(self.manager.output_dir):
+            report.files += 1
+            stored = self.store_path(self.file_digest(filename))
+            try:
+                if not os.path.exists(stored):
+                    self.manager.helper.createdirs(os.path.dirname(stored))
+                    try:
+                        os.link(filename, stored)
+                        report.stored += 1
+                        continue
+                    except FileExistsError:
+                        # Stored meanwhile by a concurrent build
+                        pass
+                if os.path.samefile(stored, filename):
+                    continue
+                size = os.path.getsize(filename)
+                self.link(stored, filename)
+                report.bytes_saved += size
+                report.inodes_saved += 1
+            except errors.SysErrors as exc:
+                # e.g. no hard link support, the asset is simply kept as is
+                logger.warning('Static asset %s not linked to the store (%s)', filename, exc)
+
+        logger.info('Static store: %d asset(s), %d new, %d inode(s) & %d byte(s) saved',
+                    report.files, report.stored, report.inodes_saved, report.bytes_saved)
+        self._report = report
+
+    def teardown(self):
+        """
+        Removes the store entries not linked by any output anymore (e.g. removed snapshots)
+        """
+        removed = 0
+        for dirname, _, filenames in os.walk(self.store_dir):
+            for filename in filenames:
+                path = os.path.join(dirname, filename)
+                try:
+                    if os.stat(path).st_nlink == 1:
+                        os.unlink(path)
+                        removed += 1
+                except errors.SysErrors as exc:
+                    logger.warning('Static store entry %s not removed (%s)', path, exc)
+        if removed:
+            logger.info('Static store: %d unused entry(ies) removed', removed)
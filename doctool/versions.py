@@ -0,0 +1,381 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+"""
+:summary: Versions manifest shared by all the versions of a documentation output
+
+Every build registers its version into **OUTPUT/doctool-versions.json** (see :data:`doctool.settings.VERSIONS_FILENAME`),
+along with its build time & size, **doctool-versions.js** (versions selector) being rendered from it ::
+
+    {
+        "versions": [
+            {"version": "2.0", "built": "2019-10-25T10:00:00Z", "size": 10485760},
+            {"version": "1.10", "built": "2019-10-20T10:00:00Z", "size": 9437184},
+            {"version": "1.9", "built": "2019-10-01T10:00:00Z", "size": 9437184}
+        ]
+    }
+
+Concurrent builds (of different versions) update it under an exclusive file lock, both files being atomically
+replaced. The retention policy (per minor version and/or overall size) is applied meanwhile, the pruned versions
+being moved aside (hidden) & removed in the background.
+"""
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+from doctool import settings
+from doctool.helpers import FileLock
+from doctool.helpers import ProjectHelper
+
+logger = logging.getLogger(__name__)
+
+
+def version_key(version):
+    """
+    Natural ordering key of a version (`1.10` > `1.9` > `1.9rc1` > `1.8.2`)
+
+    :param version: The version name
+    :type version: str
+
+    :return: The ordering key
+    :rtype: tuple
+    """
+    key = []
+    for part in re.findall(r'\d+|[^\d._-]+', version):
+        # Numbers win over the pre-release tags (rc, beta, ...)
+        key.append((2, int(part)) if part.isdigit() else (0, part.lower()))
+    # A version is newer than its pre-releases, yet older than its patches
+    key.append((1, ''))
+    return tuple(key)
+
+
+def minor_key(version):
+    """
+    Key grouping the versions of the same minor (`1.9`, `1.9.2` & `1.9rc1` are grouped)
+
+    :param version: The version name
+    :type version: str
+
+    :return: The grouping key
+    :rtype: tuple
+    """
+    return tuple(re.findall(r'\d+', version)[:2]) or (version,)
+
+
+class VersionsManifest(object):
+    """
+    Versions manifest of an output directory (its versions being its non-hidden entries)
+    """
+
+    def __init__(self, root, template=None, per_minor=0, max_size=0):
+        """
+        Constructor
+
+        :param root: The output root directory (holding the versions)
+        :type root: str
+
+        :param template: The versions selector template (`config/doctool-versions.js`), if any
+        :type template: jinja2.Template
+
+        :param per_minor: The number of versions kept per minor version (0, all of them)
+        :type per_minor: int
+
+        :param max_size: The size (bytes) the versions are kept under, the oldest ones being pruned (0, no limit)
+        :type max_size: int
+        """
+        self._root = root
+        self._template = template
+        self._per_minor = max(int(per_minor or 0), 0)
+        self._max_size = max(int(max_size or 0), 0)
+        self._records = []
+        self._cleaner = None
+
+    @property
+    def root(self):
+        """
+        Property returning the output root directory
+
+        :return: The output root directory
+        :rtype: str
+        """
+        return self._root
+
+    @property
+    def filename(self):
+        """
+        Property returning the versions manifest filename
+
+        :return: The versions manifest filename
+        :rtype: str
+        """
+        return ProjectHelper.absjoin(self._root, settings.VERSIONS_FILENAME)
+
+    @property
+    def js_filename(self):
+        """
+        Property returning the versions selector script filename
+
+        :return: The versions selector script filename
+        :rtype: str
+        """
+        return ProjectHelper.absjoin(self._root, 'doctool-versions.js')
+
+    @property
+    def lock_filename(self):
+        """
+        Property returning the lock filename
+
+        :return: The lock filename
+        :rtype: str
+        """
+        return ProjectHelper.absjoin(self._root, settings.VERSIONS_LOCK_FILENAME)
+
+    @property
+    def records(self):
+        """
+        Property returning the versions records, the newest first
+
+        :return: The versions records
+        :rtype: list
+        """
+        return self._records
+
+    @property
+    def versions(self):
+        """
+        Property returning the versions names, the newest first
+
+        :return: The versions names
+        :rtype: list
+        """
+        return [record['version'] for record in self._records]
+
+    @property
+    def cleaner(self):
+        """
+        Property returning the background thread removing the pruned versions (if any)
+
+        :return: The cleaner thread
+        :rtype: threading.Thread
+        """
+        return self._cleaner
+
+    @classmethod
+    def timestamp(cls, seconds=None):
+        """
+        Formats a time as an ISO 8601 (UTC) timestamp
+
+        :param seconds: The time (seconds since the epoch), now if not provided
+        :type seconds: float
+
+        :return: The timestamp
+        :rtype: str
+        """
+        return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(seconds))
+
+    @classmethod
+    def output_size(cls, directory):
+        """
+        Computes the size of an output (symbolic links are followed at the top level only)
+
+        :param directory: The output directory
+        :type directory: str
+
+        :return: The size (bytes)
+        :rtype: int
+        """
+        size = 0
+        for dirpath, _, filenames in os.walk(os.path.realpath(directory)):
+            for filename in filenames:
+                try:
+                    stat = os.lstat(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+                size += stat.st_size
+        return size
+
+    def _discover(self):
+        """
+        Lists the versions already published (no manifest yet)
+
+        :return: The versions records
+        :rtype: list
+        """
+        records = []
+        for name in os.listdir(self._root):
+            path = ProjectHelper.absjoin(self._root, name)
+            if name.startswith('.') or not os.path.isdir(path):
+                continue
+            records.append({'version': name,
+                            'built': self.timestamp(os.path.getmtime(path)),
+                            'size': self.output_size(path)})
+        return records
+
+    def load(self):
+        """
+        Loads the versions manifest, bootstrapped from the output directory if missing.
+        Versions removed by hand are dropped.
+
+        :return: The versions records, the newest first
+        :rtype: list
+        """
+        records = None
+        if os.path.isfile(self.filename):
+            try:
+                with open(self.filename, 'r', encoding='utf8') as handle:
+                    records = json.load(handle)['versions']
+            except (OSError, ValueError, KeyError) as exc:
+                logger.warning('Versions manifest %s could not be loaded (%s), rebuilding it', self.filename, exc)
+
+        if records is None:
+            records = self._discover()
+
+        records = [record for record in records
+                   if os.path.isdir(ProjectHelper.absjoin(self._root, record['version']))]
+        self._records = sorted(records, key=lambda record: version_key(record['version']), reverse=True)
+        return self._records
+
+    def save(self):
+        """
+        Writes the versions manifest & the versions selector script (atomically replaced)
+        """
+        ProjectHelper.replace_file(self.filename, json.dumps({'versions': self._records}, indent=2))
+        if self._template:
+            ProjectHelper.replace_file(self.js_filename,
+                                       self._template.render(available_versions=self.versions))
+
+    def retained(self, current):
+        """
+        Applies the retention policy
+
+        :param current: The version being published (never pruned)
+        :type current: str
+
+        :return: The versions to be pruned
+        :rtype: list
+        """
+        pruned = set()
+        if self._per_minor:
+            minors = {}
+            # The current version takes its place in its minor first
+            for record in sorted(self._records, key=lambda rec: rec['version'] != current):
+                kept = minors.setdefault(minor_key(record['version']), [])
+                if len(kept) < self._per_minor:
+                    kept.append(record['version'])
+                else:
+                    pruned.add(record['version'])
+
+        if self._max_size:
+            total = sum(record['size'] for record in self._records
+                        if record['version'] == current)
+            for record in self._records:
+                if record['version'] in pruned or record['version'] == current:
+                    continue
+                total += record['size']
+                if total > self._max_size:
+                    pruned.add(record['version'])
+                    total -= record['size']
+
+        return [record['version'] for record in self._records if record['version'] in pruned]
+
+    def register(self, version, output_dir=None):
+        """
+        Registers (or refreshes) a published version, under the lock:
+
+            * its build time & size are recorded
+            * the retention policy is applied
+            * the manifest & the versions selector script are written
+
+        :param version: The published version
+        :type version: str
+
+        :param output_dir: The version output (defaults to `root/version`)
+        :type output_dir: str
+
+        :return: The pruned versions
+        :rtype: list
+        """
+        output_dir = output_dir or ProjectHelper.absjoin(self._root, version)
+        record = {'version': version,
+                  'built': self.timestamp(),
+                  'size': self.output_size(output_dir)}
+
+        with FileLock(self.lock_filename):
+            self.load()
+            self._records = [rec for rec in self._records if rec['version'] != version]
+            self._records.append(record)
+            self._records.sort(key=lambda rec: version_key(rec['version']), reverse=True)
+
+            pruned = self.retained(version)
+            self._records = [rec for rec in self._records if rec['version'] not in pruned]
+            trash = [self._discard(name) for name in pruned]
+            self.save()
+
+        if pruned:
+            logger.info('Retention policy, pruning the version(s) %s', ', '.join(pruned))
+            self._cleaner = threading.Thread(target=self._clean, args=(trash,), name='doctool-versions-cleaner')
+            self._cleaner.start()
+        return pruned
+
+    def _discard(self, version):
+        """
+        Moves a pruned version (its output & snapshots) aside, into a hidden directory
+
+        :param version: The pruned version
+        :type version: str
+
+        :return: The hidden directory
+        :rtype: str
+        """
+        trash = ProjectHelper.absjoin(self._root, '.{0}.{1}.pruned'.format(version, os.getpid()))
+        ProjectHelper.createdirs(trash)
+
+        live = ProjectHelper.absjoin(self._root, version)
+        if os.path.lexists(live):
+            os.rename(live, ProjectHelper.absjoin(trash, version))
+
+        snapshots_dir = ProjectHelper.absjoin(self._root, settings.SNAPSHOTS_DIRNAME)
+        pattern = re.compile(r'^{0}-\d{{14}}-\d+(\.previous)?$'.format(re.escape(version)))
+        if os.path.isdir(snapshots_dir):
+            for name in os.listdir(snapshots_dir):
+                if pattern.match(name):
+                    os.rename(ProjectHelper.absjoin(snapshots_dir, name), ProjectHelper.absjoin(trash, name))
+        return trash
+
+    @staticmethod
+    def _clean(directories):
+        """
+        Removes the pruned versions directories (background)
+
+        :param directories: The directories to be removed
+        :type directories: list
+        """
+        for directory in directories:
+            ProjectHelper.rmtree(directory)
@@ -0,0 +1,85 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import tempfile
+import unittest
+
+from doctool.analysis import SourceAnalyzer
+
+
+class SourceAnalyzerTests(unittest.TestCase):
+
+    MODULES = {
+        'pkg': ('pkg/__init__.py', '"""Package"""\nfrom .core import Engine\n'),
+        'pkg.core': ('pkg/core.py', '"""Core"""\nimport os\n\nclass Engine(object):\n    pass\n'),
+        'pkg.text': ('pkg/text.py', '"""Text"""\nfrom pkg.core import Engine\n\nclass Text(Engine):\n    pass\n'),
+        'pkg.other': ('pkg/other.py', '"""Other"""\nfrom . import text\n'),
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.analyzer = SourceAnalyzer()
+        os.makedirs(os.path.join(self.tmp.name, 'pkg'))
+        for name, (filename, content) in self.MODULES.items():
+            self.write(filename, content)
+            self.analyzer.add(name, os.path.join(self.tmp.name, filename))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, filename, content):
+        with open(os.path.join(self.tmp.name, filename), 'w') as handle:
+            handle.write(content)
+
+    def test_imports(self):
+        self.assertListEqual(self.analyzer.imports('pkg'), ['pkg.core'])
+        self.assertListEqual(self.analyzer.imports('pkg.core'), [])
+        self.assertListEqual(self.analyzer.imports('pkg.text'), ['pkg', 'pkg.core'])
+        self.assertListEqual(self.analyzer.imports('pkg.other'), ['pkg', 'pkg.text'])
+
+    def test_key_follows_dependencies(self):
+        keys = {name: self.analyzer.key(name) for name in self.MODULES}
+
+        self.write('pkg/core.py', '"""Core"""\n\nclass Engine(dict):\n    pass\n')
+        analyzer = SourceAnalyzer()
+        for name, (filename, _) in self.MODULES.items():
+            analyzer.add(name, os.path.join(self.tmp.name, filename))
+
+        # Every module (transitively) importing the base class module is invalidated
+        for name in self.MODULES:
+            self.assertNotEqual(analyzer.key(name), keys[name])
+        self.assertEqual(analyzer.combined_key(['pkg.text', 'pkg.other']),
+                         analyzer.combined_key(['pkg.other', 'pkg.text']))
+
+    def test_key_unchanged(self):
+        self.write('pkg/standalone.py', '"""Standalone"""\n')
+        self.analyzer.add('pkg.standalone', os.path.join(self.tmp.name, 'pkg/standalone.py'))
+        key = self.analyzer.key('pkg.standalone')
+
+        self.write('pkg/core.py', '"""Core changed"""\n')
+        analyzer = SourceAnalyzer()
+        analyzer.add('pkg.standalone', os.path.join(self.tmp.name, 'pkg/standalone.py'))
+        analyzer.add('pkg.core', os.path.join(self.tmp.name, 'pkg/core.py'))
+        self.assertEqual(analyzer.key('pkg.standalone'), key)
@@ -22,10 +22,119 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import os
+import json
+import tempfile
 import unittest
 
+from unittest import mock
+
+from doctool import settings
+from doctool.builders import SphinxBuilder
+from doctool.helpers import Types
+from doctool.helpers import ProjectHelper
+
 
 class SphinxBuilderTests(unittest.TestCase):
 
     def test_something(self):
         self.assertEqual(True, True)
+
+    @staticmethod
+    def create_toctree():
+        deep = Types.TOCNode('deep', alias='Deep Section')
+        deep.children.append(Types.TOCNode('Deep Page', link='doc/sub/deep/page.html'))
+        group = Types.TOCNode('sub', alias='Sub Section')
+        group.children.extend([Types.TOCNode('Sub Page', link='doc/sub/page.html'), deep])
+        toctree = [Types.TOCNode('Intro', link='doc/intro.html'), group]
+        Types.TOCNode.identify(toctree, 'doc')
+        return toctree
+
+    def write_menu(self, output_dir, maxdepth):
+        manager = mock.Mock(output_dir=output_dir,
+                            data_context_builder=lambda **options: Types.AttributeDict(VERSION='1.0', **options))
+        builder = SphinxBuilder(manager, {}, ProjectHelper())
+        builder.write_menu(mock.Mock(id='doc', toctree=self.create_toctree(), maxdepth=maxdepth))
+
+        with open(os.path.join(output_dir, 'doc', settings.MENU_FILENAME)) as handle:
+            return handle.read()
+
+    def test_write_menu(self):
+        sub_id = Types.TOCNode.make_id('doc', 'group:/sub')
+        with tempfile.TemporaryDirectory() as output_dir:
+            menu = self.write_menu(output_dir, maxdepth=0)
+            self.assertFalse(os.path.exists(os.path.join(output_dir, 'doc', settings.MENU_CHUNKS_DIRNAME)))
+
+        self.assertIn('<a href="1.0/doc/intro.html">', menu)
+        self.assertIn('href="#collapse{0}sub"'.format(sub_id), menu)
+        self.assertIn('Sub Section', menu)
+        self.assertIn('<div id="collapse{0}sub" class="panel-collapse collapse">'.format(sub_id), menu)
+        self.assertIn('<a href="1.0/doc/sub/page.html">', menu)
+        self.assertIn('<a href="1.0/doc/sub/deep/page.html">', menu)
+        self.assertNotIn('data-chunk', menu)
+
+    def test_write_menu_chunks(self):
+        sub_id, deep_id = Types.TOCNode.make_id('doc', 'group:/sub'), Types.TOCNode.make_id('doc', 'group:/sub/deep')
+        with tempfile.TemporaryDirectory() as output_dir:
+            menu = self.write_menu(output_dir, maxdepth=1)
+            chunks_dirname = os.path.join(output_dir, 'doc', settings.MENU_CHUNKS_DIRNAME)
+            chunks = sorted(os.listdir(chunks_dirname))
+            with open(os.path.join(chunks_dirname, '{0}.html'.format(sub_id))) as handle:
+                chunk = handle.read()
+
+        self.assertIn('<a href="1.0/doc/intro.html">', menu)
+        self.assertIn('data-chunk="1.0/doc/_menu/{0}.html"'.format(sub_id), menu)
+        self.assertNotIn('doc/sub/page.html', menu)
+        self.assertListEqual(chunks, sorted(['{0}.html'.format(sub_id), '{0}.html'.format(deep_id)]))
+        self.assertIn('<a href="1.0/doc/sub/page.html">', chunk)
+        self.assertIn('data-chunk="1.0/doc/_menu/{0}.html"'.format(deep_id), chunk)
+        self.assertNotIn('doc/sub/deep/page.html', chunk)
+
+    def test_menus_digest(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            digests = []
+            for _ in range(2):
+                manager = mock.Mock(output_dir=output_dir, data_context_builder=Types.AttributeDict)
+                builder = SphinxBuilder(manager, {}, ProjectHelper())
+                builder.write_menu(mock.Mock(id='doc', toctree=self.create_toctree(), maxdepth=1))
+                digests.append(builder.menus_digest)
+
+        self.assertEqual(digests[0], digests[1])
+
+    def test_write_context(self):
+        guide = mock.Mock(id='guide', slug='guide', nav=True, icon=None, search=True, search_scopes=['guide'],
+                          layout=None, menu={'left': True, 'right': False}, first_link='guide/intro.html',
+                          is_api=0, home=False, src_dirname='/src/guide')
+        guide.name = 'Guide'
+        # A project restored from the bundle manifest (update mode)
+        api = Types.AttributeDict(id='api', name='API', slug='api', nav=False, icon='fa', search=False,
+                                  search_scopes=['api/a', 'api/b'], layout='3-columns',
+                                  menu={'left': True, 'right': True}, first_link='api/a/index.html',
+                                  is_api=1, home=False, src_dirname='/src/api')
+        with tempfile.TemporaryDirectory() as output_dir:
+            manager = mock.Mock(bundle_projects=[guide, api])
+            builder = SphinxBuilder(manager, {}, ProjectHelper())
+            filename = builder.write_context(output_dir, Types.AttributeDict(project_name='API',
+                                                                             metadata={'version': '1.0'}))
+            self.assertEqual(filename, os.path.join(output_dir, settings.CONTEXT_FILENAME))
+            with open(filename) as handle:
+                context = json.load(handle)
+
+        self.assertEqual(context['current_project_name'], 'API')
+        self.assertListEqual(context['paths'], ['/src/guide', '/src/api'])
+        self.assertListEqual([p['id'] for p in context['projects']], ['guide', 'api'])
+        self.assertDictEqual(context['projects'][1], dict(name='API', id='api', nav='False', icon='fa', slug='api',
+                                                          search=False, search_scopes=['api/a', 'api/b'],
+                                                          version='1.0', layout='3-columns',
+                                                          menu={'left': True, 'right': True},
+                                                          first_link='api/a/index.html', is_api=True, home=False))
+        self.assertEqual(context['projects'][0]['icon'], 'None')
+        self.assertFalse(context['projects'][0]['is_api'])
+
+    def test_combine_digests(self):
+        digests = {'doc': 'a' * 40, 'api': 'b' * 40}
+        combined = SphinxBuilder.combine_digests(digests)
+
+        self.assertEqual(len(combined), 12)
+        self.assertEqual(combined, SphinxBuilder.combine_digests(dict(reversed(list(digests.items())))))
+        self.assertNotEqual(combined, SphinxBuilder.combine_digests(dict(digests, api='c' * 40)))
@@ -0,0 +1,92 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import json
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from doctool.extensions import context
+
+
+class ContextTests(unittest.TestCase):
+
+    def create_data(self):
+        return {
+            'current_project_name': 'Guide',
+            'paths': ['/src/home', '/src/guide'],
+            'projects': [
+                {'name': 'Home', 'id': 'home', 'home': True, 'is_api': False, 'search': True},
+                {'name': 'Guide', 'id': 'guide', 'home': False, 'is_api': False, 'search': True},
+                {'name': 'API', 'id': 'api', 'home': False, 'is_api': True, 'search': False},
+            ]
+        }
+
+    def test_build_context(self):
+        ctx = context.build_context(self.create_data())
+
+        self.assertEqual(ctx['current_project_name'], 'Guide')
+        self.assertEqual(ctx['current_project']['id'], 'guide')
+        self.assertEqual(ctx['home_project']['id'], 'home')
+        self.assertListEqual([p['id'] for p in ctx['doc_projects']], ['guide'])
+        self.assertListEqual([p['id'] for p in ctx['api_doc_projects']], ['api'])
+        self.assertListEqual([p['id'] for p in ctx['searchable_projects']], ['guide'])
+        self.assertListEqual(ctx['paths'], ['/src/home', '/src/guide'])
+
+    def test_global_search(self):
+        data = self.create_data()
+        self.assertFalse(context.build_context(data)['global_search'])
+
+        # The disabled projects scopes are not searched
+        data['projects'][1]['search_scopes'] = ['guide']
+        data['projects'][2]['search_scopes'] = ['api/a', 'api/b']
+        self.assertFalse(context.build_context(data)['global_search'])
+
+        data['projects'][1]['search_scopes'] = ['guide/a', 'guide/b']
+        self.assertTrue(context.build_context(data)['global_search'])
+
+    def test_load_once(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, context.CONTEXT_FILENAME)
+            with open(filename, 'w') as handle:
+                json.dump(self.create_data(), handle)
+            app = mock.Mock(spec=['config'], config=mock.Mock(doctool_context=filename))
+
+            ctx = context.load(app)
+            os.remove(filename)
+            self.assertIs(context.load(app), ctx)
+
+        page = {'title': 'Intro'}
+        context.html_page_context(app, 'intro', 'page.html', page, None)
+        self.assertEqual(page['title'], 'Intro')
+        self.assertEqual(page['current_project']['id'], 'guide')
+        self.assertNotIn('paths', page)
+
+    def test_load_missing(self):
+        app = mock.Mock(spec=['config'], config=mock.Mock(doctool_context=''))
+        ctx = context.load(app)
+
+        self.assertIsNone(ctx['current_project'])
+        self.assertListEqual(ctx['doc_projects'], [])
@@ -0,0 +1,54 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import unittest
+import unittest.mock as mock
+
+from doctool.extensions import navigation
+
+
+class NavigationTests(unittest.TestCase):
+
+    def create_env(self, entries):
+        titles = {}
+        for docname, title in (('intro', 'Introduction'), ('sub/index', 'Sub Section'), ('sub/page', 'Sub Page')):
+            titles[docname] = mock.Mock(**{'astext.return_value': title})
+        return mock.Mock(all_docs=dict.fromkeys(titles), titles=titles, doctool_nav_entries=entries)
+
+    def test_resolve(self):
+        env = self.create_env({
+            'index': [(None, 'intro'), ('Explicit', 'sub/index'), ('Docs', 'https://example.org')],
+            'sub/index': [(None, 'sub/page'), (None, 'index'), (None, 'missing')],
+            'sub/page': [(None, 'sub/index')],
+        })
+        entries = navigation.resolve(env, 'index', {'index'})
+
+        self.assertListEqual(entries, [
+            {'docname': 'intro', 'title': 'Introduction'},
+            {'docname': 'sub/index', 'title': 'Explicit', 'children': [
+                {'docname': 'sub/page', 'title': 'Sub Page'},
+            ]},
+            {'url': 'https://example.org', 'title': 'Docs'},
+        ])
+        self.assertEqual(navigation.first_docname(entries), 'intro')
@@ -0,0 +1,106 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import io
+import os
+import json
+import tempfile
+import unittest
+
+from sphinx.application import Sphinx
+
+from doctool.extensions import virtual
+
+INDEX = '''Index
+=====
+
+.. toctree::
+
+    api/module
+'''
+
+
+class VirtualTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src_dir = os.path.join(self.tmp.name, 'src')
+        self.bundle = os.path.join(self.tmp.name, 'bundle.json')
+        os.makedirs(self.src_dir)
+        with open(os.path.join(self.src_dir, 'conf.py'), 'w') as handle:
+            handle.write("extensions = ['doctool.extensions.virtual']\n")
+
+    def write_bundle(self, sources, keys):
+        with open(self.bundle, 'w') as handle:
+            json.dump({'sources': sources, 'keys': keys}, handle)
+
+    def build(self):
+        """
+        Builds the HTML & returns the read documents
+        """
+        read = []
+        app = Sphinx(
+            self.src_dir, self.src_dir, os.path.join(self.tmp.name, 'html'),
+            os.path.join(self.tmp.name, 'doctrees'), 'html',
+            confoverrides={'doctool_virtual_sources': self.bundle},
+            status=io.StringIO(), warning=io.StringIO()
+        )
+        app.connect('source-read', lambda app, docname, source: read.append(docname))
+        app.build()
+        return sorted(read)
+
+    def read_output(self, *path):
+        with open(os.path.join(self.tmp.name, 'html', *path), encoding='utf8') as handle:
+            return handle.read()
+
+    def test_build(self):
+        module = 'Module\n======\n\nVirtual content\n'
+        self.write_bundle({'index': INDEX, 'api/module': module}, {'index': '', 'api/module': 'k1'})
+
+        self.assertListEqual(self.build(), ['api/module', 'index'])
+        self.assertIn('Virtual content', self.read_output('api', 'module.html'))
+        # Nothing is written into the sources, the placeholder not being copied as the page source
+        self.assertListEqual(sorted(os.listdir(self.src_dir)), ['conf.py'])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'html', '_sources', 'api')))
+
+        # Nothing changed
+        self.assertListEqual(self.build(), [])
+
+        # The documented modules changed
+        self.write_bundle({'index': INDEX, 'api/module': module}, {'index': '', 'api/module': 'k2'})
+        self.assertListEqual(self.build(), ['api/module'])
+
+        # A document is no longer generated
+        self.write_bundle({'index': 'Index\n=====\n'}, {'index': ''})
+        self.assertListEqual(self.build(), ['index'])
+        self.assertNotIn('Virtual content', self.read_output('index.html'))
+
+    def test_project(self):
+        project = virtual.VirtualProject(self.src_dir, ['.rst'], ['api/module'])
+        project.discover()
+
+        self.assertSetEqual(project.docnames, {'api/module'})
+        self.assertEqual(str(project.doc2path('api/module', False)), os.path.join('api', 'module.rst'))
+        self.assertEqual(str(project.doc2path('api/module', True)), virtual.PLACEHOLDER)
@@ -0,0 +1,112 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import sys
+import tempfile
+import unittest
+import importlib
+import importlib.machinery
+
+from doctool import finders
+from doctool.finders import ModuleIndex
+from doctool.finders import IndexedFinder
+
+
+class IndexedFinderTests(unittest.TestCase):
+
+    FILES = {
+        'first/idx_module.py': 'ORIGIN = "first"\n',
+        'first/idx_package/__init__.py': 'ORIGIN = "first"\n',
+        'first/idx_package/sub.py': 'ORIGIN = "first.sub"\n',
+        'first/idx_namespace/one.py': 'ORIGIN = "one"\n',
+        'second/idx_module.py': 'ORIGIN = "second"\n',
+        'second/idx_namespace/two.py': 'ORIGIN = "two"\n',
+        'second/not-a-module.py': '',
+        # Plain directory named as a standard library package
+        'second/xmlrpc/README': '',
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        for filename, content in self.FILES.items():
+            path = os.path.join(self.tmp.name, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as handle:
+                handle.write(content)
+        self.roots = [os.path.join(self.tmp.name, root) for root in ('first', 'second')]
+
+    def tearDown(self):
+        for name in list(sys.modules):
+            if name.startswith('idx_'):
+                del sys.modules[name]
+        self.tmp.cleanup()
+
+    def test_index(self):
+        index = ModuleIndex.build(self.roots + [os.path.join(self.tmp.name, 'missing')])
+        first, second = self.roots
+
+        self.assertSetEqual(set(index), {'idx_module', 'idx_package', 'idx_namespace', 'xmlrpc'})
+        self.assertEqual(index['idx_module'], (os.path.join(first, 'idx_module.py'), None))
+        self.assertEqual(index['idx_package'], (os.path.join(first, 'idx_package', '__init__.py'),
+                                                [os.path.join(first, 'idx_package')]))
+        self.assertEqual(index['idx_namespace'], (None, [os.path.join(first, 'idx_namespace'),
+                                                         os.path.join(second, 'idx_namespace')]))
+
+    def test_import(self):
+        finder = IndexedFinder(ModuleIndex.build(self.roots))
+        sys.meta_path.insert(0, finder)
+        try:
+            import idx_module
+            import idx_package.sub
+            import idx_namespace.one
+            import idx_namespace.two
+        finally:
+            sys.meta_path.remove(finder)
+
+        self.assertEqual(idx_module.ORIGIN, 'first')
+        self.assertEqual(idx_package.sub.ORIGIN, 'first.sub')
+        self.assertEqual((idx_namespace.one.ORIGIN, idx_namespace.two.ORIGIN), ('one', 'two'))
+        self.assertIsNone(finder.find_spec('idx_package.sub', path=['/elsewhere']))
+        self.assertIsNone(finder.find_spec('unknown'))
+
+    def test_shadowing(self):
+        finder = finders.install(self.roots)
+        saved = {name: module for name, module in sys.modules.items() if name.split('.')[0] == 'xmlrpc'}
+        try:
+            # Builtin & frozen importers first
+            position = sys.meta_path.index(finder)
+            self.assertIn(importlib.machinery.BuiltinImporter, sys.meta_path[:position])
+            self.assertLess(position, sys.meta_path.index(importlib.machinery.PathFinder))
+
+            # A regular package of sys.path wins over a namespace package of the roots
+            self.assertIsNone(finder.find_spec('xmlrpc'))
+            for name in saved:
+                del sys.modules[name]
+            client = importlib.import_module('xmlrpc.client')
+            self.assertTrue(hasattr(client, 'ServerProxy'))
+            self.assertIsNotNone(finder.find_spec('idx_namespace'))
+        finally:
+            sys.meta_path.remove(finder)
+            sys.modules.update(saved)
@@ -22,10 +22,247 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import os
+import tempfile
+import functools
 import unittest
+import unittest.mock as mock
+
+from doctool.helpers import Types
+from doctool.helpers import TitleCache
 
 
 class ProjectHelperTests(unittest.TestCase):
 
     def test_something(self):
         self.assertEqual(True, True)
+
+
+class PackageTrieTests(unittest.TestCase):
+
+    def create_trie(self):
+        trie = Types.PackageTrie()
+        trie.insert('pkg.sub_pkg', title='sub_pkg Package')
+        trie.insert('pkg', title='pkg Package')
+        trie.insert('pkg.core', title='core Package')
+        trie.insert('pkg.core', title='core Package')
+        return trie
+
+    def test_insert(self):
+        trie = self.create_trie()
+
+        self.assertIn('pkg.core', trie)
+        self.assertNotIn('pkg.other', trie)
+        self.assertNotIn('', trie)
+        self.assertEqual(len(trie), 3)
+        self.assertListEqual([node.docname for node in trie.documents()], ['pkg', 'pkg.core', 'pkg.sub_pkg'])
+
+    def test_toc_from_trie(self):
+        toctree = Types.TOCList(is_api=True, suffix='api', master_name='index', tree=self.create_trie()).build()
+
+        items = toctree.items
+        self.assertListEqual([item['name'] for item in items], ['pkg Package', 'pkg'])
+        self.assertEqual(items[0]['link'], 'api/pkg.html')
+        self.assertEqual(items[1]['alias'], 'Pkg')
+        self.assertListEqual([(child['name'], child['link']) for child in items[1]['children']],
+                             [('core Package', 'api/pkg.core.html'), ('sub_pkg Package', 'api/pkg.sub_pkg.html')])
+        self.assertEqual(toctree.first_link, 'api/pkg.html')
+
+
+class FromNavTests(unittest.TestCase):
+
+    def test_from_nav(self):
+        nav = {'first': 'intro', 'entries': [
+            {'docname': 'intro', 'title': 'Introduction'},
+            {'docname': 'sub/index', 'title': 'Sub Section', 'children': [{'docname': 'sub/page', 'title': 'Sub Page'}]},
+            {'docname': 'guide', 'title': 'Guide', 'children': [{'url': 'https://example.org', 'title': 'Docs'}]},
+        ]}
+        items, first_link = Types.TOCList.from_nav(nav, 'doc')
+        make_id = functools.partial(Types.TOCNode.make_id, 'doc')
+
+        self.assertEqual(first_link, 'doc/intro.html')
+        self.assertListEqual(items, [
+            {'name': 'Introduction', 'alias': '', 'hash': make_id('page:doc/intro.html'), 'children': [],
+             'link': 'doc/intro.html'},
+            {'name': 'sub', 'alias': 'Sub Section', 'hash': make_id('group:/sub'), 'children': [
+                {'name': 'Sub Page', 'alias': '', 'hash': make_id('page:doc/sub/page.html'), 'children': [],
+                 'link': 'doc/sub/page.html'},
+            ]},
+            {'name': 'guide', 'alias': 'Guide', 'hash': make_id('group:/guide'), 'children': [
+                {'name': 'Guide', 'alias': '', 'hash': make_id('page:doc/guide.html'), 'children': [],
+                 'link': 'doc/guide.html'},
+                {'name': 'Docs', 'alias': '', 'hash': make_id('page:https://example.org'), 'children': [],
+                 'link': 'https://example.org'},
+            ]},
+        ])
+
+
+class TOCNodeTests(unittest.TestCase):
+
+    def test_mapping(self):
+        group = Types.TOCNode('sub', alias='Sub Section')
+        group.children.append(Types.TOCNode('Page', link='doc/sub/page.html'))
+
+        self.assertNotIn('link', group)
+        self.assertEqual(group['children'][0]['link'], 'doc/sub/page.html')
+        self.assertEqual(group.get('link', ''), '')
+        self.assertEqual(eval(repr(group)), {'name': 'sub', 'alias': 'Sub Section', 'hash': '', 'children': [
+            {'name': 'Page', 'alias': '', 'hash': '', 'children': [], 'link': 'doc/sub/page.html'},
+        ]})
+        with self.assertRaises(AttributeError):
+            group.other = None
+
+    def test_identify(self):
+        first, second = Types.TOCNode('first'), Types.TOCNode('second')
+        first.children.append(Types.TOCNode('child', link='child.html'))
+        Types.TOCNode.identify([first, second], 'doc')
+
+        self.assertListEqual([node.hash for node in Types.TOCNode.walk([first, second])], [
+            Types.TOCNode.make_id('doc', 'group:/first'),
+            Types.TOCNode.make_id('doc', 'page:child.html'),
+            Types.TOCNode.make_id('doc', 'group:/second'),
+        ])
+
+        # IDs only depend on the node path, not on its position
+        moved = Types.TOCNode('first')
+        moved.children.append(Types.TOCNode('child', link='child.html'))
+        Types.TOCNode.identify([Types.TOCNode('new', link='new.html'), moved], 'doc')
+        self.assertListEqual([moved.hash, moved.children[0].hash], [first.hash, first.children[0].hash])
+
+    def test_frontier(self):
+        group, sub_group = Types.TOCNode('group'), Types.TOCNode('sub_group')
+        sub_group.children.append(Types.TOCNode('page', link='page.html'))
+        group.children.extend([Types.TOCNode('leaf', link='leaf.html'), sub_group])
+        nodes = [group, Types.TOCNode('other', link='other.html')]
+
+        self.assertListEqual(Types.TOCNode.frontier(nodes, 1), [group])
+        self.assertListEqual(Types.TOCNode.frontier(nodes, 2), [sub_group])
+        self.assertListEqual(Types.TOCNode.frontier(nodes, 3), [])
+        self.assertListEqual(Types.TOCNode.frontier(nodes, 0), [])
+
+
+class TOCTreeParserTests(unittest.TestCase):
+
+    DOCUMENTS = {
+        'index': '.. toctree::\n   :maxdepth: 2\n   :caption: Contents\n\n   intro\n   Guide <guide/index>\n   '
+                 'https://example.org\n\nText\n',
+        'intro': 'Intro\n=====\n',
+        'guide/index': '.. toctree::\n   :glob:\n\n   self\n   *\n   /intro\n',
+        'guide/a': '.. toctree::\n\n   b\n   ../guide/index\n',
+        'guide/b': '.. toctree::\n\n   a\n',
+        'guide/sub/c': '',
+    }
+
+    def create_parser(self):
+        reader = mock.Mock(side_effect=lambda docname: self.DOCUMENTS[docname].splitlines(True))
+        return Types.TOCTreeParser(reader, lambda docname: docname in self.DOCUMENTS, lambda: list(self.DOCUMENTS)), reader
+
+    def test_parse_lines(self):
+        toctrees = Types.TOCTreeParser.parse_lines(self.DOCUMENTS['index'].splitlines(True))
+
+        self.assertListEqual(toctrees, [{
+            'options': {'maxdepth': '2', 'caption': 'Contents'},
+            'entries': [(None, 'intro'), ('Guide', 'guide/index'), (None, 'https://example.org')],
+        }])
+        self.assertListEqual(Types.TOCTreeParser.parse_lines(['.. toctree::\n', '\n', '\tpage\n', 'page2\n']),
+                             [{'options': {}, 'entries': [(None, 'page')]}])
+
+    def test_resolve(self):
+        self.assertEqual(Types.TOCTreeParser.resolve('guide/index', 'a'), 'guide/a')
+        self.assertEqual(Types.TOCTreeParser.resolve('guide/index', '/intro.rst'), 'intro')
+        self.assertEqual(Types.TOCTreeParser.resolve('guide/a', '../intro'), 'intro')
+
+    def test_glob(self):
+        pattern = Types.TOCTreeParser.glob('guide/[!b]*')
+
+        self.assertTrue(pattern.match('guide/a'))
+        self.assertFalse(pattern.match('guide/b'))
+        self.assertFalse(pattern.match('guide/sub/c'))
+
+    def test_walk(self):
+        parser, reader = self.create_parser()
+
+        self.assertListEqual(list(parser.walk('index')), [
+            (None, 'intro'), ('Guide', 'guide/index'), (None, 'guide/a'), (None, 'guide/b'),
+        ])
+        # Each document is read once, cycles (a <-> b, a -> index) included
+        self.assertListEqual(sorted(call[0][0] for call in reader.call_args_list),
+                             ['guide/a', 'guide/b', 'guide/index', 'index', 'intro'])
+
+    def test_toc_list(self):
+        sources = {
+            'intro': 'Intro\n=====\n',
+            'guide/index': 'Guide\n=====\n\n.. toctree::\n\n   page\n',
+            'guide/page': 'Page\n====\n',
+        }
+        lines = ['.. toctree::\n', '\n', '   Start <intro>\n', '   guide/index\n', '   missing\n']
+        toctree = Types.TOCList(lines, src_dirname='/doc', suffix='doc', sources=sources).build()
+        make_id = functools.partial(Types.TOCNode.make_id, 'doc')
+
+        self.assertListEqual(toctree.items, [
+            {'name': 'Start', 'alias': '', 'hash': make_id('page:doc/intro.html'), 'children': [],
+             'link': 'doc/intro.html'},
+            {'name': 'guide', 'alias': 'Guide', 'hash': make_id('group:/guide'), 'children': [
+                {'name': 'Page', 'alias': '', 'hash': make_id('page:doc/guide/page.html'), 'children': [],
+                 'link': 'doc/guide/page.html'},
+            ]},
+        ])
+
+    def test_toc_list_nested_title(self):
+        sources = {
+            'sub/index': 'Sub Index Title\n===============\n',
+            'sub/page': 'Page Title\n==========\n',
+        }
+        lines = ['.. toctree::\n', '\n', '   sub/page\n']
+        toctree = Types.TOCList(lines, src_dirname='/doc', suffix='doc', sources=sources).build()
+
+        # The group takes the directory index title, the page keeps its own
+        group = toctree.items[0]
+        self.assertEqual(group['alias'], 'Sub Index Title')
+        self.assertEqual(group['children'][0]['name'], 'Page Title')
+
+
+class TitleCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.page = os.path.join(self.tmp.name, 'page.rst')
+        self.write('.. _label:\n\nPage Title\n==========\n\nContent\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, content):
+        with open(self.page, 'w') as handle:
+            handle.write(content)
+
+    def test_extract_title(self):
+        self.assertEqual(Types.TOCList.extract_title(['Title\n', '=====\n']), 'Title')
+        self.assertEqual(Types.TOCList.extract_title(['=====\n', 'Title\n', '=====\n']), 'Title')
+        self.assertIsNone(Types.TOCList.extract_title(['.. toctree::\n', '\n', '   page\n']))
+
+        lines = iter(['Title\n', '=====\n', '\n', 'Content\n', 'never read\n'])
+        self.assertEqual(Types.TOCList.extract_title(lines), 'Title')
+        self.assertListEqual(list(lines), ['never read\n'])
+
+    def test_get(self):
+        cache = TitleCache(os.path.join(self.tmp.name, 'cache', TitleCache.FILENAME))
+        extractor = mock.Mock(side_effect=Types.TOCList.read_title)
+
+        self.assertEqual(cache.get(self.page, extractor), 'Page Title')
+        self.assertEqual(cache.get(self.page, extractor), 'Page Title')
+        self.assertEqual(extractor.call_count, 1)
+
+        self.write('Another Title\n=============\n\nLonger content\n')
+        self.assertEqual(cache.get(self.page, extractor), 'Another Title')
+        self.assertEqual(extractor.call_count, 2)
+
+    def test_save(self):
+        filename = os.path.join(self.tmp.name, 'cache', TitleCache.FILENAME)
+        cache = TitleCache(filename)
+        cache.get(self.page, Types.TOCList.read_title)
+        cache.save()
+
+        extractor = mock.Mock()
+        self.assertEqual(TitleCache(filename).get(self.page, extractor), 'Page Title')
+        extractor.assert_not_called()
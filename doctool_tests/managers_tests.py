@@ -22,10 +22,203 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import os
+import json
+import tempfile
 import unittest
+import unittest.mock as mock
+
+from doctool import settings
+from doctool.helpers import Types
+from doctool.helpers import ProjectHelper
+from doctool.builders import SphinxBuilder
+from doctool.managers import ProjectManager
 
 
 class ProjectManagerTests(unittest.TestCase):
 
     def test_something(self):
         self.assertEqual(True, True)
+
+    def create_manager(self, dirname, **options):
+        conf_file = os.path.join(dirname, 'doctool_settings.json')
+        with open(conf_file, 'w') as handle:
+            json.dump(dict(OUTPUT='out', MASTER_TITLE='Docs', PROJECTS_MAP={}), handle)
+        manager = ProjectManager(conf_file=conf_file, version='1.0', projects=['doc'], interactive=0, **options)
+        manager._helper = ProjectHelper()
+        manager._builder = mock.Mock(menus_digests={'doc': 'new'})
+        return manager
+
+    def create_project(self, uid, rank, first_link):
+        project = mock.Mock(id=uid, rank=rank, home=False, is_api=0, nav=True, icon=None, slug=uid, search=True,
+                            search_scopes=[uid], layout=None, menu={'left': True, 'right': True},
+                            first_link=first_link, src_dirname='/src/{0}'.format(uid))
+        project.name = uid.title()
+        return project
+
+    def test_update_manifest(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname)
+            manager._ranked_projects = [self.create_project('doc', 2, 'doc/intro.html'),
+                                        self.create_project('api', 1, 'api/index.html')]
+            os.makedirs(manager.output_dir)
+            manager._write_manifest()
+
+            manager = self.create_manager(dirname, update=True)
+            manager._ranked_projects = [self.create_project('doc', 2, 'doc/start.html')]
+            manager._load_manifest()
+            bundle = manager.bundle_projects
+            manager._write_manifest()
+            with open(os.path.join(manager.output_dir, settings.MANIFEST_FILENAME)) as handle:
+                manifest = json.load(handle)
+
+        self.assertTrue(manager.is_update)
+        self.assertListEqual([p.id for p in bundle], ['api', 'doc'])
+        self.assertIsInstance(bundle[0], Types.AttributeDict)
+        self.assertIs(bundle[1], manager.ranked_projects[0])
+        self.assertEqual(manifest['version'], '1.0')
+        self.assertListEqual([(p['id'], p['first_link']) for p in manifest['projects']],
+                             [('api', 'api/index.html'), ('doc', 'doc/start.html')])
+        self.assertEqual(manifest['projects'][0]['src_dirname'], '/src/api')
+        # The restored projects keep their menus digest
+        self.assertEqual(manager.menus_digest, SphinxBuilder.combine_digests({'doc': 'new', 'api': ''}))
+
+    def test_bundle_without_manifest(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname, update=True)
+            manager._ranked_projects = [self.create_project('doc', 1, 'doc/intro.html')]
+            manager._load_manifest()
+
+        self.assertListEqual(manager.bundle_projects, manager.ranked_projects)
+        self.assertEqual(manager.menus_digest, SphinxBuilder.combine_digests({'doc': 'new'}))
+
+    def test_bundle_corrupt_manifest(self):
+        for content in ('{"version": "1.0", "projects": [{"id": "api", "ra', '[]', '{"projects": [{}]}'):
+            with tempfile.TemporaryDirectory() as dirname:
+                manager = self.create_manager(dirname, update=True)
+                manager._ranked_projects = [self.create_project('doc', 1, 'doc/intro.html')]
+                os.makedirs(manager.live_output_dir)
+                with open(os.path.join(manager.live_output_dir, settings.MANIFEST_FILENAME), 'w') as handle:
+                    handle.write(content)
+                with self.assertLogs('doctool.managers', level='WARNING'):
+                    manager._load_manifest()
+
+            self.assertListEqual(manager.bundle_projects, manager.ranked_projects)
+
+    def test_global_search_scopes(self):
+        class Written(Exception):
+            pass
+
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname)
+            api = self.create_project('api', 2, 'api/index.html')
+            api.is_api, api.search, api.search_scopes = 1, False, ['api/a', 'api/b']
+            manager._ranked_projects = [self.create_project('doc', 1, 'doc/intro.html'), api]
+            manager._write_search_index = mock.Mock(side_effect=Written)
+
+            # The scopes of a project whose search is disabled are not counted
+            manager._write_global_search()
+            manager._write_search_index.assert_not_called()
+
+            api.search = True
+            with self.assertRaises(Written):
+                manager._write_global_search()
+
+    def test_publish_snapshots(self):
+        stamps = iter('2020010100000{0}'.format(i) for i in range(10))
+        with tempfile.TemporaryDirectory() as dirname, \
+                mock.patch('doctool.managers.time.strftime', side_effect=lambda _: next(stamps)):
+            manager = self.create_manager(dirname)
+            manager.global_conf['SNAPSHOTS'] = 2
+            live = manager.live_output_dir
+            for build in range(3):
+                manager._stage()
+                self.assertTrue(manager.output_dir.endswith('.staging'))
+                with open(os.path.join(manager.output_dir, 'index.html'), 'w') as handle:
+                    handle.write('build {0}'.format(build))
+                manager._publish()
+
+                self.assertEqual(manager.output_dir, live)
+                with open(os.path.join(live, 'index.html')) as handle:
+                    self.assertEqual(handle.read(), 'build {0}'.format(build))
+
+            self.assertTrue(os.path.islink(live))
+            snapshots = sorted(os.listdir(manager.snapshots_dir))
+            target = os.path.basename(os.readlink(live))
+
+        # The published snapshot & the previous one are kept
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(target, snapshots[-1])
+
+    def test_prune_snapshots_prefix_version(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname)
+            manager.global_conf['SNAPSHOTS'] = 2
+            names = ['1.0-20200101000000-1', '1.0-20200102000000-1.previous', '1.0-20200103000000-1',
+                     '1.0-20200104000000-1.staging',
+                     '1.0-beta-20200101000000-1', '1.0-beta-20200109000000-1']
+            for name in names:
+                os.makedirs(os.path.join(manager.snapshots_dir, name))
+            manager._prune_snapshots()
+            snapshots = sorted(os.listdir(manager.snapshots_dir))
+
+        # Only the oldest 1.0 snapshots are removed, the 1.0-beta ones being another version
+        self.assertListEqual(snapshots, ['1.0-20200103000000-1', '1.0-20200104000000-1.staging',
+                                         '1.0-beta-20200101000000-1', '1.0-beta-20200109000000-1'])
+
+    def test_seed_staging_update(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname, update=True)
+            manager._ranked_projects = [self.create_project('doc', 1, 'doc/intro.html')]
+            manager._manifest['api'] = self.create_project('api', 2, 'api/index.html')
+            live = manager.live_output_dir
+            for relpath in ('index.html', 'doc/intro.html', 'api/index.html', 'api/_static/api.js'):
+                os.makedirs(os.path.dirname(os.path.join(live, relpath)), exist_ok=True)
+                with open(os.path.join(live, relpath), 'w') as handle:
+                    handle.write(relpath)
+            manager._stage()
+            manager._seed_staging()
+            staging = manager.output_dir
+
+            def same_file(relpath):
+                return os.path.samefile(os.path.join(live, relpath), os.path.join(staging, relpath))
+
+            # The project kept as is is hard linked, the rebuilt one & the bundle root are copied
+            self.assertTrue(same_file('api/index.html'))
+            self.assertTrue(same_file('api/_static/api.js'))
+            self.assertFalse(same_file('doc/intro.html'))
+            self.assertFalse(same_file('index.html'))
+
+    def test_discard_staging(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname)
+            manager._stage()
+            staging = manager.output_dir
+            manager._discard_staging()
+
+            self.assertFalse(os.path.exists(staging))
+            self.assertFalse(os.path.exists(manager.live_output_dir))
+            self.assertEqual(manager.output_dir, manager.live_output_dir)
+
+    def test_run_failure(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            manager = self.create_manager(dirname)
+            manager.setup = manager._stage
+
+            def build():
+                # The configurations are generated, the cache locked, then Sphinx fails
+                self.assertTrue(os.path.isdir(manager.conf_dir))
+                manager.lock_cache()
+                manager.lock_cache()
+                raise RuntimeError('Sphinx failed')
+
+            manager.build = build
+            with mock.patch.object(settings, 'DOCTOOL_CONF_DIR', os.path.join(dirname, 'conf')), \
+                    mock.patch.object(settings, 'DOCTOOL_CACHE_DIR', os.path.join(dirname, 'cache')):
+                with self.assertRaises(RuntimeError):
+                    manager.run()
+            self.assertIsNone(manager._cache_lock)
+            self.assertTrue(os.path.isfile(os.path.join(dirname, 'cache', 'locks', '1.0.lock')))
+            self.assertListEqual(os.listdir(manager.snapshots_dir), [])
+            self.assertListEqual(os.listdir(os.path.join(dirname, 'conf')), [])
+            self.assertEqual(manager.output_dir, manager.live_output_dir)
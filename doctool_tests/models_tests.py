@@ -22,6 +22,8 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import os
+import tempfile
 import unittest
 import unittest.mock as mock
 
@@ -29,6 +31,7 @@ from doctool_tests.common import Helper
 from doctool.models import Theme
 from doctool.models import RSTProject
 from doctool.models import CodeProject
+from doctool.models import CodeProjectShard
 from doctool.helpers import Types
 
 
@@ -54,8 +57,9 @@ class RSTProjectTests(unittest.TestCase):
     @mock.patch('doctool.partials.os.path.isdir')
     @mock.patch('doctool.partials.os.path.exists')
     @mock.patch('doctool.models.RSTProject.load')
+    @mock.patch('doctool.models.RSTProject.load_nav', return_value=False)
     @mock.patch('doctool.models.RSTProject.build_toctree')
-    def test_build(self, mocked_build_toctree, mocked_load, mocked_exists, mocked_isdir):
+    def test_build(self, mocked_build_toctree, mocked_load_nav, mocked_load, mocked_exists, mocked_isdir):
         dir2parse = '/documentation/path'
         project, manager, configuration = self.create_project(mocked_load, dir2parse=dir2parse)
 
@@ -66,6 +70,24 @@ class RSTProjectTests(unittest.TestCase):
 
         mocked_build_toctree.assert_called_once_with(project.src_dirname)
 
+    @mock.patch('doctool.partials.os.path.isdir')
+    @mock.patch('doctool.partials.os.path.exists')
+    @mock.patch('doctool.models.RSTProject.load')
+    @mock.patch('doctool.models.RSTProject.load_nav', return_value=True)
+    @mock.patch('doctool.models.RSTProject.build_toctree')
+    def test_build_from_previous_nav(self, mocked_build_toctree, mocked_load_nav, mocked_load, mocked_exists,
+                                     mocked_isdir):
+        project, manager, configuration = self.create_project(mocked_load, dir2parse='/documentation/path')
+
+        mocked_isdir.return_value = True
+        mocked_exists.return_value = True
+
+        project.build()
+
+        # The index tree is not parsed again
+        mocked_load_nav.assert_called_once_with()
+        mocked_build_toctree.assert_not_called()
+
     @mock.patch('doctool.partials.os.path.isdir')
     @mock.patch('doctool.partials.os.path.exists')
     @mock.patch('doctool.models.RSTProject.load')
@@ -76,9 +98,25 @@ class RSTProjectTests(unittest.TestCase):
         mocked_isdir.return_value = True
         mocked_exists.return_value = True
 
-        self.assertNotIn(project.conf_filename, manager.garbage)
         project.teardown()
-        self.assertIn(project.conf_filename, manager.garbage)
+        # The configuration is generated out of the sources, nothing is left to clean
+        self.assertListEqual(manager.garbage, [])
+
+    @mock.patch('doctool.partials.os.path.isdir')
+    @mock.patch('doctool.partials.os.path.exists')
+    @mock.patch('doctool.models.RSTProject.load')
+    def test_conf_out_of_sources(self, mocked_load, mocked_exists, mocked_isdir):
+        dir2parse = '/documentation/path'
+        project, manager, configuration = self.create_project(mocked_load, dir2parse=dir2parse)
+        manager.configure_mock(conf_dir='/cache/conf/build-1', output_dir='/out',
+                               data_context_builder=Types.AttributeDict)
+        manager.helper.absjoin.side_effect = lambda *parts: '/'.join(parts)
+        mocked_isdir.return_value = True
+        mocked_exists.return_value = True
+
+        self.assertEqual(project.conf_filename, '/cache/conf/build-1/{0}/conf.py'.format(project.id))
+        self.assertEqual(project.data.conf_dir, '/cache/conf/build-1/{0}'.format(project.id))
+        self.assertFalse(project.conf_filename.startswith(project.src_dirname))
 
 
 class CodeProjectTests(unittest.TestCase):
@@ -133,6 +171,18 @@ class CodeProjectTests(unittest.TestCase):
         name = CodeProject.makename(package, module, sub=sub)
         self.assertEqual(name, 'package.module')
 
+    @mock.patch('doctool.partials.os.path.isdir')
+    @mock.patch('doctool.partials.os.path.exists')
+    @mock.patch('doctool.models.CodeProject.load')
+    def test_cache_key_by_version(self, mocked_load, mocked_exists, mocked_isdir):
+        project, manager, configuration = self.create_project(mocked_load, dir2parse='/src/path')
+
+        manager.version = '1.0'
+        key = project.cache_key
+        self.assertEqual(project.cache_key, key)
+        manager.version = '2.0'
+        self.assertNotEqual(project.cache_key, key)
+
     @mock.patch('doctool.partials.os.path.isdir')
     @mock.patch('doctool.partials.os.path.exists')
     @mock.patch('doctool.models.CodeProject.load')
@@ -153,6 +203,7 @@ class CodeProjectTests(unittest.TestCase):
                 html_static_paths=[],
                 output_dir=project.helper.absjoin(manager.output_dir, project.id),
                 source_dir=project.src_dirname,
+                conf_dir=project.conf_dirname,
                 output_format=project._output_format,
                 extra_paths=project.extra_paths,
                 metadata=project.metadata,
@@ -172,3 +223,62 @@ class CodeProjectTests(unittest.TestCase):
 
         self.assertDictEqual(project.data, expected_data)
         manager.data_context_builder.assert_called_once_with(**data)
+
+    @mock.patch('doctool.models.CodeProject.load')
+    def test_plan_shards(self, mocked_load):
+        with tempfile.TemporaryDirectory() as src:
+            for package, modules in (('alpha', 3), ('beta', 1), ('gamma', 2), ('_private', 1), ('tests', 1)):
+                os.makedirs(os.path.join(src, package))
+                for name in ['__init__'] + ['mod{0}'.format(i) for i in range(modules - 1)]:
+                    with open(os.path.join(src, package, '{0}.py'.format(name)), 'w') as handle:
+                        handle.write('"""doc"""')
+
+            project, manager, configuration = self.create_project(mocked_load, dir2parse=src)
+
+            self.assertDictEqual(dict(project.top_level_packages()), {'alpha': 3, 'beta': 1, 'gamma': 2})
+            self.assertListEqual(project.plan_shards(), [])
+
+            project._shard_by = 'package'
+            self.assertListEqual(project.plan_shards(), [['alpha'], ['beta'], ['gamma']])
+
+            project._shard_size = 4
+            self.assertListEqual(project.plan_shards(), [['alpha', 'beta'], ['gamma']])
+
+    @mock.patch('doctool.models.CodeProject.load')
+    def test_shard_in_shard(self, mocked_load):
+        src = '/src/path'
+        project, manager, configuration = self.create_project(mocked_load, dir2parse=src)
+        manager.configure_mock(garbage=[])
+
+        with mock.patch('doctool.partials.os.path.isdir', return_value=True), \
+                mock.patch('doctool.partials.os.path.exists', return_value=True):
+            shard = CodeProjectShard(project, ['alpha'], with_root=True)
+            other = CodeProjectShard(project, ['beta', 'gamma'])
+
+            self.assertEqual(shard.id, '{0}/alpha'.format(project.id))
+            self.assertEqual(other.id, '{0}/beta-gamma'.format(project.id))
+            self.assertIs(shard.parent, project)
+
+            root = shard.src_dirname
+            self.assertTrue(shard.in_shard(root))
+            self.assertFalse(other.in_shard(root))
+            self.assertTrue(shard.in_shard(root + '/alpha/sub'))
+            self.assertFalse(shard.in_shard(root + '/beta'))
+            self.assertTrue(other.in_shard(root + '/gamma'))
+
+        project._shards = [shard, other]
+        self.assertListEqual(project.search_scopes, [shard.id, other.id])
+
+    @mock.patch('doctool.models.CodeProject.load')
+    def test_write_file_in_memory(self, mocked_load):
+        project, manager, configuration = self.create_project(mocked_load, dir2parse='/src/path')
+        project._output_dir = '/virtual/api'
+
+        project.write_file('mypkg', 'mypkg package\n=============\n')
+        project.write_file('mypkg.core', 'mypkg.core module\n=================\n\n.. automodule:: mypkg.core\n')
+        self.assertListEqual(list(project.sources), ['mypkg', 'mypkg.core'])
+
+        toc = Types.TOCList(src_dirname=project.output_dir, sources=project.sources)
+        self.assertTrue(toc._exists('/virtual/api/mypkg.core.rst'))
+        self.assertFalse(toc._exists('/virtual/api/other.rst'))
+        self.assertEqual(toc._get_title_from_rst_file('/virtual/api/mypkg.core.rst'), 'mypkg.core module')
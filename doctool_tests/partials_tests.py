@@ -106,6 +106,7 @@ class PartialProjectTests(unittest.TestCase):
             master_doc='index',
             output_dir=project.helper.absjoin(manager.output_dir, project.id),
             source_dir=project.src_dirname,
+            conf_dir=project.conf_dirname,
             output_format=project._output_format,
             extra_paths=project.extra_paths,
             metadata=project.metadata,
@@ -128,13 +129,13 @@ class PartialProjectTests(unittest.TestCase):
         mocked_isfile.return_value = True
         project, manager, configuration = self.create_project(mocked_load, dir2parse=dir2parse)
 
-        with mock.patch("builtins.open", mock.mock_open(read_data='.. toctree:\n\n\tanother')) as mock_file:
+        with mock.patch("builtins.open", mock.mock_open(read_data='.. toctree::\n\n\tanother')) as mock_file:
             project.build_toctree(dir2parse)
 
         self.assertListEqual(project.toctree, [
             {
                 'children': [],
-                'hash': 0,
+                'hash': Types.TOCNode.make_id('documentation-path', 'page:documentation-path/another.html'),
                 'link': 'documentation-path/another.html',
                 'name': '@doctool.missing.title',
                 'alias': ''
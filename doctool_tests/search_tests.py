@@ -0,0 +1,169 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import json
+import base64
+import tempfile
+import unittest
+
+from doctool.helpers import Types
+from doctool.search import BloomFilter
+from doctool.search import SearchIndex
+
+
+class SearchIndexTests(unittest.TestCase):
+
+    def write_index(self, dirname, scope, index):
+        filename = os.path.join(dirname, scope, 'searchindex.js')
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as handle:
+            handle.write('Search.setIndex({0})'.format(json.dumps(index)))
+        return filename
+
+    def test_merge(self):
+        guide = Types.AttributeDict(id='guide', name='Guide')
+        api = Types.AttributeDict(id='api', name='API')
+
+        search_index = SearchIndex()
+        search_index.add(guide, 'guide', {
+            'docnames': ['index', 'intro'],
+            'titles': ['Guide', 'Introduction'],
+            'terms': {'engin': 1, 'introduct': [0, 1]},
+            'titleterms': {'introduct': 1},
+        })
+        search_index.add(api, 'api/core', {
+            'docnames': ['index'],
+            'titles': ['Core'],
+            'terms': {'engin': 0},
+            'titleterms': {},
+            'objects': {'core': [[0, 0, 1, '', 'Engine'], [0, 1, 0, '-', 'engine']]},
+            'objnames': {'0': ['py', 'class', 'Python class'], '1': ['py', 'module', 'Python module']},
+        })
+        search_index.add(api, 'api/utils', {
+            'docnames': ['index'],
+            'titles': ['Utils'],
+            'terms': {'engin': [0]},
+        })
+
+        data = search_index.data
+        self.assertEqual(data['projects'], [{'id': 'guide', 'name': 'Guide'}, {'id': 'api', 'name': 'API'}])
+        self.assertEqual(data['docs'], [[0, 'guide/index.html', 'Guide'],
+                                        [0, 'guide/intro.html', 'Introduction'],
+                                        [1, 'api/core/index.html', 'Core'],
+                                        [1, 'api/utils/index.html', 'Utils']])
+        self.assertEqual(data['terms'], {'engin': [1, 2, 3], 'introduct': [0, 1]})
+        self.assertEqual(data['titleterms'], {'introduct': [1]})
+        self.assertEqual(data['objects'], [[2, 'core.Engine', '#core.Engine', 'Python class', 1],
+                                           [2, 'core.engine', '#module-core.engine', 'Python module', 0]])
+
+    def test_read_write(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = self.write_index(dirname, 'guide', {'docnames': ['index'], 'titles': ['Guide'],
+                                                           'terms': {}, 'titleterms': {'guid': 0}})
+            index = SearchIndex.read(filename)
+            self.assertEqual(index['titleterms'], {'guid': 0})
+            self.assertIsNone(SearchIndex.read(os.path.join(dirname, 'missing', 'searchindex.js')))
+
+            project = Types.AttributeDict(id='guide', name='Guide')
+            search_index = SearchIndex()
+            search_index.add(project, 'guide', index)
+            output = os.path.join(dirname, 'doctool-searchindex.js')
+            search_index.write(output)
+            with open(output) as handle:
+                content = handle.read()
+            self.assertTrue(content.startswith('var doctoolSearchIndex = {'))
+            self.assertEqual(json.loads(content[content.index('{'):content.rindex(';')])['titleterms'],
+                             {'guid': [0]})
+
+    def create_index(self):
+        search_index = SearchIndex()
+        search_index.add(Types.AttributeDict(id='api', name='API'), 'api', {
+            'docnames': ['index', 'core'],
+            'titles': ['API', 'Core'],
+            'terms': {'engin': 1, 'packag': [0, 1]},
+            'titleterms': {'core': 1},
+            'objects': {'mypkg.core': [[1, 0, 1, '', 'Engine']]},
+            'objnames': {'0': ['py', 'class', 'Python class']},
+        })
+        return search_index
+
+    def test_bloom_filter(self):
+        bloom_filter = BloomFilter(100)
+        words = ['word{0}'.format(index) for index in range(100)]
+        for word in words:
+            bloom_filter.add(word)
+        self.assertTrue(all(word in bloom_filter for word in words))
+        false_positives = sum('other{0}'.format(index) in bloom_filter for index in range(1000))
+        self.assertLess(false_positives, 50)
+        self.assertEqual(bloom_filter.size, 1000)
+        # Mirrored by doctool-search.js
+        self.assertEqual(BloomFilter.fnv1a(b'packag', BloomFilter.seeds[0]), 1786137756)
+
+    def test_shards(self):
+        shards = self.create_index().shards(prefix_length=2)
+        self.assertEqual(sorted(shards), ['co', 'en', 'my', 'pa'])
+        self.assertEqual(shards['en']['terms'], {'engin': [1]})
+        self.assertEqual(shards['co']['titleterms'], {'core': [1]})
+        # An object is found by any of its names
+        for key in ('my', 'co', 'en'):
+            self.assertEqual(shards[key]['objects'], [[1, 'mypkg.core.Engine', '#mypkg.core.Engine', 'Python class', 1]])
+
+    def test_write_sharded(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'doctool-searchindex.js')
+            shards_dir = os.path.join(dirname, '_search')
+            os.makedirs(shards_dir)
+            stale = os.path.join(shards_dir, 'stale.json')
+            open(stale, 'w').close()
+
+            self.assertEqual(self.create_index().write_sharded(filename, shards_dir, workers=2), 4)
+            with open(filename) as handle:
+                content = handle.read()
+            dictionary = json.loads(content[content.index('{'):content.rindex(';')])
+            self.assertEqual(dictionary['docs'], {'count': 2, 'chunk': 1000})
+            self.assertEqual(dictionary['shards']['en']['file'], '656e.json')
+            self.assertFalse(os.path.exists(stale))
+
+            bloom_filter = BloomFilter(0)
+            bloom_filter._size = dictionary['shards']['pa']['bloom']['bits']
+            bloom_filter._bits = bytearray(base64.b64decode(dictionary['shards']['pa']['bloom']['data']))
+            self.assertIn('packag', bloom_filter)
+            self.assertIn('pack', bloom_filter)
+
+            with open(os.path.join(shards_dir, 'docs-0.json')) as handle:
+                self.assertEqual(json.load(handle), [[0, 'api/index.html', 'API'], [0, 'api/core.html', 'Core']])
+            with open(os.path.join(shards_dir, '656e.json')) as handle:
+                self.assertEqual(json.load(handle)['terms'], {'engin': [1]})
+
+    def test_read_all(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            filenames = [self.write_index(dirname, scope, {'docnames': [scope]}) for scope in ('a', 'b', 'c')]
+            filenames.append(os.path.join(dirname, 'missing', 'searchindex.js'))
+            indexes = SearchIndex.read_all(filenames, workers=2)
+            self.assertEqual([index and index['docnames'] for index in indexes], [['a'], ['b'], ['c'], None])
+
+
+if __name__ == '__main__':
+    unittest.main()
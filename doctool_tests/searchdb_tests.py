@@ -0,0 +1,137 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import json
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from doctool import settings
+from doctool.helpers import Types
+from doctool.search import SearchIndex
+from doctool.searchdb import SearchDatabase
+from doctool.server import SearchServer
+
+PAGE = """<html><head><script>var ignored = 'script';</script></head><body>
+<div id="sidebar">Sidebar navigation</div>
+<section id="{anchor}"><h1>{title}<a class="headerlink" href="#{anchor}">¶</a></h1>
+<p>{body}</p>
+<dl><dt id="{anchor}.Widget">class Widget</dt><dd>Runs things.</dd></dl>
+</section>
+</body></html>"""
+
+
+class SearchDatabaseTests(unittest.TestCase):
+
+    def create_database(self, dirname):
+        pages = {
+            'guide/index.html': ('Guide', 'guide', 'Welcome to the user guide, the engine is started here.'),
+            'api/core.html': ('Core', 'core', 'The core package holds the engine.'),
+            'api/utils.html': ('Utils', 'utils', 'Helpers & text utilities.'),
+        }
+        for url, (title, anchor, body) in pages.items():
+            filename = os.path.join(dirname, *url.split('/'))
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename, 'w', encoding='utf8') as handle:
+                handle.write(PAGE.format(title=title, anchor=anchor, body=body))
+
+        search_index = SearchIndex()
+        search_index.add(Types.AttributeDict(id='guide', name='Guide'), 'guide',
+                         {'docnames': ['index', 'missing'], 'titles': ['Guide', 'Missing']})
+        search_index.add(Types.AttributeDict(id='api', name='API'), 'api',
+                         {'docnames': ['core', 'utils'], 'titles': ['Core', 'Utils']})
+
+        database = SearchDatabase(os.path.join(dirname, settings.SEARCH_DATABASE_FILENAME))
+        self.assertEqual(database.build(search_index, dirname, workers=2), 3)
+        return database
+
+    def test_page_text(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            filename = os.path.join(dirname, 'page.html')
+            with open(filename, 'w', encoding='utf8') as handle:
+                handle.write(PAGE.format(title='Core', anchor='core', body='The <em>core</em> package.'))
+            text, anchors = SearchDatabase.page_text(filename)
+            self.assertEqual(text, 'Core The core package. class Widget Runs things.')
+            self.assertEqual(anchors, 'core core.Widget')
+            self.assertIsNone(SearchDatabase.page_text(os.path.join(dirname, 'missing.html')))
+
+    def test_match_expression(self):
+        self.assertEqual(SearchDatabase.match_expression('engine run'), '"engine"* AND "run"*')
+        self.assertEqual(SearchDatabase.match_expression('Engine.run -text'), '("Engine run"*) NOT "text"')
+        self.assertEqual(SearchDatabase.match_expression('" OR -text'), '("OR"*) NOT "text"')
+        self.assertEqual(SearchDatabase.match_expression('" -text'), '')
+
+    def test_query(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            database = self.create_database(dirname)
+
+            groups = database.query('engine')
+            self.assertEqual([group['project']['id'] for group in groups], ['api', 'guide'])
+            self.assertEqual([result['url'] for result in groups[0]['results']], ['api/core.html'])
+            self.assertIn('engine', groups[0]['results'][0]['descr'])
+            # Stemmed & prefix matches
+            self.assertEqual(len(database.query('utility')[0]['results']), 1)
+            self.assertEqual(database.query('engine', scope='guide')[0]['project']['name'], 'Guide')
+            self.assertEqual(database.query('engine -guide')[0]['project']['id'], 'api')
+            self.assertEqual(database.query('sidebar'), [])
+
+    def test_server(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.create_database(os.path.join(root, '1.0'))
+            server = SearchServer(('127.0.0.1', 0), root)
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                url = 'http://127.0.0.1:{0}'.format(server.server_address[1])
+                with urllib.request.urlopen(url + '/search?q=engine&scope=api') as response:
+                    self.assertEqual(response.headers['Access-Control-Allow-Origin'], '*')
+                    content = json.loads(response.read().decode('utf8'))
+                self.assertEqual(content['version'], '1.0')
+                self.assertEqual([group['project']['id'] for group in content['groups']], ['api'])
+
+                for path in ('/search?q=engine&version=2.0', '/search?q=engine&version=..', '/other'):
+                    with self.assertRaises(urllib.error.HTTPError) as context:
+                        urllib.request.urlopen(url + path)
+                    self.assertEqual(context.exception.code, 404)
+                    context.exception.close()
+
+                # A corrupt database is answered with a JSON error
+                with open(os.path.join(root, '1.0', settings.SEARCH_DATABASE_FILENAME), 'wb') as handle:
+                    handle.write(b'not a database' * 100)
+                with self.assertRaises(urllib.error.HTTPError) as context:
+                    urllib.request.urlopen(url + '/search?q=engine')
+                self.assertEqual(context.exception.code, 503)
+                self.assertIn('error', json.loads(context.exception.read().decode('utf8')))
+                context.exception.close()
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
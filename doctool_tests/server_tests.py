@@ -0,0 +1,135 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import gzip
+import json
+import tempfile
+import threading
+import unittest
+import http.client
+from concurrent import futures
+
+from doctool import settings
+from doctool.server import PreviewServer
+
+
+class PreviewServerTests(unittest.TestCase):
+
+    def setUp(self):
+        self._root = tempfile.TemporaryDirectory()
+        self.root = self._root.name
+        self.write('1.0/index.html', '<p>index</p>')
+        self.write('1.0/doctool.0123456789.js', 'var doctool = 1;' * 100)
+        self.write('1.0/doctool-search.js', 'var search = 1;')
+        with gzip.open(os.path.join(self.root, '1.0/doctool.0123456789.js.gz'), 'wt') as handle:
+            handle.write('var doctool = 1;' * 100)
+        self.write('1.0/' + settings.CACHE_POLICY_FILENAME, json.dumps({'files': ['doctool.0123456789.js']}))
+        self.server = PreviewServer(('127.0.0.1', 0), self.root, workers=4)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self._root.cleanup()
+
+    def write(self, relpath, content):
+        filename = os.path.join(self.root, relpath)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as handle:
+            handle.write(content)
+
+    def request(self, path, connection=None, **headers):
+        opened = connection or http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        try:
+            opened.request('GET', path, headers=headers)
+            response = opened.getresponse()
+            return response, response.read()
+        finally:
+            if not connection:
+                opened.close()
+
+    def test_file(self):
+        response, body = self.request('/1.0/doctool-search.js')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b'var search = 1;')
+        self.assertEqual(response.getheader('Content-Type'), 'text/javascript; charset=utf-8')
+        self.assertEqual(response.getheader('Cache-Control'), settings.CACHE_CONTROL_DEFAULT)
+        self.assertEqual(response.getheader('Accept-Ranges'), 'bytes')
+        self.assertIsNone(response.getheader('Content-Encoding'))
+
+        response, body = self.request('/1.0/')
+        self.assertEqual((response.status, body), (200, b'<p>index</p>'))
+        response, _ = self.request('/1.0/missing.html')
+        self.assertEqual(response.status, 404)
+
+    def test_validators(self):
+        response, _ = self.request('/1.0/doctool-search.js')
+        etag, modified = response.getheader('ETag'), response.getheader('Last-Modified')
+        response, body = self.request('/1.0/doctool-search.js', **{'If-None-Match': etag})
+        self.assertEqual((response.status, body), (304, b''))
+        response, _ = self.request('/1.0/doctool-search.js', **{'If-Modified-Since': modified})
+        self.assertEqual(response.status, 304)
+        response, _ = self.request('/1.0/doctool-search.js', **{'If-None-Match': '"other"'})
+        self.assertEqual(response.status, 200)
+
+    def test_range(self):
+        response, body = self.request('/1.0/doctool-search.js', Range='bytes=4-9')
+        self.assertEqual((response.status, body), (206, b'search'))
+        self.assertEqual(response.getheader('Content-Range'), 'bytes 4-9/15')
+        response, body = self.request('/1.0/doctool-search.js', Range='bytes=-2')
+        self.assertEqual((response.status, body), (206, b'1;'))
+        response, body = self.request('/1.0/doctool-search.js', Range='bytes=20-')
+        self.assertEqual(response.status, 416)
+        # Stale range, the whole file is sent
+        response, body = self.request('/1.0/doctool-search.js', Range='bytes=4-9', **{'If-Range': '"other"'})
+        self.assertEqual((response.status, body), (200, b'var search = 1;'))
+
+    def test_precompressed(self):
+        response, body = self.request('/1.0/doctool.0123456789.js', **{'Accept-Encoding': 'br;q=0, gzip'})
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertEqual(response.getheader('Vary'), 'Accept-Encoding')
+        self.assertEqual(response.getheader('Cache-Control'), settings.CACHE_CONTROL_IMMUTABLE)
+        self.assertEqual(gzip.decompress(body), b'var doctool = 1;' * 100)
+        response, body = self.request('/1.0/doctool.0123456789.js', **{'Accept-Encoding': 'gzip;q=0'})
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        self.assertEqual(body, b'var doctool = 1;' * 100)
+
+    def test_concurrent(self):
+        connection = http.client.HTTPConnection(*self.server.server_address, timeout=5)
+        # Keep-alive connection
+        for _ in range(3):
+            response, body = self.request('/1.0/doctool-search.js', connection=connection)
+            self.assertEqual(body, b'var search = 1;')
+        connection.close()
+
+        with futures.ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(lambda _: self.request('/1.0/index.html')[1], range(64)))
+        self.assertEqual(results, [b'<p>index</p>'] * 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
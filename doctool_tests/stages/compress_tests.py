@@ -0,0 +1,127 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import gzip
+import json
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from doctool import settings
+from doctool.helpers import ProjectHelper
+from doctool.stages import compress
+from doctool.stages.compress import Precompress
+
+
+class PrecompressTests(unittest.TestCase):
+
+    def write(self, root, relpath, content):
+        filename = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as handle:
+            handle.write(content)
+        return filename
+
+    def create_stage(self, dirname, version):
+        output_dir = os.path.join(dirname, version)
+        manager = mock.Mock(helper=ProjectHelper(), output_dir=output_dir, live_output_dir=output_dir, version=version)
+        stage = Precompress(manager)
+        stage.setup()
+        return stage
+
+    def test_build(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            stage = self.create_stage(dirname, '1.0')
+            output_dir = stage.manager.output_dir
+            page = self.write(output_dir, 'doc/index.html', '<p>documentation</p>' * 100)
+            script = self.write(output_dir, 'doc/_static/doctool.js', 'var doctool = 1;' * 100)
+            tiny = self.write(output_dir, 'doc/tiny.json', '{}')
+            image = self.write(output_dir, 'doc/_static/logo.png', 'png' * 100)
+            orphan = self.write(output_dir, 'doc/removed.html.gz', 'gz')
+            stage.build()
+
+            with gzip.open(page + '.gz', 'rt') as handle:
+                self.assertEqual(handle.read(), '<p>documentation</p>' * 100)
+            self.assertTrue(os.path.isfile(script + '.gz'))
+            # Not smaller, not written
+            self.assertFalse(os.path.exists(tiny + '.gz'))
+            self.assertFalse(os.path.exists(image + '.gz'))
+            self.assertFalse(os.path.exists(orphan))
+            self.assertEqual((stage.report.files, stage.report.compressed, stage.report.skipped), (3, 3, 0))
+            self.assertFalse(os.path.exists(stage.manifest_filename))
+
+            stage.teardown()
+            self.assertEqual(stage.manifest_filename,
+                             os.path.join(dirname, settings.PRECOMPRESS_DIRNAME, '1.0.json'))
+            with open(stage.manifest_filename) as handle:
+                manifest = json.load(handle)
+            self.assertEqual(manifest['doc/tiny.json'][1], [])
+            self.assertEqual(manifest['doc/index.html'][1], ['.gz'] + (['.br'] if compress.brotli else []))
+
+            # Unchanged files keep their sidecars
+            self.write(output_dir, 'doc/index.html', '<p>modified</p>' * 100)
+            stage = self.create_stage(dirname, '1.0')
+            stage.build()
+            self.assertEqual((stage.report.compressed, stage.report.skipped), (1, 2))
+            with gzip.open(page + '.gz', 'rt') as handle:
+                self.assertEqual(handle.read(), '<p>modified</p>' * 100)
+
+            # A missing sidecar is written again
+            os.remove(script + '.gz')
+            stage = self.create_stage(dirname, '1.0')
+            stage.build()
+            self.assertTrue(os.path.isfile(script + '.gz'))
+
+    def test_downloads_kept(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            stage = self.create_stage(dirname, '1.0')
+            output_dir = stage.manager.output_dir
+            archive = self.write(output_dir, 'doc/_downloads/0123abcd/data.tar.gz', 'archive')
+            download = self.write(output_dir, 'doc/_downloads/4567cdef/notes.txt.gz', 'notes')
+            stage.build()
+            self.assertTrue(os.path.isfile(archive))
+            self.assertTrue(os.path.isfile(download))
+
+            # Unless recorded by the last build
+            os.makedirs(os.path.dirname(stage.manifest_filename))
+            with open(stage.manifest_filename, 'w') as handle:
+                json.dump({'doc/_downloads/4567cdef/notes.txt': ['digest', ['.gz']]}, handle)
+            stage.build()
+            self.assertTrue(os.path.isfile(archive))
+            self.assertFalse(os.path.exists(download))
+
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            first = self.write(dirname, 'a/doctool.js', 'var doctool = 1;' * 100)
+            second = self.write(dirname, 'b/doctool.js', 'var doctool = 1;' * 100)
+            compress.compress_file(first)
+            compress.compress_file(second)
+            # Identical sidecars (shared by the static store)
+            with open(first + '.gz', 'rb') as handle, open(second + '.gz', 'rb') as other:
+                self.assertEqual(handle.read(), other.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import json
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from doctool import settings
+from doctool.helpers import ProjectHelper
+from doctool.stages import fingerprint
+from doctool.stages.fingerprint import Fingerprint
+
+PAGE = """<!DOCTYPE html>
+<html>
+    <head>
+        <!-- Sphinx assets -->
+        <link rel="stylesheet" href="_static/theme.css?v=1a2b" />
+        <script src="_static/doctools.js"></script>
+        <script src="https://cdn.example.com/lib.js"></script>
+    </head>
+    <body>
+        <pre>
+    indented   code
+        </pre>
+        <script>
+            loadScript(versionBaseURI + 'doctool.js');
+            loadScript(documentationBaseURI + 'doctool-versions.js');
+        </script>
+    </body>
+</html>
+"""
+
+
+class MinifyTests(unittest.TestCase):
+
+    def test_minify_js(self):
+        source = """/*! License */
+// A comment
+var url = 'http://example.com'; // The URL
+var pattern = /[/"]+/g, ratio = width / 2 / height;
+/* block
+   comment */
+function test(value) {
+    return /^\\d+$/.test(value) ?   "a // b" : `c /* d */`;
+}
+"""
+        self.assertEqual(fingerprint.minify_js(source), """/*! License */
+var url = 'http://example.com';
+var pattern = /[/"]+/g, ratio = width / 2 / height;
+function test(value) {
+return /^\\d+$/.test(value) ? "a // b" : `c /* d */`;
+}
+""")
+
+    def test_minify_css(self):
+        source = """/* Theme */
+@import url("basic.css");
+a:hover ,  .nav > li   :first-child {
+    color : red;
+    content: "  a  ";
+    width: calc(100% - 2px);
+}
+"""
+        self.assertEqual(fingerprint.minify_css(source),
+                         '@import url("basic.css");a:hover,.nav>li :first-child{color :red;'
+                         'content:"  a  ";width:calc(100% - 2px)}\n')
+
+    def test_minify_html(self):
+        minified = fingerprint.minify_html(PAGE)
+        self.assertNotIn('Sphinx assets', minified)
+        self.assertIn('<pre>\n    indented   code\n        </pre>', minified)
+        self.assertIn("\n            loadScript(versionBaseURI + 'doctool.js');", minified)
+        self.assertIn('<html>\n<head>\n<link', minified)
+
+
+class FingerprintTests(unittest.TestCase):
+
+    def write(self, root, relpath, content):
+        filename = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as handle:
+            handle.write(content)
+        return filename
+
+    def read(self, root, relpath):
+        with open(os.path.join(root, relpath)) as handle:
+            return handle.read()
+
+    def create_stage(self, output_dir, **kwargs):
+        manager = mock.Mock(helper=ProjectHelper(), output_dir=output_dir)
+        stage = Fingerprint(manager, **kwargs)
+        stage.setup()
+        return stage
+
+    def test_build(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.write(output_dir, 'doc/index.html', PAGE)
+            self.write(output_dir, 'doc/sub/page.html', '<link href="../_static/theme.css" />')
+            self.write(output_dir, 'doc/_static/theme.css', '@import url("basic.css");\nbody {\n    margin: 0;\n}\n')
+            self.write(output_dir, 'doc/_static/basic.css', 'p { margin: 0; }')
+            self.write(output_dir, 'doc/_static/doctools.js', '// Doctools\nvar doctools = 1;\n')
+            self.write(output_dir, 'doc/_static/unused.js', '// Unused\nvar unused = 1;\n')
+            self.write(output_dir, 'doctool.js', 'var doctool = 1;\n')
+            self.write(output_dir, 'doctool-versions.js', 'var versions = [];\n')
+            stage = self.create_stage(output_dir)
+            stage.build()
+
+            assets = stage.assets
+            self.assertEqual(sorted(assets), ['doc/_static/doctools.js', 'doc/_static/theme.css', 'doctool.js'])
+            self.assertRegex(assets['doctool.js'], r'^doctool\.[0-9a-f]{10}\.js$')
+            self.assertEqual(self.read(output_dir, assets['doc/_static/doctools.js']), 'var doctools = 1;\n')
+            self.assertEqual(self.read(output_dir, assets['doc/_static/theme.css']),
+                             '@import url("basic.css");body{margin:0}\n')
+            # Imported by a stylesheet, not referenced, or shared by the versions
+            for relpath in ('doc/_static/basic.css', 'doc/_static/unused.js', 'doctool-versions.js'):
+                self.assertTrue(os.path.isfile(os.path.join(output_dir, relpath)))
+            for relpath in assets:
+                self.assertFalse(os.path.exists(os.path.join(output_dir, relpath)))
+
+            page = self.read(output_dir, 'doc/index.html')
+            theme = os.path.basename(assets['doc/_static/theme.css'])
+            self.assertIn('href="_static/{0}?v=1a2b"'.format(theme), page)
+            self.assertIn('src="_static/{0}"'.format(os.path.basename(assets['doc/_static/doctools.js'])), page)
+            self.assertIn('src="https://cdn.example.com/lib.js"', page)
+            self.assertIn("versionBaseURI + '{0}'".format(assets['doctool.js']), page)
+            self.assertIn("documentationBaseURI + 'doctool-versions.js'", page)
+            self.assertEqual(self.read(output_dir, 'doc/sub/page.html'),
+                             '<link href="../_static/{0}" />\n'.format(theme))
+
+            with open(os.path.join(output_dir, settings.CACHE_POLICY_FILENAME)) as handle:
+                policy = json.load(handle)
+            self.assertEqual(policy['immutable'], settings.CACHE_CONTROL_IMMUTABLE)
+            self.assertEqual(policy['files'], sorted(assets.values()))
+
+            # Next build, the doctool scripts are written again, the untouched pages referencing the former ones
+            former = assets['doctool.js']
+            self.write(output_dir, 'doctool.js', 'var doctool = 2;\n')
+            stage = self.create_stage(output_dir)
+            stage.build()
+            self.assertNotEqual(stage.assets['doctool.js'], former)
+            self.assertFalse(os.path.exists(os.path.join(output_dir, former)))
+            self.assertEqual(stage.assets['doc/_static/theme.css'], assets['doc/_static/theme.css'])
+            self.assertIn("versionBaseURI + '{0}'".format(stage.assets['doctool.js']),
+                          self.read(output_dir, 'doc/index.html'))
+
+    def test_build_disabled_fingerprint(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.write(output_dir, 'doc/index.html', PAGE)
+            self.write(output_dir, 'doc/_static/doctools.js', '// Doctools\nvar doctools = 1;\n')
+            stage = self.create_stage(output_dir, fingerprint=False)
+            stage.build()
+            self.assertEqual(stage.assets, {})
+            self.assertEqual(self.read(output_dir, 'doc/_static/doctools.js'), 'var doctools = 1;\n')
+            self.assertIn('src="_static/doctools.js"', self.read(output_dir, 'doc/index.html'))
+
+
+if __name__ == '__main__':
+    unittest.main()
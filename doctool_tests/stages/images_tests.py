@@ -0,0 +1,130 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import zlib
+import struct
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from doctool import settings
+from doctool.helpers import ProjectHelper
+from doctool.stages import images
+from doctool.stages.images import ImageOptimizer
+
+
+def chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def make_png(width, height, extra=b''):
+    raw = b''.join(b'\x00' + bytes((x + y) % 256 for x in range(width * 3)) for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (images.PNG_SIGNATURE + chunk(b'IHDR', header) + extra + chunk(b'tEXt', b'Software\x00dot') +
+            chunk(b'IDAT', zlib.compress(raw, 0)) + chunk(b'IEND', b''))
+
+
+def png_pixels(data):
+    index, idat = len(images.PNG_SIGNATURE), b''
+    while index < len(data):
+        length, kind = struct.unpack('>I4s', data[index:index + 8])
+        if kind == b'IDAT':
+            idat += data[index + 8:index + 8 + length]
+        index += length + 12
+    return zlib.decompress(idat)
+
+
+class ImagesTests(unittest.TestCase):
+
+    def write(self, root, relpath, content):
+        filename = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'wb' if isinstance(content, bytes) else 'w') as handle:
+            handle.write(content)
+        return filename
+
+    def test_recompress_png(self):
+        data = make_png(40, 20)
+        recompressed = images.recompress_png(data)
+        self.assertLess(len(recompressed), len(data))
+        self.assertEqual(png_pixels(recompressed), png_pixels(data))
+        self.assertNotIn(b'tEXt', recompressed)
+        self.assertIsNone(images.recompress_png(b'GIF89a'))
+        # Animated
+        self.assertIsNone(images.recompress_png(make_png(4, 4, extra=chunk(b'acTL', b'\x00' * 8))))
+
+    def test_optimize_image(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            cache_dir = os.path.join(dirname, 'cache')
+            data = make_png(40, 20)
+            filename = self.write(dirname, 'out/_images/graph.png', data)
+
+            _, cached, size, optimized_size = images.optimize_image(filename, cache_dir)
+            self.assertFalse(cached)
+            self.assertEqual((size, os.path.getsize(filename)), (len(data), optimized_size))
+            self.assertLess(optimized_size, size)
+
+            # Its optimized copy is known
+            self.assertEqual(images.optimize_image(filename, cache_dir)[1:], (True, optimized_size, optimized_size))
+            # The same (original) content is not processed again
+            self.write(dirname, 'out/_images/graph.png', data)
+            with mock.patch.dict(images.OPTIMIZERS, {'.png': ('png', mock.Mock(side_effect=AssertionError))}):
+                self.assertEqual(images.optimize_image(filename, cache_dir)[1:], (True, size, optimized_size))
+
+    def test_annotate_page(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            self.write(output_dir, 'doc/_images/graph.png', make_png(40, 20))
+            page = self.write(output_dir, 'doc/sub/page.html', '\n'.join([
+                '<img alt="graph" src="../_images/graph.png" />',
+                '<img src="../_images/graph.png" width="10">',
+                '<img src="https://example.com/logo.png" loading="eager">',
+                '<script>var tag = \'<img src="x.png">\';</script>',
+            ]))
+            self.assertEqual(images.annotate_page(page, output_dir), 2)
+            with open(page) as handle:
+                self.assertEqual(handle.read().splitlines(), [
+                    '<img alt="graph" src="../_images/graph.png" loading="lazy" width="40" height="20" />',
+                    '<img src="../_images/graph.png" width="10" loading="lazy">',
+                    '<img src="https://example.com/logo.png" loading="eager">',
+                    '<script>var tag = \'<img src="x.png">\';</script>',
+                ])
+            self.assertEqual(images.annotate_page(page, output_dir), 0)
+
+    def test_build(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            output_dir = os.path.join(dirname, '1.0')
+            image = self.write(output_dir, 'doc/_images/graph.png', make_png(40, 20))
+            self.write(output_dir, 'doc/index.html', '<img src="_images/graph.png">')
+            with mock.patch.object(settings, 'DOCTOOL_IMAGES_CACHE_DIR', os.path.join(dirname, 'cache')):
+                manager = mock.Mock(helper=ProjectHelper(), output_dir=output_dir)
+                stage = ImageOptimizer(manager)
+                stage.setup()
+                stage.build()
+            self.assertEqual((stage.report.images, stage.report.optimized, stage.report.annotated), (1, 1, 1))
+            self.assertEqual(stage.report.optimized_size, os.path.getsize(image))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from doctool import settings
+from doctool.helpers import ProjectHelper
+from doctool.stages.static import StaticStore
+
+
+class StaticStoreTests(unittest.TestCase):
+
+    def write(self, root, relpath, content):
+        filename = os.path.join(root, relpath)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'w') as handle:
+            handle.write(content)
+        return filename
+
+    def create_stage(self, dirname, version):
+        output_dir = os.path.join(dirname, version)
+        manager = mock.Mock(helper=ProjectHelper(), output_dir=output_dir, live_output_dir=output_dir)
+        stage = StaticStore(manager)
+        stage.setup()
+        return stage
+
+    def test_build(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            stage = self.create_stage(dirname, '1.0')
+            jquery = self.write(stage.manager.output_dir, 'doc/_static/jquery.js', 'jquery')
+            other = self.write(stage.manager.output_dir, 'api/_static/jquery.js', 'jquery')
+            theme = self.write(stage.manager.output_dir, 'api/_static/css/theme.css', 'body {}')
+            page = self.write(stage.manager.output_dir, 'doc/index.html', 'jquery')
+            stage.build()
+
+            self.assertTrue(os.path.samefile(jquery, other))
+            self.assertTrue(os.path.samefile(jquery, stage.store_path(StaticStore.file_digest(jquery))))
+            self.assertEqual(os.stat(theme).st_nlink, 2)
+            self.assertEqual(os.stat(page).st_nlink, 1)
+            self.assertEqual(stage.report.files, 3)
+            self.assertEqual(stage.report.stored, 2)
+            self.assertEqual(stage.report.inodes_saved, 1)
+            self.assertEqual(stage.report.bytes_saved, len('jquery'))
+
+            # Another version shares the same store
+            stage = self.create_stage(dirname, '2.0')
+            again = self.write(stage.manager.output_dir, 'doc/_static/jquery.js', 'jquery')
+            stage.build()
+
+            self.assertTrue(os.path.samefile(jquery, again))
+            self.assertEqual(stage.report.stored, 0)
+            self.assertEqual(os.stat(jquery).st_nlink, 4)
+            self.assertTrue(os.path.isdir(os.path.join(dirname, settings.STATIC_STORE_DIRNAME)))
+
+    def test_teardown(self):
+        with tempfile.TemporaryDirectory() as dirname:
+            stage = self.create_stage(dirname, '1.0')
+            kept = self.write(stage.manager.output_dir, 'doc/_static/kept.js', 'kept')
+            removed = self.write(stage.manager.output_dir, 'doc/_static/removed.js', 'removed')
+            stage.build()
+            stored = stage.store_path(StaticStore.file_digest(removed))
+            os.unlink(removed)
+            stage.teardown()
+
+            self.assertFalse(os.path.exists(stored))
+            self.assertTrue(os.path.exists(stage.store_path(StaticStore.file_digest(kept))))
@@ -0,0 +1,115 @@
+__author__ = "Namgyal BRISSON (nam4dev)"
+__since__ = "10/25/2019"
+__copyright__ = """MIT License
+
+Copyright (c) 2019 Namgyal Brisson
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import os
+import json
+import jinja2
+import tempfile
+import unittest
+import unittest.mock as mock
+
+from doctool import settings
+from doctool import versions
+from doctool.versions import VersionsManifest
+
+
+class VersionsTests(unittest.TestCase):
+
+    def publish(self, root, version, size=10):
+        output_dir = os.path.join(root, version)
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, 'index.html'), 'w') as handle:
+            handle.write('x' * size)
+        return output_dir
+
+    def test_version_key(self):
+        names = ['1.9', '1.10', '1.9rc1', '1.8.2', '2.0', '1.9.1']
+        self.assertEqual(sorted(names, key=versions.version_key, reverse=True),
+                         ['2.0', '1.10', '1.9.1', '1.9', '1.9rc1', '1.8.2'])
+        self.assertEqual(versions.minor_key('1.9.2'), versions.minor_key('1.9rc1'))
+
+    def test_register(self):
+        with tempfile.TemporaryDirectory() as root:
+            self.publish(root, '1.9', size=5)
+            # Hidden entries (snapshots, store, ...) are not versions
+            os.makedirs(os.path.join(root, settings.SNAPSHOTS_DIRNAME))
+            self.publish(root, '1.10', size=7)
+
+            template = jinja2.Template('var doctoolVersions = {{ available_versions }};')
+            manifest = VersionsManifest(root, template=template)
+            with mock.patch('doctool.versions.FileLock') as lock:
+                self.assertEqual(manifest.register('1.10'), [])
+            lock.assert_called_once_with(manifest.lock_filename)
+            self.assertEqual(manifest.versions, ['1.10', '1.9'])
+
+            with open(manifest.filename) as handle:
+                records = json.load(handle)['versions']
+            self.assertEqual([(record['version'], record['size']) for record in records],
+                             [('1.10', 7), ('1.9', 5)])
+            self.assertRegex(records[0]['built'], r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}Z$')
+            with open(manifest.js_filename) as handle:
+                self.assertEqual(handle.read(), "var doctoolVersions = ['1.10', '1.9'];")
+
+            # The manifest is the reference from now on, versions removed by hand are dropped
+            os.rename(os.path.join(root, '1.9'), os.path.join(root, '.1.9'))
+            self.publish(root, '2.0')
+            manifest.register('2.0')
+            self.assertEqual(VersionsManifest(root).load(), manifest.records)
+            self.assertEqual(manifest.versions, ['2.0', '1.10'])
+
+    def test_retention_per_minor(self):
+        with tempfile.TemporaryDirectory() as root:
+            for version in ('1.8', '1.9', '1.9.1', '1.9.2'):
+                self.publish(root, version)
+            snapshot = os.path.join(root, settings.SNAPSHOTS_DIRNAME, '1.9-20191025100000-42')
+            other = os.path.join(root, settings.SNAPSHOTS_DIRNAME, '1.9.1-20191025100000-42')
+            os.makedirs(snapshot)
+            os.makedirs(other)
+
+            manifest = VersionsManifest(root, per_minor=2)
+            self.assertEqual(manifest.register('1.9'), ['1.9.1'])
+            manifest.cleaner.join()
+
+            # The current version is never pruned
+            self.assertEqual(manifest.versions, ['1.9.2', '1.9', '1.8'])
+            self.assertFalse(os.path.exists(os.path.join(root, '1.9.1')))
+            self.assertFalse(os.path.exists(other))
+            self.assertTrue(os.path.isdir(snapshot))
+            self.assertEqual(sorted(os.listdir(root)), sorted(['.doctool-versions.lock', '.snapshots',
+                                                               settings.VERSIONS_FILENAME,
+                                                               '1.8', '1.9', '1.9.2']))
+
+    def test_retention_max_size(self):
+        with tempfile.TemporaryDirectory() as root:
+            for version in ('1.0', '2.0', '3.0'):
+                self.publish(root, version, size=10)
+
+            manifest = VersionsManifest(root, max_size=25)
+            self.assertEqual(manifest.register('1.0'), ['2.0'])
+            manifest.cleaner.join()
+            self.assertEqual(manifest.versions, ['3.0', '1.0'])
+
+
+if __name__ == '__main__':
+    unittest.main()